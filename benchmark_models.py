@@ -0,0 +1,362 @@
+# benchmark_models.py
+# Usage: python benchmark_models.py [section ...]
+# Runs throughput benchmarks on synthetic data and prints a summary table.
+# Exits non-zero if a module breaks its import-time budget or a
+# correctness check fails.
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+
+def bench_load_forecast(n_sites=2000, seed=42):
+    """Training and day/month-ahead inference throughput of LoadForecaster."""
+    from models.load_profile_model import generate_profiles
+    from models.load_forecast_model import LoadForecaster
+
+    rng = np.random.default_rng(seed)
+    daily = rng.uniform(20, 400, n_sites)
+    loads = generate_profiles(daily, daily / 24 * rng.uniform(1.6, 2.8, n_sites),
+                              rng.choice(["residential", "commercial", "hospital", "school"], n_sites))
+    loads *= rng.lognormal(0, 0.08, loads.shape).astype(np.float32)
+    history, actual = loads[:, :-720], loads[:, -720:]
+
+    rows = []
+    for per_site in (False, True):
+        model = LoadForecaster(per_site=per_site).fit(history, "2025-01-01")
+        day = model.predict_day_ahead(history, "2025-01-01")
+        day_rate = model.stats["predict_site_hours_per_s"]
+        month = model.predict_month_ahead(history, "2025-01-01")
+        label = "per-site" if per_site else "global"
+        rows.append((f"forecast fit ({label})", model.stats["fit_rows_per_s"], "rows/s"))
+        rows.append((f"forecast day-ahead ({label})", day_rate, "site-hours/s"))
+        rows.append((f"forecast month-ahead ({label})", model.stats["predict_site_hours_per_s"], "site-hours/s"))
+        wape = np.abs(day - actual[:, :24]).sum() / actual[:, :24].sum() * 100
+        rows.append((f"forecast day-ahead WAPE ({label})", wape, "%"))
+        wape = np.abs(month - actual).sum() / actual.sum() * 100
+        rows.append((f"forecast month-ahead WAPE ({label})", wape, "%"))
+    return rows
+
+
+def bench_lifetime(n_sites=4096, workers=4, seed=42):
+    """Streaming 25-year simulation, in-process and on shared-memory workers."""
+    from models.billing_model import build_rate_vector
+    from models.generation_model import ambient_temperature_profile, hourly_irradiance_profile
+    from models.lifetime_model import simulate_lifetime
+    from models.load_profile_model import generate_profiles
+
+    rng = np.random.default_rng(seed)
+    daily = rng.uniform(20, 400, n_sites)
+    loads = generate_profiles(daily, daily / 24 * rng.uniform(1.6, 2.8, n_sites), "commercial")
+    pv_kw = daily / 4.5
+    args = (pv_kw, loads, hourly_irradiance_profile(5.2), ambient_temperature_profile(),
+            pv_kw * 400_000, pv_kw * 4_000, 8.0, build_rate_vector("A"))
+
+    rows = []
+    for n_workers in (1, workers):
+        t0 = time.perf_counter()
+        simulate_lifetime(*args, battery_kwh=daily / 2, chunk_size=512, workers=n_workers)
+        elapsed = time.perf_counter() - t0
+        rows.append((f"lifetime 25y ({n_workers} worker{'s' if n_workers > 1 else ''})",
+                     n_sites * 25 / elapsed, "site-years/s"))
+    return rows
+
+
+def bench_reports(n_sites=100_000, seed=42):
+    """Portfolio report rendering throughput per output format."""
+    import io
+
+    from utils.reports import WRITERS
+
+    rng = np.random.default_rng(seed)
+    capex = rng.uniform(2e6, 4e7, n_sites)
+    results = {
+        "pv_kw": capex / 400_000, "battery_kwh": capex / 160_000, "capex": capex, "opex": capex * 0.01,
+        "performance_ratio": rng.uniform(55, 90, n_sites), "payback_years": rng.uniform(4, 25, n_sites),
+        "lcoe": rng.uniform(40, 200, n_sites), "tariff": 120.0, "total_savings": capex * rng.uniform(0.5, 3, n_sites),
+        "annual_tons": capex / 1e6, "lifetime_tons": capex / 4e4,
+    }
+
+    rows = []
+    for fmt, writer in WRITERS.items():
+        t0 = time.perf_counter()
+        writer(results, io.StringIO())
+        rows.append((f"report {fmt}", n_sites / (time.perf_counter() - t0), "sites/s"))
+    return rows
+
+
+def bench_upload(seed=42):
+    """Upload parsing of a year of 15-minute readings; the energy total must survive."""
+    import pandas as pd
+
+    from utils.uploads import clean_upload
+
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range("2025-01-01", "2025-12-31 23:45", freq="15min")
+    kwh = np.round(rng.uniform(0.5, 1.5, timestamps.size), 3)
+    data = pd.DataFrame({"timestamp": timestamps, "load_kwh": kwh}).to_csv(index=False).encode()
+
+    t0 = time.perf_counter()
+    upload = clean_upload(data, "meter.csv")
+    elapsed = time.perf_counter() - t0
+    # Interval readings are energy: the typical year must hold all of it
+    error = abs(upload.annual_kwh - kwh.sum()) / kwh.sum() * 100
+    if error > 1e-6:
+        CHECK_FAILURES.append(f"upload annual total {upload.annual_kwh:,.1f} kWh != readings {kwh.sum():,.1f} kWh")
+
+    # A dropped reading makes the series irregular; its hour is scaled up
+    # from the three readings left, so energy and peak still match 4 x 1 kWh
+    flat = pd.DataFrame({"timestamp": timestamps.delete(1000), "load_kwh": 1.0})
+    gappy = clean_upload(flat.to_csv(index=False).encode(), "gappy.csv")
+    if gappy.annual_kwh != timestamps.size or gappy.peak_kw != 4.0:
+        CHECK_FAILURES.append(f"irregular upload: {gappy.annual_kwh:,.1f} kWh/year, peak {gappy.peak_kw:.2f} kW "
+                              f"(expected {timestamps.size:,} and 4.00)")
+    return [
+        ("upload parse (15-min year)", timestamps.size / elapsed, "rows/s"),
+        ("upload annual total error", error, "%"),
+        ("irregular upload annual total error", abs(gappy.annual_kwh - timestamps.size) / timestamps.size * 100, "%"),
+    ]
+
+
+def bench_representative_days(n_sites=2048, k=None, sample=256, tolerance=1.0, seed=42):
+    """Full-year versus representative-day annual metrics: speed and error."""
+    from models.billing_model import build_rate_vector
+    from models.generation_model import ambient_temperature_profile, hourly_irradiance_profile
+    from models.load_profile_model import generate_profiles
+    from models.representative_days import DEFAULT_DAYS, fit_days, reduction_error, select_days, simulate_year
+
+    k = k or DEFAULT_DAYS
+    rng = np.random.default_rng(seed)
+    daily = rng.uniform(20, 400, n_sites)
+    loads = generate_profiles(daily, daily / 24 * rng.uniform(1.6, 2.8, n_sites), "commercial")
+    irradiance = np.clip(5.2 + 0.8 * np.sin(np.arange(365) / 365 * 2 * np.pi) + rng.normal(0, 0.6, 365), 1, 8)
+    poa, ambient = hourly_irradiance_profile(irradiance), ambient_temperature_profile()
+    args = (daily / 4.5, loads, poa, ambient, build_rate_vector("A"), daily / 2)
+
+    t0 = time.perf_counter()
+    days = select_days(loads, poa, ambient, k=k)
+    select_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    full = simulate_year(*args)
+    full_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    reduced = simulate_year(*args, days=days)
+    reduced_s = time.perf_counter() - t0
+    error = reduction_error(reduced, full)
+
+    # Error-driven choice of k, checked on a sample of sites
+    picked = rng.choice(n_sites, size=min(sample, n_sites), replace=False)
+    sample_args = (args[0][picked], loads[picked]) + args[2:5] + (args[5][picked],)
+    t0 = time.perf_counter()
+    fitted, _ = fit_days(loads, poa, ambient, lambda d: simulate_year(*sample_args, days=d), tolerance)
+    fit_s = time.perf_counter() - t0
+    fitted_error = reduction_error(simulate_year(*args, days=fitted), full)
+    return [
+        (f"select {k} representative days", select_s * 1000, "ms"),
+        ("annual metrics (8760 h)", n_sites / full_s, "sites/s"),
+        (f"annual metrics ({k} days)", n_sites / reduced_s, "sites/s"),
+        ("representative-day speedup", full_s / reduced_s, "x"),
+        ("worst metric error (portfolio)", max(e["portfolio"] for e in error.values()), "%"),
+        ("worst metric error (max site)", max(e["max_site"] for e in error.values()), "%"),
+        (f"fit_days k for {tolerance:g}% on {len(picked)} sites", len(fitted), "days"),
+        ("fit_days time", fit_s * 1000, "ms"),
+        ("fitted worst error (max site, all sites)", max(e["max_site"] for e in fitted_error.values()), "%"),
+    ]
+
+
+def bench_site_dedup(n_sites=100_000, k=500, seed=42):
+    """Exact deduplication and clustering pre-passes ahead of candidate screening."""
+    from models.site_dedup import cluster_sites, deduplicate
+    from models.site_ranking import evaluate_candidates
+
+    rng = np.random.default_rng(seed)
+    load = rng.choice([3_000.0, 6_000.0, 12_000.0, 24_000.0], n_sites)
+    params = {
+        "pv_kw": load / 1_500, "annual_load_kwh": load, "tariff": rng.choice([209.5, 63.0, 50.0], n_sites),
+        "capex": load / 1_500 * 400_000, "opex_annual": load / 1_500 * 4_000, "discount_rate": 8.0,
+        "irradiance": np.round(rng.uniform(4.5, 6.0, n_sites), 1),
+    }
+    extensive = ("npv", "total_savings", "annual_tons", "lifetime_tons")
+
+    rows = []
+    t0 = time.perf_counter()
+    groups = deduplicate(params)
+    rows.append(("deduplicate", n_sites / (time.perf_counter() - t0), "sites/s"))
+    rows.append(("exact duplicate reduction", groups.reduction, "x"))
+
+    sizes = rng.lognormal(0, 0.5, n_sites)
+    for name in ("pv_kw", "annual_load_kwh", "capex", "opex_annual"):
+        params[name] = params[name] * sizes
+    params["irradiance"] = rng.uniform(4.5, 6.0, n_sites)
+    t0 = time.perf_counter()
+    groups = cluster_sites(params, k, scale_by="annual_load_kwh", extensive=("pv_kw", "capex", "opex_annual"))
+    rows.append((f"cluster into {k} sites", (time.perf_counter() - t0) * 1000, "ms"))
+    error = groups.validate(evaluate_candidates, params, extensive, metrics=("npv", "lcoe", "annual_tons"))
+    for name, report in error.items():
+        rows.append((f"clustered {name} error (max site)", report["max_site"], "%"))
+    return rows
+
+
+def bench_forest_intervals(n_rows=50_000, seed=42):
+    """Compiled random-forest intervals against the forest's own mean prediction."""
+    import warnings
+
+    from models.compiled_forest import compiled_forest, predict_intervals
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        forest = compiled_forest("rf_capacity.pkl")
+        if forest is None:
+            return []
+        from models.ml_pipelines import load_pipeline
+
+        rf = load_pipeline("rf_capacity.pkl").named_steps["rf"]
+
+    # Rows drawn around the training distribution (scaler mean and spread)
+    rng = np.random.default_rng(seed)
+    X = np.full((n_rows, forest.n_inputs), np.nan)
+    X[:, forest.keep] = forest.mean + forest.scale * rng.normal(size=(n_rows, forest.keep.shape[0]))
+    Z = forest.transform(X)
+
+    t0 = time.perf_counter()
+    rf.predict(Z)
+    mean_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    predict_intervals(forest, X, leaf_statistics=False)
+    tree_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    predict_intervals(forest, X)
+    qrf_s = time.perf_counter() - t0
+    return [
+        ("forest mean (sklearn)", n_rows / mean_s, "rows/s"),
+        ("forest intervals (per-tree)", n_rows / tree_s, "rows/s"),
+        ("forest intervals (+ leaf statistics)", n_rows / qrf_s, "rows/s"),
+    ]
+
+
+def bench_forest_attributions(n_rows=50_000, seed=42):
+    """Exact tree-path attributions for every row of a batch."""
+    import warnings
+
+    from models.compiled_forest import compiled_forest
+    from models.forest_attributions import explain, forest_paths
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        forest = compiled_forest("rf_capacity.pkl")
+    if forest is None:
+        return []
+
+    rng = np.random.default_rng(seed)
+    X = np.full((n_rows, forest.n_inputs), np.nan)
+    X[:, forest.keep] = forest.mean + forest.scale * rng.normal(size=(n_rows, forest.keep.shape[0]))
+
+    t0 = time.perf_counter()
+    forest_paths(forest)
+    build_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    result = explain(forest, X)
+    explain_s = time.perf_counter() - t0
+    # Attributions must add up to prediction - base_value for every row
+    gap = np.abs(result["base_value"] + result["attributions"].sum(axis=1) - result["prediction"])
+    return [
+        (f"attribution path tables ({forest.n_trees} trees)", build_s * 1000, "ms"),
+        ("forest attributions", n_rows / explain_s, "rows/s"),
+        ("attribution sum gap (max)", gap.max() / np.abs(result["prediction"]).max() * 100, "%"),
+    ]
+
+
+# Cold-import budgets (ms, including NumPy itself) for modules on the
+# startup path. None of them may pull in the ML stack.
+IMPORT_BUDGETS_MS = {
+    "models.savings_model_v1": 250,
+    "models.system_size_model_v1": 250,
+    "models.carbon_model_v1": 250,
+    "models.lcoe_model_v1": 250,
+    "models.performance_model": 250,
+    "models.load_profile_model": 250,
+    "models.generation_model": 250,
+    "models.lifetime_model": 300,
+    "models.site_ranking": 300,
+    "models.carbon_model": 250,
+    "models.savings_model": 250,
+    "models.lcoe_model": 250,
+    "models.system_size_model": 250,
+    "utils.reports": 250,
+    "utils.charts": 250,
+    "utils.uploads": 250,
+    "models.results": 250,
+    "utils.forecast_cache": 250,
+    "models.representative_days": 300,
+    "models.site_dedup": 300,
+    "models.compiled_forest": 250,
+    "models.forest_attributions": 250,
+}
+ML_MODULES = ("pandas", "sklearn", "joblib", "scipy")
+BUDGET_FAILURES = []
+CHECK_FAILURES = []
+
+_IMPORT_PROBE = """
+import sys, time
+t0 = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - t0) * 1000
+print(elapsed, *[m for m in {ml!r} if m in sys.modules])
+"""
+
+
+def bench_imports(repeats=5):
+    """Cold import time of each startup module in a fresh interpreter."""
+    rows = []
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        probe = _IMPORT_PROBE.format(module=module, ml=ML_MODULES)
+        best, loaded = float("inf"), []
+        for _ in range(repeats):
+            out = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True)
+            elapsed, *loaded = out.stdout.split()
+            best = min(best, float(elapsed))
+        if best > budget:
+            BUDGET_FAILURES.append(f"{module}: {best:.0f} ms > {budget} ms budget")
+        if loaded:
+            BUDGET_FAILURES.append(f"{module}: imports {', '.join(loaded)} at startup")
+        rows.append((f"import {module}", best, "ms"))
+    return rows
+
+
+SECTIONS = {
+    "forecast": bench_load_forecast,
+    "lifetime": bench_lifetime,
+    "reports": bench_reports,
+    "upload": bench_upload,
+    "repdays": bench_representative_days,
+    "dedup": bench_site_dedup,
+    "forest": bench_forest_intervals,
+    "attributions": bench_forest_attributions,
+    "imports": bench_imports,
+}
+
+
+if __name__ == "__main__":
+    selected = sys.argv[1:] or list(SECTIONS)
+    results = []
+    for name in selected:
+        t0 = time.perf_counter()
+        results.extend(SECTIONS[name]())
+        print(f"[{name}] done in {time.perf_counter() - t0:.1f}s")
+
+    print("\nBenchmark summary:")
+    width = max(len(r[0]) for r in results)
+    for label, value, unit in results:
+        print(f"  {label:<{width}}  {value:>14,.1f} {unit}")
+
+    if CHECK_FAILURES:
+        print("\nChecks failed:")
+        for failure in CHECK_FAILURES:
+            print(f"  {failure}")
+    if BUDGET_FAILURES:
+        print("\nImport budget exceeded:")
+        for failure in BUDGET_FAILURES:
+            print(f"  {failure}")
+    if CHECK_FAILURES or BUDGET_FAILURES:
+        sys.exit(1)
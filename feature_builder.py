@@ -1,6 +1,8 @@
 import pandas as pd
 
-def build_features(df_input, tariff, capex, opex, discount_rate, irradiance=None):
+from models.emission_model import NIGERIA_GRID_FACTOR
+
+def build_features(df_input, tariff, capex, opex, discount_rate, irradiance=None, pv_generation_kwh=None):
     """
     Construct a DataFrame with all features required by trained PV models:
     - 25-year savings
@@ -22,6 +24,8 @@ def build_features(df_input, tariff, capex, opex, discount_rate, irradiance=None
         Discount rate (%) - optional
     irradiance : float, optional
         Daily solar irradiance (kWh/m²/day)
+    pv_generation_kwh : float, optional
+        Annual PV yield from `models.generation_model`; defaults to 85% of load
     
     Returns
     -------
@@ -33,7 +37,8 @@ def build_features(df_input, tariff, capex, opex, discount_rate, irradiance=None
     irradiance = irradiance or 5.0  # fallback
 
     # PV generation estimate
-    pv_generation_kwh = daily_load * 0.85
+    if pv_generation_kwh is None:
+        pv_generation_kwh = daily_load * 0.85
     grid_energy_cost = daily_load * tariff
     net_annual_pv_cost = capex / 25 + opex
 
@@ -48,10 +53,10 @@ def build_features(df_input, tariff, capex, opex, discount_rate, irradiance=None
         "cost of maintenance= 1% of J                       K": opex,
         "net Annual costof energy produced by Pv system   =J-K": net_annual_pv_cost,
         "Payback  period -Yrs (M) = C/L": capex / (daily_load * tariff * 0.65),
-        "NGAF Nigeria (N) KgCO2e/kWh": 0.5346,
-        "Annual Reduced carbon KgCO2e/kWh  (P) = N*E": 0.5346 * pv_generation_kwh,
-        "Reduced carbon emission  (tonnes) (Q) P/1000": 0.5346 * pv_generation_kwh / 1000,
-        "total lifecycle Reduced carbon emission  (tonnes),LCC at 25yrs-(N)         (R)": 0.5346 * pv_generation_kwh / 1000 * 25,
+        "NGAF Nigeria (N) KgCO2e/kWh": NIGERIA_GRID_FACTOR,
+        "Annual Reduced carbon KgCO2e/kWh  (P) = N*E": NIGERIA_GRID_FACTOR * pv_generation_kwh,
+        "Reduced carbon emission  (tonnes) (Q) P/1000": NIGERIA_GRID_FACTOR * pv_generation_kwh / 1000,
+        "total lifecycle Reduced carbon emission  (tonnes),LCC at 25yrs-(N)         (R)": NIGERIA_GRID_FACTOR * pv_generation_kwh / 1000 * 25,
         "total life time energy production (KWh)  E*25(S)": pv_generation_kwh * 25,
         "LCOE-N/unit (T)": (capex + opex * 25) / (pv_generation_kwh * 25),
         "Cost of energy consumed from the Grid kWh/30yrs (₦)      ( U)": grid_energy_cost * 30,
@@ -0,0 +1,333 @@
+# models/battery_model.py
+import numpy as np
+
+from models.billing_model import HOURS_PER_YEAR
+
+# Indicative installed LFP battery cost (₦/kWh)
+BATTERY_COST_PER_KWH = 300_000.0
+
+
+class RainflowCounter:
+    """
+    Streaming four-point rainflow counter for many SoC series at once.
+
+    SoC chunks of shape (n_sites, hours) are reduced to turning points and
+    appended to each site's residue, held together as one padded
+    (n_sites, K) matrix. Cycles are then extracted in whole-matrix passes:
+    every inner pair b-c enclosed by both neighbouring ranges is closed at
+    once and the matrix is compacted, until no pair qualifies. Closing
+    non-adjacent pairs in any order gives the same cycles as the classic
+    stack-based single pass, but the Python loop runs over a handful of
+    passes rather than over turning points or sites × hours. The residue
+    persists between chunks, so years can be fed one at a time and cycles
+    spanning a chunk boundary are still closed correctly; `finish` counts
+    what remains as half cycles.
+
+    Parameters
+    ----------
+    n_sites : int
+        Number of series counted together
+    cycles_at_full_dod : float
+        Cycle life at 100% depth of discharge
+    woehler_exponent : float
+        Exponent k in N(DoD) = cycles_at_full_dod × DoD^-k
+    depth_bins : int
+        Bins of the per-site cycle-depth histogram
+    """
+
+    def __init__(self, n_sites: int, cycles_at_full_dod: float = 4000.0,
+                 woehler_exponent: float = 1.5, depth_bins: int = 10):
+        self.n_sites = n_sites
+        self.cycles_at_full_dod = cycles_at_full_dod
+        self.woehler_exponent = woehler_exponent
+        self.depth_bins = depth_bins
+
+        self._residue = np.zeros((n_sites, 0))
+        self._counts = np.zeros(n_sites, dtype=np.int64)
+        self._last = None
+        self._sign = np.zeros(n_sites, dtype=np.int8)
+        self._records = []
+
+        self.damage = np.zeros(n_sites)
+        self.cycles = np.zeros(n_sites)
+        self.histogram = np.zeros((n_sites, depth_bins))
+
+    @staticmethod
+    def _pack(mask, values):
+        """Left-align the True entries of each row into a NaN-padded matrix."""
+        rows, cols = np.nonzero(mask)
+        counts = np.bincount(rows, minlength=mask.shape[0])
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        packed = np.full((mask.shape[0], int(counts.max(initial=0))), np.nan)
+        packed[rows, np.arange(rows.size) - offsets[rows]] = values[rows, cols]
+        return packed, counts
+
+    def _turning_points(self, soc):
+        """Turning points of a chunk, continuing from the previous chunk's last sample."""
+        if self._last is None:
+            full = soc
+        else:
+            full = np.concatenate([self._last[:, None], soc], axis=1)
+        n, t = full.shape
+
+        step = np.sign(np.diff(full, axis=1)).astype(np.int8)
+        # Direction of the last non-flat step at or before each position
+        pos = np.where(step != 0, np.arange(t - 1), -1)
+        np.maximum.accumulate(pos, axis=1, out=pos)
+        filled = np.where(pos >= 0, np.take_along_axis(step, np.maximum(pos, 0), axis=1), self._sign[:, None])
+        before = np.concatenate([self._sign[:, None], filled[:, :-1]], axis=1)
+
+        turning = np.zeros((n, t), dtype=bool)
+        turning[:, :-1] = (step != 0) & (before != 0) & (step != before)
+        if self._last is None:
+            turning[:, 0] = True  # the series start always opens the residue
+
+        self._sign = filled[:, -1].copy() if t > 1 else self._sign
+        self._last = full[:, -1].copy()
+        return self._pack(turning, full)
+
+    def _append(self, points, counts):
+        """Append per-site points after each site's residue."""
+        width = self._residue.shape[1] + points.shape[1]
+        merged = np.full((self.n_sites, width), np.nan)
+        merged[:, :self._residue.shape[1]] = self._residue
+        cols = self._counts[:, None] + np.arange(points.shape[1])
+        rows = np.broadcast_to(np.arange(self.n_sites)[:, None], cols.shape)
+        keep = np.arange(points.shape[1])[None, :] < counts[:, None]
+        merged[rows[keep], cols[keep]] = points[keep]
+        self._residue, self._counts = merged, self._counts + counts
+
+    def _extract(self):
+        """Close every enclosed inner pair, pass by pass, until none remain."""
+        x, counts = self._residue, self._counts
+        while x.shape[1] >= 4:
+            ranges = np.abs(np.diff(x, axis=1))
+            inner = ranges[:, 1:-1]
+            # Pair (j, j+1) needs points j-1 and j+2 on either side
+            j = np.arange(1, x.shape[1] - 2)[None, :]
+            closed = (j + 2 < counts[:, None]) & (inner <= ranges[:, :-2]) & (inner <= ranges[:, 2:])
+            if not closed.any():
+                break
+            # Adjacent pairs share a point (only possible with equal ranges,
+            # e.g. identical daily cycles); take every other pair of each run
+            # now and the rest on a later pass
+            last_open = np.maximum.accumulate(np.where(closed, 0, j), axis=1)
+            closed &= (j - last_open) % 2 == 1
+
+            rows, cols = np.nonzero(closed)
+            cols = cols + 1
+            self._record(rows, np.abs(x[rows, cols + 1] - x[rows, cols]),
+                         (x[rows, cols + 1] + x[rows, cols]) / 2, 1.0)
+
+            keep = np.arange(x.shape[1])[None, :] < counts[:, None]
+            keep[rows, cols] = False
+            keep[rows, cols + 1] = False
+            x, counts = self._pack(keep, x)
+        self._residue, self._counts = x, counts
+
+    def _record(self, sites, ranges, means, weight):
+        self._records.append((sites, ranges, means, np.full(sites.size, weight)))
+
+    def _flush_records(self):
+        """Fold recorded cycles into damage, equivalent cycles and the histogram."""
+        if not self._records:
+            return np.zeros(self.n_sites)
+        sites, ranges, _, weights = (np.concatenate(parts) for parts in zip(*self._records))
+        self._records = []
+        depth = np.clip(ranges, 1e-9, 1.0)
+        per_cycle = depth ** self.woehler_exponent / self.cycles_at_full_dod
+        damage = np.bincount(sites, weights=weights * per_cycle, minlength=self.n_sites)
+        self.damage += damage
+        self.cycles += np.bincount(sites, weights=weights * ranges, minlength=self.n_sites)
+        bins = np.minimum((ranges * self.depth_bins).astype(np.int64), self.depth_bins - 1)
+        self.histogram += np.bincount(
+            sites * self.depth_bins + bins, weights=weights, minlength=self.n_sites * self.depth_bins
+        ).reshape(self.n_sites, self.depth_bins)
+        return damage
+
+    def update(self, soc):
+        """
+        Count the cycles closed by a new SoC chunk.
+
+        Parameters
+        ----------
+        soc : np.ndarray
+            State of charge as a fraction, shape (n_sites, hours)
+
+        Returns
+        -------
+        np.ndarray
+            Damage (fraction of cycle life) from cycles closed in this chunk
+        """
+        soc = np.atleast_2d(np.asarray(soc, dtype=np.float64))
+        self._append(*self._turning_points(soc))
+        self._extract()
+        return self._flush_records()
+
+    def finish(self):
+        """Count the residue, including the final sample, as half cycles."""
+        if self._last is not None:
+            self._append(self._last[:, None], np.ones(self.n_sites, dtype=np.int64))
+            self._extract()
+        x, counts = self._residue, self._counts
+        ranges = np.abs(np.diff(x, axis=1))
+        valid = np.arange(ranges.shape[1])[None, :] < (counts[:, None] - 1)
+        valid &= ranges > 0
+        rows, cols = np.nonzero(valid)
+        self._record(rows, ranges[rows, cols], (x[rows, cols] + x[rows, cols + 1]) / 2, 0.5)
+        self._residue = np.zeros((self.n_sites, 0))
+        self._counts[:] = 0
+        self._last = None
+        self._sign[:] = 0
+        return self._flush_records()
+
+
+def rainflow_damage(soc, chunk_hours: int = HOURS_PER_YEAR, **kwargs):
+    """
+    One-shot rainflow count of SoC series.
+
+    Parameters
+    ----------
+    soc : np.ndarray
+        State of charge as a fraction, shape (n_sites, hours)
+    chunk_hours : int
+        Hours counted per chunk
+    **kwargs
+        Passed to `RainflowCounter`
+
+    Returns
+    -------
+    dict
+        damage, equivalent_full_cycles and depth_histogram per site
+    """
+    soc = np.atleast_2d(soc)
+    counter = RainflowCounter(soc.shape[0], **kwargs)
+    for start in range(0, soc.shape[1], chunk_hours):
+        counter.update(soc[:, start:start + chunk_hours])
+    counter.finish()
+    return {
+        "damage": counter.damage,
+        "equivalent_full_cycles": counter.cycles,
+        "depth_histogram": counter.histogram,
+    }
+
+
+def remaining_capacity(age_years, cycle_damage, calendar_fade: float = 0.02,
+                       end_of_life: float = 0.8):
+    """Capacity fraction after `age_years` of calendar ageing and Wöhler `cycle_damage`."""
+    return 1.0 - calendar_fade * np.sqrt(age_years) - (1.0 - end_of_life) * cycle_damage
+
+
+def simulate_battery_ageing(
+    soc_years,
+    lifetime: int = 25,
+    calendar_fade: float = 0.02,
+    end_of_life: float = 0.8,
+    cycles_at_full_dod: float = 4000.0,
+    woehler_exponent: float = 1.5
+):
+    """
+    Capacity fade and replacement years from yearly SoC trajectories.
+
+    Capacity at the end of each year is
+
+        1 - calendar_fade × sqrt(age) - (1 - end_of_life) × cycle_damage
+
+    where age and cycle damage restart at each replacement. A battery is
+    replaced at the end of the first year its capacity falls to
+    `end_of_life` or below.
+
+    Parameters
+    ----------
+    soc_years : np.ndarray or iterable
+        (n_sites, lifetime × 8760) SoC matrix, or an iterable yielding one
+        (n_sites, 8760) array per year so long runs never hold every year
+        in memory. A single (n_sites, 8760) array is repeated every year.
+    lifetime : int
+        Analysis period in years
+    calendar_fade : float
+        Calendar capacity loss after one year (fraction, √t law)
+    end_of_life : float
+        Capacity fraction that triggers a replacement
+    cycles_at_full_dod, woehler_exponent : float
+        Cycle-life curve, see `RainflowCounter`
+
+    Returns
+    -------
+    dict
+        capacity (n_sites × lifetime, end of year before any replacement),
+        replacements (bool, n_sites × lifetime), replacement_years (list of
+        year arrays per site) and equivalent_full_cycles per year
+    """
+    if isinstance(soc_years, np.ndarray):
+        soc_years = np.atleast_2d(soc_years)
+        if soc_years.shape[1] == HOURS_PER_YEAR:
+            years = (soc_years for _ in range(lifetime))
+        else:
+            years = (soc_years[:, y * HOURS_PER_YEAR:(y + 1) * HOURS_PER_YEAR] for y in range(lifetime))
+    else:
+        years = iter(soc_years)
+
+    counter = None
+    capacity = replacements = cycles = None
+    damage = age = None
+
+    for y in range(lifetime):
+        soc = np.atleast_2d(next(years))
+        if counter is None:
+            n = soc.shape[0]
+            counter = RainflowCounter(n, cycles_at_full_dod, woehler_exponent)
+            capacity = np.empty((n, lifetime))
+            replacements = np.zeros((n, lifetime), dtype=bool)
+            cycles = np.empty((n, lifetime))
+            damage, age = np.zeros(n), np.zeros(n)
+
+        before = counter.cycles.copy()
+        damage += counter.update(soc)
+        if y == lifetime - 1:
+            damage += counter.finish()
+        cycles[:, y] = counter.cycles - before
+        age += 1
+
+        capacity[:, y] = remaining_capacity(age, damage, calendar_fade, end_of_life)
+        replaced = capacity[:, y] <= end_of_life
+        replacements[:, y] = replaced
+        damage[replaced] = 0.0
+        age[replaced] = 0.0
+
+    # A replacement at the end of the final year is never needed
+    replacements[:, -1] = False
+    return {
+        "capacity": capacity,
+        "replacements": replacements,
+        "replacement_years": [np.flatnonzero(row) + 1 for row in replacements],
+        "equivalent_full_cycles": cycles,
+    }
+
+
+def replacement_costs(replacements, battery_kwh, cost_per_kwh: float = BATTERY_COST_PER_KWH,
+                      cost_decline: float = 0.0):
+    """
+    Per-year battery replacement costs for the cash-flow models.
+
+    Parameters
+    ----------
+    replacements : np.ndarray
+        Boolean (n_sites, lifetime) from `simulate_battery_ageing`
+    battery_kwh : float or array-like
+        Battery capacity per site (kWh)
+    cost_per_kwh : float
+        Replacement cost today (₦/kWh)
+    cost_decline : float
+        Annual decline in battery prices, e.g. 0.04 for 4%/year
+
+    Returns
+    -------
+    np.ndarray
+        Costs (₦), shape (n_sites, lifetime); pass a row as
+        `replacement_costs` to `predict_savings` or `predict_lcoe`
+    """
+    replacements = np.atleast_2d(replacements)
+    years = np.arange(1, replacements.shape[1] + 1)
+    kwh = np.asarray(battery_kwh, dtype=np.float64).reshape(-1, 1)
+    return replacements * kwh * cost_per_kwh * (1.0 - cost_decline) ** years
@@ -0,0 +1,232 @@
+# models/billing_model.py
+import numpy as np
+
+from models.savings_model_v1 import savings_cashflows
+
+HOURS_PER_YEAR = 8760
+
+# Indicative NERC band tariffs (₦/kWh). Band A matches the tariff used in the
+# training workbook; override with the DisCo's current schedule when known.
+BAND_TARIFFS = {
+    "A": 209.5,
+    "B": 63.0,
+    "C": 50.0,
+    "D": 43.0,
+    "E": 40.0,
+}
+
+_CALENDAR_CACHE = {}
+
+
+def calendar_index(year: int = 2025):
+    """
+    Precomputed hour-of-year calendar for a 365-day year.
+
+    Leap days are dropped so every year has exactly 8760 hours and all
+    hourly series share the same layout.
+
+    Returns
+    -------
+    dict
+        hour (0-23), weekday (0=Mon..6=Sun), month (0-11) and day (0-364)
+        arrays of length 8760
+    """
+    if year in _CALENDAR_CACHE:
+        return _CALENDAR_CACHE[year]
+
+    days = np.datetime64(f"{year}-01-01") + np.arange(366)
+    months = days.astype("datetime64[M]")
+    leap_day = (months.astype(np.int64) % 12 == 1) & (days - months == np.timedelta64(28, "D"))
+    days = days[~leap_day][:365]
+
+    # 1970-01-01 was a Thursday
+    weekday = ((days.astype(np.int64) + 3) % 7).astype(np.int8)
+    month = (days.astype("datetime64[M]").astype(np.int64) % 12).astype(np.int8)
+
+    index = {
+        "hour": np.tile(np.arange(24, dtype=np.int8), 365),
+        "weekday": np.repeat(weekday, 24),
+        "month": np.repeat(month, 24),
+        "day": np.repeat(np.arange(365, dtype=np.int16), 24),
+    }
+    for arr in index.values():
+        arr.setflags(write=False)
+    _CALENDAR_CACHE[year] = index
+    return index
+
+
+def band_tariff(band: str) -> float:
+    """Return the indicative flat tariff (₦/kWh) for a NERC service band."""
+    key = str(band).strip().upper().replace("BAND", "").strip()
+    if key not in BAND_TARIFFS:
+        raise ValueError(f"Unknown tariff band: {band!r}")
+    return BAND_TARIFFS[key]
+
+
+def build_rate_vector(tariff: float, tou_periods=None, year: int = 2025):
+    """
+    Expand a tariff and an optional time-of-use schedule into hourly rates.
+
+    Parameters
+    ----------
+    tariff : float or str
+        Base tariff (₦/kWh) or a band letter such as "A"
+    tou_periods : list of dict, optional
+        Periods applied in order, later ones overriding earlier ones. Each
+        period has a `rate` (₦/kWh) or `multiplier` on the base tariff, plus
+        optional `hours` as (start, end) with end exclusive and allowed to
+        wrap midnight, `weekdays` (iterable of 0-6) and `months` (iterable
+        of 1-12).
+    year : int
+        Calendar year used to place weekdays
+
+    Returns
+    -------
+    np.ndarray
+        Hourly rate vector of length 8760 (₦/kWh)
+    """
+    base = band_tariff(tariff) if isinstance(tariff, str) else float(tariff)
+    rates = np.full(HOURS_PER_YEAR, base)
+    if not tou_periods:
+        return rates
+
+    cal = calendar_index(year)
+    for period in tou_periods:
+        mask = np.ones(HOURS_PER_YEAR, dtype=bool)
+        if period.get("hours") is not None:
+            start, end = period["hours"]
+            if start <= end:
+                mask &= (cal["hour"] >= start) & (cal["hour"] < end)
+            else:
+                mask &= (cal["hour"] >= start) | (cal["hour"] < end)
+        if period.get("weekdays") is not None:
+            mask &= np.isin(cal["weekday"], list(period["weekdays"]))
+        if period.get("months") is not None:
+            mask &= np.isin(cal["month"], [m - 1 for m in period["months"]])
+
+        if "rate" in period:
+            rates[mask] = period["rate"]
+        else:
+            rates[mask] = base * period.get("multiplier", 1.0)
+    return rates
+
+
+def escalation_factors(escalation, lifetime: int = 25):
+    """
+    Cumulative tariff multipliers for years 1..lifetime.
+
+    `escalation` is either a constant annual rate or a per-year sequence of
+    rates; year 1 is always billed at the base tariff.
+    """
+    rates = np.broadcast_to(np.asarray(escalation, dtype=float), (lifetime,))
+    return np.concatenate(([1.0], np.cumprod(1 + rates[:-1])))
+
+
+def annual_bills(grid_import_kwh, rates, lifetime: int = 25, escalation=0.0,
+                 fixed_charge: float = 0.0):
+    """
+    Annual electricity bills for many sites over the analysis period.
+
+    Parameters
+    ----------
+    grid_import_kwh : np.ndarray
+        Hourly grid import, shape (8760,), (n_sites, 8760) for a profile
+        repeated every year, or (n_sites, lifetime, 8760) for year-specific
+        profiles
+    rates : np.ndarray
+        Hourly rates, shape (8760,) shared by all sites or (n_sites, 8760)
+    lifetime : int
+        Analysis period in years
+    escalation : float or array-like
+        Annual tariff escalation rate(s)
+    fixed_charge : float
+        Fixed charge per year (₦), escalated with the energy rate
+
+    Returns
+    -------
+    np.ndarray
+        Bills of shape (n_sites, lifetime) (₦/year)
+    """
+    grid = np.asarray(grid_import_kwh, dtype=float)
+    rates = np.asarray(rates, dtype=float)
+    if grid.ndim == 1:
+        grid = grid[None, :]
+    if grid.ndim == 3 and grid.shape[1] != lifetime:
+        raise ValueError(f"grid_import_kwh has {grid.shape[1]} years per site, expected lifetime={lifetime}")
+
+    if rates.ndim == 1:
+        energy_cost = grid @ rates
+    elif grid.ndim == 3:
+        energy_cost = np.einsum("syh,sh->sy", grid, rates)
+    else:
+        energy_cost = np.einsum("sh,sh->s", grid, rates)
+
+    if energy_cost.ndim == 1:
+        energy_cost = np.repeat(energy_cost[:, None], lifetime, axis=1)
+
+    factors = escalation_factors(escalation, lifetime)
+    return (energy_cost + fixed_charge) * factors
+
+
+def bill_savings(load_kwh, grid_import_kwh, rates, lifetime: int = 25,
+                 escalation=0.0):
+    """
+    Year-by-year bill savings from displacing grid imports with PV.
+
+    Returns an array of shape (n_sites, lifetime): the bill for the original
+    load minus the bill for the residual grid import.
+    """
+    before = annual_bills(load_kwh, rates, lifetime, escalation)
+    after = annual_bills(grid_import_kwh, rates, lifetime, escalation)
+    return before - after
+
+
+def predict_bill_savings(
+    load_kwh,
+    grid_import_kwh,
+    capex,
+    opex_annual,
+    discount_rate: float,
+    tariff=BAND_TARIFFS["A"],
+    tou_periods=None,
+    tariff_escalation=0.0,
+    system_lifetime: int = 25,
+    year: int = 2025
+):
+    """
+    Savings and NPV for many sites from hourly profiles and a ToU tariff.
+
+    Parameters
+    ----------
+    load_kwh : np.ndarray
+        Hourly load without PV, shape (8760,) or (n_sites, 8760)
+    grid_import_kwh : np.ndarray
+        Hourly grid import with PV, same layout as `load_kwh` or
+        (n_sites, lifetime, 8760) when degradation is modelled per year
+    capex, opex_annual : float or np.ndarray
+        Investment (₦) and annual O&M (₦/year) per site
+    discount_rate : float
+        Discount rate (%) e.g. 8.0
+    tariff : float or str
+        Base tariff (₦/kWh) or NERC band letter
+    tou_periods : list of dict, optional
+        Time-of-use schedule, see `build_rate_vector`
+    tariff_escalation : float or array-like
+        Annual tariff escalation rate(s)
+    system_lifetime : int
+        Analysis period in years
+    year : int
+        First calendar year of operation
+
+    Returns
+    -------
+    dict
+        gross_savings (n_sites × years) plus the outputs of
+        `savings_model_v1.savings_cashflows`
+    """
+    rates = build_rate_vector(tariff, tou_periods, year)
+    gross = bill_savings(load_kwh, grid_import_kwh, rates, system_lifetime,
+                         tariff_escalation)
+    result = savings_cashflows(gross, capex, opex_annual, discount_rate)
+    result["gross_savings"] = gross
+    return result
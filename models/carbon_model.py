@@ -1,23 +1,12 @@
 # carbon_model.py
-import joblib
-from pathlib import Path
-from feature_builder import build_features
-
-_CO2_PIPELINE = None
-
-def _load_pipeline():
-    global _CO2_PIPELINE
-    if _CO2_PIPELINE is not None:
-        return _CO2_PIPELINE
-    base = Path(__file__).resolve().parents[1]
-    model_path = base / "pv_model_outputs" / "rf_co2.pkl"
-    if model_path.exists():
-        _CO2_PIPELINE = joblib.load(model_path)
-    return _CO2_PIPELINE
+from models import ml_pipelines
+from models.results import CarbonResult
 
 def predict_carbon_reduction(df_input, carbon_factor=0.5346):
-    pipeline = _load_pipeline()
     try:
+        from feature_builder import build_features
+
+        pipeline = ml_pipelines.load_pipeline("rf_co2.pkl")
         # Use build_features for ML prediction
         df_features = build_features(
             df_input=df_input,
@@ -28,7 +17,7 @@ def predict_carbon_reduction(df_input, carbon_factor=0.5346):
         )
         pred = pipeline.predict(df_features)
         annual_tons = float(pred[0])
-        return {"annual_tons": annual_tons, "lifetime_tons": annual_tons * 25}
+        return CarbonResult(annual_tons=annual_tons, lifetime_tons=annual_tons * 25)
 
     except Exception:
         # fallback: use first numeric column as annual load
@@ -39,4 +28,4 @@ def predict_carbon_reduction(df_input, carbon_factor=0.5346):
 
         annual_tons = round(annual_load * carbon_factor * 0.7 / 1000, 2)
         lifetime_tons = annual_tons * 25
-        return {"annual_tons": annual_tons, "lifetime_tons": lifetime_tons}
+        return CarbonResult(annual_tons=annual_tons, lifetime_tons=lifetime_tons)
@@ -1,59 +1,7 @@
-import os
-from pathlib import Path
-import joblib
-import pandas as pd
 import numpy as np
 
-
-_CO2_PIPELINE = None
-_CO2_FEATURES = None
-
-
-def _find_target_column(cols, keywords):
-    for kw in keywords:
-        for c in cols:
-            if kw.lower() in str(c).lower():
-                return c
-    return None
-
-
-def _load_pipeline_and_features():
-    global _CO2_PIPELINE, _CO2_FEATURES
-    if _CO2_PIPELINE is not None:
-        return _CO2_PIPELINE, _CO2_FEATURES
-
-    base = Path(__file__).resolve().parents[1]
-    model_path = base / "pv_model_outputs" / "rf_co2.pkl"
-    cleaned_csv = base / "pv_model_outputs" / "cleaned_pv_dataset.csv"
-
-    if model_path.exists():
-        try:
-            _CO2_PIPELINE = joblib.load(model_path)
-        except Exception:
-            _CO2_PIPELINE = None
-
-    # Try to reconstruct feature columns from cleaned csv (same logic as training)
-    if cleaned_csv.exists():
-        try:
-            df_clean = pd.read_csv(cleaned_csv)
-            numeric_cols = df_clean.select_dtypes(include=[np.number]).columns.tolist()
-            # detect targets by keywords used in training
-            target_map = {
-                "25yr_savings": ["savings at 25yrs", "savings at 25yr", "25yr savings", "savings at 25yrs lifespan"],
-                "capacity": ["size/capacity", "existing pv system", "capacity", "kva", "kw", "system capacity"],
-                "co2": ["emission", "co2", "carbon", "reduced carbon", "kgco2"],
-                "lcoe": ["lcoe", "levelized cost", "levelised cost", "levelized cost of energy"]
-            }
-            detected = {k: _find_target_column(df_clean.columns, kws) for k, kws in target_map.items()}
-            exclude = [v for v in detected.values() if v is not None]
-            feature_cols = [c for c in numeric_cols if c not in exclude]
-            _CO2_FEATURES = feature_cols
-        except Exception:
-            _CO2_FEATURES = None
-    else:
-        _CO2_FEATURES = None
-
-    return _CO2_PIPELINE, _CO2_FEATURES
+from models import ml_pipelines
+from models.results import CarbonResult
 
 
 def _aggregate_for_feature(name, df):
@@ -76,19 +24,39 @@ def _aggregate_for_feature(name, df):
     return np.nan
 
 
-def predict_carbon_reduction(df, carbon_factor):
+def predict_carbon_reduction(df, carbon_factor, displaced_kwh=None, diesel_share=0.0,
+                             grid_decarbonization=0.0):
     """Predict annual and lifetime CO2 reduction.
 
-    This will attempt to load a trained pipeline at
+    When `displaced_kwh` (hourly or monthly energy displaced by PV) is given,
+    the time-varying engine in `models.emission_model` is used with
+    `carbon_factor` as the grid factor, blended with diesel by
+    `diesel_share` and decarbonized by `grid_decarbonization` per year.
+
+    Otherwise this will attempt to load a trained pipeline at
     `pv_model_outputs/rf_co2.pkl` and reconstruct the feature vector from
     `pv_model_outputs/cleaned_pv_dataset.csv`. If that fails, it falls back
     to the original placeholder formula.
     """
+    if displaced_kwh is not None:
+        from models.emission_model import avoided_emissions
+
+        result = avoided_emissions(
+            displaced_kwh, grid_factors=carbon_factor, diesel_share=diesel_share,
+            grid_decarbonization=grid_decarbonization
+        )
+        return CarbonResult(
+            annual_tons=round(float(result["annual_tons"][0]), 2),
+            lifetime_tons=round(float(result["lifetime_tons"][0]), 2),
+        )
+
     annual_load = df["load_kwh"].sum()
 
-    pipeline, feature_cols = _load_pipeline_and_features()
+    feature_cols = ml_pipelines.feature_columns()
+
+    if feature_cols and ml_pipelines.load_pipeline("rf_co2.pkl") is not None:
+        import pandas as pd
 
-    if pipeline is not None and feature_cols:
         # build a single-row DataFrame with columns in the same order
         row = {}
         for col in feature_cols:
@@ -109,13 +77,12 @@ def predict_carbon_reduction(df, carbon_factor):
                 val = _aggregate_for_feature(col, df)
             row[col] = val
 
-        X = pd.DataFrame([row], columns=feature_cols)
         try:
-            pred = pipeline.predict(X)
+            pred = ml_pipelines.predict_row("rf_co2.pkl", row, feature_cols)
             # model was trained on 'Reduced carbon emission  (tonnes) ...'
             annual_tons = float(pred[0])
             lifetime_tons = round(annual_tons * 25, 2)
-            return {"annual_tons": round(annual_tons, 2), "lifetime_tons": round(lifetime_tons, 2)}
+            return CarbonResult(annual_tons=round(annual_tons, 2), lifetime_tons=round(lifetime_tons, 2))
         except Exception:
             # fallback to placeholder
             pass
@@ -125,4 +92,4 @@ def predict_carbon_reduction(df, carbon_factor):
     annual_tons = round(annual_carbon_kg / 1000, 2)
     lifetime_tons = round((annual_carbon_kg * 25) / 1000, 2)
 
-    return {"annual_tons": annual_tons, "lifetime_tons": lifetime_tons}
+    return CarbonResult(annual_tons=annual_tons, lifetime_tons=lifetime_tons)
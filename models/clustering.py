@@ -0,0 +1,149 @@
+# models/clustering.py
+"""
+Vectorized k-means and medoid selection shared by the reduction passes
+(`models.representative_days` for days of a year, `models.site_dedup` for
+sites of a portfolio), plus the error report comparing a reduced run with
+its full reference.
+"""
+import numpy as np
+
+
+def sq_distances(X, centers):
+    """Squared Euclidean distances, shape (n_points, n_centers)."""
+    d = (X * X).sum(axis=1)[:, None] - 2.0 * X @ centers.T + (centers * centers).sum(axis=1)[None, :]
+    return np.maximum(d, 0.0)
+
+
+def assign(X, centers, chunk_size: int = 16_384):
+    """Nearest center of every point and its squared distance, in row chunks."""
+    n = X.shape[0]
+    labels = np.empty(n, dtype=np.int64)
+    fit = np.empty(n)
+    for lo in range(0, n, chunk_size):
+        d = sq_distances(X[lo:lo + chunk_size], centers)
+        labels[lo:lo + chunk_size] = d.argmin(axis=1)
+        fit[lo:lo + chunk_size] = d[np.arange(d.shape[0]), labels[lo:lo + chunk_size]]
+    return labels, fit
+
+
+def kmeans(X, k: int, weights=None, n_init: int = 4, max_iter: int = 100, seed: int = 0,
+           sample_size: int = 20_000, tol: float = 1e-3, chunk_size: int = 16_384):
+    """
+    Weighted Lloyd's k-means with k-means++ seeding, best of `n_init` runs.
+
+    Each iteration is one chunked distance product and one `bincount` per
+    feature; empty clusters are reseeded with the worst-fitted points.
+    Above `sample_size` points the centers are fitted on a random sample
+    (keeping its weights) and every point is then assigned once, so cost
+    stops growing with n after the final pass.
+
+    Parameters
+    ----------
+    X : array-like
+        Points, shape (n, n_features)
+    k : int
+        Clusters (capped at n)
+    weights : array-like, optional
+        Point weights, e.g. duplicate counts
+    sample_size : int
+        Points used to fit the centers
+    tol : float
+        Stop once fewer than this fraction of sample labels change
+    chunk_size : int
+        Points per distance block, bounds temporary memory
+
+    Returns
+    -------
+    (np.ndarray, np.ndarray, float)
+        Labels (n,), centers (k, n_features) and weighted inertia
+    """
+    X = np.asarray(X, dtype=np.float64)
+    n, n_features = X.shape
+    k = min(int(k), n)
+    w = np.ones(n) if weights is None else np.asarray(weights, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    fit_X, fit_w = X, w
+    if n > sample_size:
+        sample = np.sort(rng.choice(n, size=sample_size, replace=False))
+        fit_X, fit_w = X[sample], w[sample]
+    m = fit_X.shape[0]
+    best = None
+
+    for _ in range(n_init):
+        # k-means++: each new center drawn in proportion to weighted squared distance
+        centers = np.empty((k, n_features))
+        centers[0] = fit_X[rng.choice(m, p=fit_w / fit_w.sum())]
+        closest = ((fit_X - centers[0]) ** 2).sum(axis=1)
+        for j in range(1, k):
+            p = fit_w * closest
+            total = p.sum()
+            centers[j] = fit_X[rng.choice(m, p=p / total) if total > 0 else rng.integers(m)]
+            np.minimum(closest, ((fit_X - centers[j]) ** 2).sum(axis=1), out=closest)
+
+        labels = None
+        for _ in range(max_iter):
+            new_labels, fit = assign(fit_X, centers, chunk_size)
+            changed = m if labels is None else int((new_labels != labels).sum())
+            labels = new_labels
+            mass = np.bincount(labels, weights=fit_w, minlength=k)
+            filled = mass > 0
+            sums = np.stack([np.bincount(labels, weights=fit_w * fit_X[:, j], minlength=k)
+                             for j in range(n_features)], axis=1)
+            centers[filled] = sums[filled] / mass[filled, None]
+            if not filled.all():
+                centers[~filled] = fit_X[np.argsort(fit)[::-1][:int((~filled).sum())]]
+            if changed <= tol * m:
+                break
+
+        inertia = float(fit_w @ assign(fit_X, centers, chunk_size)[1])
+        if best is None or inertia < best[1]:
+            best = (centers.copy(), inertia)
+
+    labels, fit = assign(X, best[0], chunk_size)
+    return labels, best[0], float(w @ fit)
+
+
+def medoids(X, labels, centers):
+    """
+    Member nearest each non-empty cluster's center.
+
+    Returns
+    -------
+    (np.ndarray, np.ndarray)
+        Medoid row per kept cluster and labels renumbered over those
+        clusters
+    """
+    k = centers.shape[0]
+    fit = ((X - centers[labels]) ** 2).sum(axis=1)
+    order = np.lexsort((fit, labels))
+    present = np.bincount(labels, minlength=k) > 0
+    first = np.searchsorted(labels[order], np.arange(k))
+    return order[first[present]], (np.cumsum(present) - 1)[labels]
+
+
+def relative_error(approx, exact, metrics):
+    """
+    Error of approximate results against a reference run.
+
+    Returns
+    -------
+    dict
+        Per metric: "portfolio" (relative error of the summed totals, %)
+        and "max_site" (largest per-site relative error, %)
+    """
+    report = {}
+    for name in metrics:
+        a = np.asarray(approx[name], dtype=np.float64)
+        e = np.asarray(exact[name], dtype=np.float64)
+        finite = np.isfinite(a) & np.isfinite(e)
+        a, e = a[finite], e[finite]
+        scale = np.abs(e).max() if e.size else 0.0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Sites with negligible values are judged against the largest one
+            site = np.abs(a - e) / np.maximum(np.abs(e), 1e-3 * scale)
+        total = e.sum()
+        report[name] = {
+            "portfolio": float(abs(a.sum() - total) / abs(total) * 100) if total else 0.0,
+            "max_site": float(np.nan_to_num(site).max() * 100) if site.size else 0.0,
+        }
+    return report
@@ -0,0 +1,376 @@
+# models/compiled_forest.py
+"""
+Random-forest pipelines compiled to flat NumPy arrays.
+
+The `pv_model_outputs/rf_*.pkl` pipelines (median imputer → standard scaler
+→ 200-tree forest) only expose the mean of their trees. Compiling them
+gives access to every tree at once:
+
+- the imputer and scaler become two vectors (columns the imputer dropped
+  because they were empty at fit time are dropped here too);
+- all trees are concatenated into one node table (feature, threshold,
+  left, right, value), and each split also gets a bitmask of the leaves it
+  rules out, so a batch of rows is routed through every tree at once with
+  one vectorized pass per split level of the widest tree, instead of a
+  Python loop over `estimators_`.
+
+`predict_intervals` turns the (rows × trees) leaf values into mean,
+standard deviation and quantiles. When the training table is available
+(`cleaned_pv_dataset.csv`), quantile-forest leaf statistics are added as
+well: each training row is weighted by how often it shares a leaf with the
+query row (Meinshausen's quantile regression forest, over all training
+rows since bootstrap draws are not stored), and quantiles are taken of the
+training targets under those weights.
+
+Only NumPy is needed to evaluate a compiled forest; sklearn is imported
+once, when a pipeline is unpickled and compiled.
+"""
+import os
+
+import numpy as np
+
+from models import ml_pipelines
+
+DEFAULT_QUANTILES = (0.05, 0.5, 0.95)
+
+_COMPILED = {}
+
+
+class CompiledForest:
+    """
+    Pipeline preprocessing plus every tree of the forest as flat arrays.
+
+    Parameters
+    ----------
+    pipeline : sklearn.pipeline.Pipeline
+        Fitted imputer → scaler → RandomForestRegressor pipeline (the
+        first two steps are optional)
+    """
+
+    def __init__(self, pipeline):
+        steps = dict(pipeline.named_steps) if hasattr(pipeline, "named_steps") else {"rf": pipeline}
+        forest = steps.pop("rf") if "rf" in steps else steps.popitem()[1]
+        imputer, scaler = steps.get("imputer"), steps.get("scaler")
+
+        self.n_inputs = forest.n_features_in_ if imputer is None else imputer.statistics_.shape[0]
+        if imputer is not None:
+            fill = np.asarray(imputer.statistics_, dtype=np.float64)
+            # SimpleImputer drops columns that were empty at fit time
+            self.keep = np.flatnonzero(~np.isnan(fill)) if not getattr(imputer, "keep_empty_features", False) \
+                else np.arange(fill.shape[0])
+            self.fill = np.nan_to_num(fill[self.keep])
+        else:
+            self.keep = np.arange(self.n_inputs)
+            self.fill = None
+        self.mean = np.asarray(scaler.mean_, dtype=np.float64) if scaler is not None and scaler.with_mean else None
+        self.scale = np.asarray(scaler.scale_, dtype=np.float64) if scaler is not None and scaler.with_std else None
+
+        trees = [est.tree_ for est in forest.estimators_]
+        counts = np.array([t.node_count for t in trees])
+        self.roots = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+        self.n_trees = len(trees)
+        self.max_depth = max(t.max_depth for t in trees)
+
+        offsets = np.repeat(self.roots, counts)
+        nodes = np.arange(counts.sum())
+        left = np.concatenate([t.children_left for t in trees]).astype(np.int64)
+        right = np.concatenate([t.children_right for t in trees]).astype(np.int64)
+        self.is_leaf = left < 0
+        self.left = np.where(self.is_leaf, nodes, left + offsets)
+        self.right = np.where(self.is_leaf, nodes, right + offsets)
+        self.feature = np.where(self.is_leaf, 0, np.concatenate([t.feature for t in trees])).astype(np.int64)
+        self.threshold = np.concatenate([t.threshold for t in trees])
+        self.value = np.concatenate([t.value[:, 0, 0] for t in trees]).astype(np.float64)
+        # Training cover (bootstrap-weighted samples) reaching each node
+        self.n_samples = np.concatenate([t.weighted_n_node_samples for t in trees]).astype(np.float64)
+        # Traversal tables: children interleaved so one gather picks either
+        self._children = np.stack([self.left, self.right], axis=1).ravel().astype(np.int32)
+        self._feature = self.feature.astype(np.int32)
+        self._compile_leaf_masks(trees)
+
+        self.train_leaves = None
+        self.train_target = None
+
+    def _compile_leaf_masks(self, trees):
+        """
+        Bitmask tables for split-parallel evaluation (as in QuickScorer).
+
+        Each tree's leaves are numbered left to right. A split whose test
+        sends a row right rules out the leaves of its left subtree, so the
+        leaf a row reaches is the leftmost one no true-right split rules
+        out: AND the masks of every such split, take the lowest set bit.
+        Masks use the narrowest unsigned type holding every tree's leaves
+        (uint8 for the small trees fitted here); trees with more than 64
+        leaves keep the level traversal.
+        """
+        self._masks = None
+        if any((t.children_left < 0).sum() > 64 for t in trees):
+            return
+        split_nodes, masks, leaf_nodes, first_split = [], [], [], []
+        for tree, root in zip(trees, self.roots):
+            left, right = tree.children_left, tree.children_right
+            first_split.append(len(split_nodes))
+            # In-order walk: (node, visited) pairs; leaf ranges per node
+            start = np.zeros(tree.node_count, dtype=np.int64)
+            n_leaves = 0
+            stack = [(0, False)]
+            while stack:
+                node, visited = stack.pop()
+                if left[node] < 0:
+                    start[node] = n_leaves
+                    leaf_nodes.append(root + node)
+                    n_leaves += 1
+                elif not visited:
+                    stack.append((node, True))
+                    stack.append((left[node], False))
+                else:
+                    # Left subtree done: its leaves are [start of left, n_leaves)
+                    lo, hi = int(self._first_leaf(left, start, node)), n_leaves
+                    start[node] = lo
+                    split_nodes.append(root + node)
+                    masks.append(~(((1 << (hi - lo)) - 1) << lo) & ((1 << 64) - 1))
+                    stack.append((right[node], False))
+        # Pad to (trees, max splits per tree); padding never goes right
+        per_tree = np.diff(np.append(first_split, len(split_nodes)))
+        width = max(int(per_tree.max()), 1)
+        slot = np.arange(len(split_nodes)) - np.repeat(first_split, per_tree)
+        tree = np.repeat(np.arange(self.n_trees), per_tree)
+        split_nodes = np.array(split_nodes, dtype=np.int64)
+        self._split_feature = np.zeros((self.n_trees, width), dtype=np.int64)
+        self._split_threshold = np.full((self.n_trees, width), np.inf)
+        max_leaves = max(int((t.children_left < 0).sum()) for t in trees)
+        dtype = next(d for d in (np.uint8, np.uint16, np.uint32, np.uint64) if np.iinfo(d).bits >= max_leaves)
+        masks = np.array(masks, dtype=np.uint64).astype(dtype)
+        self._masks = np.full((self.n_trees, width), np.iinfo(dtype).max, dtype=dtype)
+        self._split_feature[tree, slot] = self.feature[split_nodes]
+        self._split_threshold[tree, slot] = self.threshold[split_nodes]
+        self._masks[tree, slot] = masks
+        # Lowest set bit -> leaf position, by table for masks up to 16 bits
+        bits = np.iinfo(dtype).bits
+        self._bit_position = None
+        if bits <= 16:
+            self._bit_position = np.zeros(1 << bits, dtype=np.int64)
+            self._bit_position[1 << np.arange(bits)] = np.arange(bits)
+        self._leaf_node = np.array(leaf_nodes, dtype=np.int64)
+        leaf_counts = np.array([(t.children_left < 0).sum() for t in trees])
+        self._leaf_offset = np.concatenate(([0], np.cumsum(leaf_counts)[:-1]))
+
+    @staticmethod
+    def _first_leaf(left, start, node):
+        """First leaf number under `node`, following left children."""
+        while left[node] >= 0:
+            node = left[node]
+        return start[node]
+
+    def __repr__(self):
+        return (f"CompiledForest(n_trees={self.n_trees}, nodes={self.value.shape[0]}, "
+                f"max_depth={self.max_depth}, inputs={self.n_inputs})")
+
+    def transform(self, X):
+        """Imputed and scaled model inputs (n_rows, n_features) as the forest saw them."""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        if X.shape[1] != self.n_inputs:
+            raise ValueError(f"Expected {self.n_inputs} input columns, got {X.shape[1]}")
+        X = X[:, self.keep]
+        if self.fill is not None:
+            X = np.where(np.isnan(X), self.fill, X)
+        if self.mean is not None:
+            X = X - self.mean
+        if self.scale is not None:
+            X = X / self.scale
+        # Trees split on float32 inputs
+        return X.astype(np.float32)
+
+    def apply(self, Z, chunk_size: int = 4096):
+        """
+        Global leaf index reached in every tree, shape (n_rows, n_trees).
+
+        `Z` is already transformed. Uses the split bitmasks when compiled,
+        otherwise moves every (row, tree) pair one level down per step,
+        with pairs already at a leaf staying there.
+        """
+        n, n_features = Z.shape
+        leaves = np.empty((n, self.n_trees), dtype=np.int64)
+        for lo in range(0, n, chunk_size):
+            block = Z[lo:lo + chunk_size]
+            if self._masks is not None:
+                leaves[lo:lo + chunk_size] = self._apply_masks(block)
+                continue
+            flat = np.ascontiguousarray(block).ravel()
+            base = (np.arange(block.shape[0], dtype=np.int32) * n_features)[:, None]
+            node = np.repeat(self.roots.astype(np.int32)[None, :], block.shape[0], axis=0)
+            for _ in range(self.max_depth):
+                right = flat[base + self._feature[node]] > self.threshold[node]
+                node = self._children[2 * node + right]
+            leaves[lo:lo + chunk_size] = node
+        return leaves
+
+    def _apply_masks(self, block):
+        """Leaves of one block from all split tests (see _compile_leaf_masks)."""
+        dtype = self._masks.dtype
+        alive = np.full((block.shape[0], self.n_trees), np.iinfo(dtype).max, dtype=dtype)
+        for slot in range(self._masks.shape[1]):
+            goes_right = block[:, self._split_feature[:, slot]] > self._split_threshold[:, slot]
+            # mask where the split goes right, all ones (0 - 1 wraps) where it goes left
+            alive &= self._masks[:, slot] | (goes_right.astype(dtype) - dtype.type(1))
+        lowest = alive & (~alive + dtype.type(1))
+        if self._bit_position is not None:
+            position = self._bit_position[lowest]
+        else:
+            position = np.log2(lowest.astype(np.float64)).astype(np.int64)
+        return self._leaf_node[self._leaf_offset + position]
+
+    def tree_predictions(self, X):
+        """Prediction of every tree for every row, shape (n_rows, n_trees)."""
+        return self.value[self.apply(self.transform(X))]
+
+    def predict(self, X):
+        """Forest mean, as `pipeline.predict`."""
+        return self.tree_predictions(X).mean(axis=1)
+
+    def set_training_data(self, X, y):
+        """Record the training rows' leaves and targets for quantile-forest statistics."""
+        y = np.asarray(y, dtype=np.float64)
+        known = ~np.isnan(y)
+        self.train_leaves = self.apply(self.transform(np.asarray(X, dtype=np.float64)[known]))
+        self.train_target = y[known]
+        # Training rows grouped by leaf, CSR-style: the rows in leaf `node` are
+        # _leaf_rows[_leaf_start[node]:_leaf_start[node + 1]]
+        nodes = self.train_leaves.ravel()
+        occupancy = np.bincount(nodes, minlength=self.value.shape[0])
+        self._leaf_start = np.concatenate(([0], np.cumsum(occupancy)))
+        self._leaf_rows = (np.argsort(nodes, kind="stable") // self.n_trees).astype(np.int64)
+        return self
+
+    def leaf_weights(self, leaves):
+        """
+        Quantile-forest weights of the training rows for each query row,
+        shape (n_rows, n_train): per tree, 1 / (training rows in the query's
+        leaf) for each row sharing it, averaged over trees.
+        """
+        n_rows, n_train = leaves.shape[0], self.train_target.shape[0]
+        flat = leaves.ravel()
+        start = self._leaf_start[flat]
+        count = self._leaf_start[flat + 1] - start
+        # One entry per (query row, tree, training row in the query's leaf)
+        total = int(count.sum())
+        first = np.cumsum(count) - count
+        position = np.arange(total) - np.repeat(first - start, count)
+        query = np.repeat(np.arange(flat.shape[0]) // leaves.shape[1], count)
+        share = np.repeat(1.0 / np.maximum(count, 1), count)
+        weights = np.bincount(query * n_train + self._leaf_rows[position], weights=share,
+                              minlength=n_rows * n_train)
+        return weights.reshape(n_rows, n_train) / self.n_trees
+
+
+def weighted_quantiles(values, weights, quantiles):
+    """
+    Quantiles of `values` (n_train,) under per-row weights (n_rows, n_train),
+    shape (n_rows, n_quantiles), using the step (inverse-CDF) definition.
+    """
+    order = np.argsort(values)
+    cdf = np.cumsum(weights[:, order], axis=1)
+    cdf /= np.where(cdf[:, -1:] > 0, cdf[:, -1:], 1.0)
+    q = np.asarray(quantiles, dtype=np.float64)
+    pos = (cdf[:, None, :] < q[None, :, None] - 1e-12).sum(axis=2)
+    return values[order][np.minimum(pos, values.shape[0] - 1)]
+
+
+def _quantile_name(q):
+    return f"q{q * 100:g}".replace(".", "_")
+
+
+def compiled_forest(filename: str):
+    """
+    `CompiledForest` of pipeline `pv_model_outputs/<filename>` with training
+    leaf statistics when the cleaned training table is available, or None
+    if the pipeline cannot be loaded. Compiled once per process.
+    """
+    if filename in _COMPILED:
+        return _COMPILED[filename]
+    pipeline = ml_pipelines.load_pipeline(filename)
+    forest = CompiledForest(pipeline) if pipeline is not None else None
+    if forest is not None:
+        training = _training_table(filename)
+        if training is not None:
+            forest.set_training_data(*training)
+    _COMPILED[filename] = forest
+    return forest
+
+
+def _training_table(filename):
+    """(features, target) used to fit `rf_<target>.pkl`, or None."""
+    key = os.path.splitext(filename)[0].removeprefix("rf_")
+    columns = ml_pipelines.feature_columns()
+    cleaned_csv = os.path.join(ml_pipelines.ARTIFACT_DIR, "cleaned_pv_dataset.csv")
+    if key not in ml_pipelines.TARGET_KEYWORDS or not columns or not os.path.exists(cleaned_csv):
+        return None
+    import pandas as pd
+
+    df = pd.read_csv(cleaned_csv)
+    target = ml_pipelines.find_target_column(df.columns, ml_pipelines.TARGET_KEYWORDS[key])
+    if target is None:
+        return None
+    return df[columns].to_numpy(dtype=np.float64), df[target].to_numpy(dtype=np.float64)
+
+
+def predict_intervals(forest, X, quantiles=DEFAULT_QUANTILES, leaf_statistics: bool = True,
+                      attributions: bool = False, chunk_size: int = 4096):
+    """
+    Point predictions with spread for a batch of rows.
+
+    Parameters
+    ----------
+    forest : CompiledForest or str
+        Compiled forest or a pipeline filename in `pv_model_outputs/`
+    X : array-like or DataFrame
+        Rows in training feature order (`ml_pipelines.feature_columns()`);
+        NaN marks a missing input, filled as in training
+    quantiles : sequence of float
+        Quantile levels in [0, 1]
+    leaf_statistics : bool
+        Add quantile-forest quantiles when training data is attached
+    attributions : bool
+        Add per-feature attributions of the mean
+        (`models.forest_attributions`)
+    chunk_size : int
+        Rows per block of quantile-forest weights, bounds temporary memory
+
+    Returns
+    -------
+    BatchResults
+        mean (equal to `pipeline.predict`), std and per-tree quantiles
+        named e.g. q5, q50, q95; with leaf statistics also qrf_q5, ...;
+        with attributions also base_value and attributions (n_rows, n_inputs)
+    """
+    from models.results import BatchResults
+
+    if isinstance(forest, str):
+        name = forest
+        forest = compiled_forest(name)
+        if forest is None:
+            raise FileNotFoundError(os.path.join(ml_pipelines.ARTIFACT_DIR, name))
+    if hasattr(X, "to_numpy"):
+        X = X.to_numpy(dtype=np.float64)
+
+    Z = forest.transform(X)
+    leaves = forest.apply(Z)
+    per_tree = forest.value[leaves]
+    columns = {"mean": per_tree.mean(axis=1), "std": per_tree.std(axis=1)}
+    for q, values in zip(quantiles, np.quantile(per_tree, quantiles, axis=1)):
+        columns[_quantile_name(q)] = values
+    if leaf_statistics and forest.train_leaves is not None:
+        qrf = np.concatenate([
+            weighted_quantiles(forest.train_target, forest.leaf_weights(leaves[lo:lo + chunk_size]), quantiles)
+            for lo in range(0, leaves.shape[0], chunk_size)
+        ])
+        for i, q in enumerate(quantiles):
+            columns["qrf_" + _quantile_name(q)] = qrf[:, i]
+    if attributions:
+        from models.forest_attributions import forest_paths, input_attributions
+
+        columns["base_value"] = np.full(Z.shape[0], forest_paths(forest).base_value)
+        columns["attributions"] = input_attributions(forest, Z)
+    return BatchResults(columns)
@@ -0,0 +1,137 @@
+# models/emission_model.py
+import numpy as np
+
+from models.billing_model import HOURS_PER_YEAR, calendar_index
+
+# Nigerian grid emission factor (kgCO2e/kWh) used in the training workbook
+NIGERIA_GRID_FACTOR = 0.5346
+
+# Small diesel gensets at typical part load (kgCO2e/kWh delivered)
+DIESEL_FACTOR = 0.80
+
+
+def expand_factors(factors, year: int = 2025):
+    """
+    Expand an emission-factor series to 8760 hourly values.
+
+    Parameters
+    ----------
+    factors : float or array-like
+        A constant, 12 monthly values, 24 hour-of-day values or 8760 hourly
+        values along the last axis; leading axes (e.g. sites) are kept
+    year : int
+        Calendar year used to lay out months
+
+    Returns
+    -------
+    np.ndarray
+        Hourly factors, shape (..., 8760)
+    """
+    factors = np.asarray(factors, dtype=np.float64)
+    if factors.ndim == 0:
+        return np.full(HOURS_PER_YEAR, float(factors))
+    n = factors.shape[-1]
+    if n == HOURS_PER_YEAR:
+        return factors
+    cal = calendar_index(year)
+    if n == 12:
+        return factors[..., cal["month"]]
+    if n == 24:
+        return factors[..., cal["hour"]]
+    raise ValueError(f"Expected 1, 12, 24 or {HOURS_PER_YEAR} factors, got {n}")
+
+
+def _weighted_sum(energy, weights):
+    """Row-wise dot product of (N, T) energy with (T,) or (N, T) weights."""
+    if weights.ndim == 1:
+        return energy @ weights
+    return np.einsum("nt,nt->n", energy, weights)
+
+
+def avoided_emissions(
+    displaced_kwh,
+    grid_factors=NIGERIA_GRID_FACTOR,
+    diesel_share=0.0,
+    diesel_factor: float = DIESEL_FACTOR,
+    lifetime: int = 25,
+    grid_decarbonization: float = 0.0,
+    degradation_rate: float = 0.0,
+    year: int = 2025
+):
+    """
+    Avoided emissions over the system lifetime for many sites.
+
+    Each displaced kWh avoids either grid or diesel generation depending on
+    the hourly supply mix. Grid factors fall by `grid_decarbonization` per
+    year while diesel stays constant, so the year-y total is
+
+        (1 - degradation)^y * [(1 - decarb)^y * E·((1 - d) g) + E·(d f_diesel)]
+
+    and the whole (sites × years) matrix needs only two matrix-vector
+    products over the hourly axis plus an outer product with the yearly
+    factors.
+
+    Parameters
+    ----------
+    displaced_kwh : array-like
+        Energy displaced by PV, shape (n_sites, 8760) hourly or
+        (n_sites, 12) monthly; a 1-D series is treated as one site
+    grid_factors : float or array-like
+        Grid emission factors (kgCO2e/kWh): constant, monthly (12), hour of
+        day (24) or hourly (8760), optionally per site as (n_sites, T)
+    diesel_share : float or array-like
+        Share of displaced energy that would otherwise come from diesel,
+        with the same layouts as `grid_factors`
+    diesel_factor : float
+        Diesel emission factor (kgCO2e/kWh)
+    lifetime : int
+        Analysis period in years
+    grid_decarbonization : float
+        Annual reduction in grid emission factors, e.g. 0.02 for 2%/year
+    degradation_rate : float
+        Annual decline in displaced energy (PV degradation)
+    year : int
+        Calendar year used to lay out monthly and hour-of-day factors
+
+    Returns
+    -------
+    dict
+        annual_tons (first year), lifetime_tons and yearly_tons
+        (n_sites × lifetime)
+    """
+    energy = np.atleast_2d(np.asarray(displaced_kwh))
+    if energy.dtype not in (np.float32, np.float64):
+        energy = energy.astype(np.float64)
+    n_steps = energy.shape[1]
+
+    grid = np.asarray(grid_factors, dtype=np.float64)
+    diesel = np.clip(np.asarray(diesel_share, dtype=np.float64), 0.0, 1.0)
+    if n_steps == 12:
+        grid = np.broadcast_to(grid, grid.shape[:-1] + (12,)) if grid.ndim else np.full(12, float(grid))
+        diesel = np.broadcast_to(diesel, diesel.shape[:-1] + (12,)) if diesel.ndim else np.full(12, float(diesel))
+    elif n_steps == HOURS_PER_YEAR:
+        grid = expand_factors(grid, year)
+        diesel = expand_factors(diesel, year)
+    else:
+        raise ValueError(f"displaced_kwh must have 12 or {HOURS_PER_YEAR} columns, got {n_steps}")
+
+    # (N, 2): first-year kg avoided from grid and from diesel. Weights take
+    # the energy dtype so float32 profile matrices are not copied to float64
+    components = np.stack([
+        _weighted_sum(energy, ((1.0 - diesel) * grid).astype(energy.dtype)),
+        _weighted_sum(energy, (diesel * diesel_factor).astype(energy.dtype)),
+    ], axis=1).astype(np.float64)
+
+    years = np.arange(lifetime)
+    retained = (1.0 - degradation_rate) ** years
+    yearly_factors = np.stack([
+        retained * (1.0 - grid_decarbonization) ** years,
+        retained,
+    ])  # (2, lifetime)
+
+    yearly_tons = components @ yearly_factors / 1000.0
+    return {
+        "annual_tons": yearly_tons[:, 0],
+        "lifetime_tons": yearly_tons.sum(axis=1),
+        "yearly_tons": yearly_tons,
+    }
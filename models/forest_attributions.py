@@ -0,0 +1,280 @@
+# models/forest_attributions.py
+"""
+Per-prediction feature attributions for the compiled random forests.
+
+Attributions are exact path-dependent TreeSHAP values: for every row they
+split `prediction - base_value` over the input features, where the base
+value is the forest's mean training prediction (the cover-weighted root
+values) and features outside a coalition are marginalized along the tree
+with training cover, as in Lundberg et al.'s TreeExplainer.
+
+Per leaf, the coalition game is a product over the distinct features on the
+leaf's path: a feature in the coalition contributes 1 or 0 (whether the row
+satisfies that feature's tests on the path), one outside contributes the
+fraction of training cover the path keeps. The Shapley value of a product
+game depends only on which tests the row satisfies, so for each leaf every
+pattern of satisfied tests (2^d for d distinct features, d <= 5 for the
+shipped trees) is solved once when the forest is first explained and
+cached. Explaining a batch is then one comparison pass over all leaves and
+rows, a table lookup, and one matrix product that sums leaf contributions
+into features; no Python loop over rows or trees.
+
+    result = explain("rf_capacity.pkl", X)
+    top_attributions(result["attributions"][0], ml_pipelines.feature_columns())
+
+`predict_intervals(..., attributions=True)` attaches the same columns to
+interval output, and `attribution_frame` flattens them for export.
+"""
+from math import factorial
+
+import numpy as np
+
+from models.compiled_forest import CompiledForest, compiled_forest
+
+# Largest number of distinct features on one path: patterns pack into one
+# byte and the table holds 2^8 entries per leaf
+MAX_PATH_FEATURES = 8
+
+_PATHS = {}
+
+
+def _product_game_shapley(z, o, active):
+    """
+    Shapley values of the product games prod_j (o_j if j in S else z_j).
+
+    Parameters
+    ----------
+    z, o, active : np.ndarray
+        Cover fractions, test outcomes (0/1) and real-slot flags, shape
+        (..., D); inactive slots are padding
+
+    Returns
+    -------
+    np.ndarray
+        Shapley value of every slot, shape (..., D), zero on padding
+    """
+    z, o, active = np.broadcast_arrays(z, o, active)
+    z = np.where(active, z, 1.0)
+    o = np.where(active, o, 0.0)
+    depth = z.shape[-1]
+    d = active.sum(axis=-1)
+
+    # Coefficients of P(t) = prod_j (z_j + o_j t)
+    poly = np.zeros(z.shape[:-1] + (depth + 1,))
+    poly[..., 0] = 1.0
+    for j in range(depth):
+        shifted = np.zeros_like(poly)
+        shifted[..., 1:] = poly[..., :-1]
+        poly = z[..., j, None] * poly + o[..., j, None] * shifted
+
+    # Shapley weights k! (d - 1 - k)! / d! for coalitions of size k < d
+    table = np.zeros((depth + 1, depth))
+    for n in range(1, depth + 1):
+        for k in range(n):
+            table[n, k] = factorial(k) * factorial(n - 1 - k) / factorial(n)
+    weights = table[d]
+
+    phi = np.zeros(z.shape)
+    for i in range(depth):
+        zi, oi = z[..., i, None], o[..., i, None]
+        # Divide slot i's factor back out of P: Q = P / (z_i + o_i t)
+        divided = poly[..., :depth] / zi
+        unwound = np.empty_like(divided)
+        carry = poly[..., depth]
+        for k in range(depth - 1, -1, -1):
+            unwound[..., k] = carry
+            carry = poly[..., k] - zi[..., 0] * carry
+        quotient = np.where(oi > 0, unwound, divided)
+        phi[..., i] = (o[..., i] - z[..., i]) * (quotient * weights).sum(axis=-1)
+    return np.where(active, phi, 0.0)
+
+
+def _round_down_float32(values):
+    """Largest float32 not above each value (x <= v iff x <= result for float32 x)."""
+    rounded = values.astype(np.float32)
+    above = rounded > values
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+class ForestPaths:
+    """
+    Root-to-leaf path structure of a compiled forest and its cached Shapley
+    tables.
+
+    For every leaf, the distinct features tested on its path with the
+    interval (lo, hi] the path allows for each, the fraction of training
+    cover the path keeps per feature, and the leaf's Shapley contribution
+    to each of those features for every pattern of satisfied tests.
+
+    Parameters
+    ----------
+    forest : CompiledForest
+    """
+
+    def __init__(self, forest: CompiledForest):
+        self.forest = forest
+        n_samples = forest.n_samples
+        leaves = np.flatnonzero(forest.is_leaf)
+        parent = np.full(forest.value.shape[0], -1, dtype=np.int64)
+        internal = np.flatnonzero(~forest.is_leaf)
+        parent[forest.left[internal]] = internal
+        parent[forest.right[internal]] = internal
+
+        paths = []
+        for leaf in leaves:
+            intervals = {}
+            node = leaf
+            while parent[node] >= 0:
+                up = parent[node]
+                feature, threshold = forest.feature[up], forest.threshold[up]
+                lo, hi, cover = intervals.get(feature, (-np.inf, np.inf, 1.0))
+                if forest.left[up] == node:
+                    hi = min(hi, threshold)
+                else:
+                    lo = max(lo, threshold)
+                intervals[feature] = (lo, hi, cover * n_samples[node] / n_samples[up])
+                node = up
+            paths.append(intervals)
+
+        depth = max(max((len(p) for p in paths), default=0), 1)
+        if depth > MAX_PATH_FEATURES:
+            raise ValueError(f"Paths test up to {depth} distinct features; "
+                             f"pattern tables support {MAX_PATH_FEATURES}")
+        n_leaves = leaves.shape[0]
+        self.depth = depth
+        self.leaves = leaves
+        feature = np.zeros((n_leaves, depth), dtype=np.int64)
+        # Padding slots can never be satisfied, so their pattern bit stays 0
+        lo_bound = np.full((n_leaves, depth), np.inf)
+        hi_bound = np.full((n_leaves, depth), np.inf)
+        z = np.ones((n_leaves, depth))
+        active = np.zeros((n_leaves, depth), dtype=bool)
+        for i, intervals in enumerate(paths):
+            for j, (column, (lo, hi, cover)) in enumerate(sorted(intervals.items())):
+                feature[i, j], lo_bound[i, j], hi_bound[i, j], z[i, j] = column, lo, hi, cover
+                active[i, j] = True
+        # Inputs are float32, so bounds rounded down to float32 give the same
+        # tests as the float64 thresholds without upcasting every comparison
+        self.lo = np.ascontiguousarray(_round_down_float32(lo_bound).T)
+        self.hi = np.ascontiguousarray(_round_down_float32(hi_bound).T)
+
+        # Shapley contribution of every leaf for every satisfied-test pattern:
+        # shape (n_leaves, 2^depth, depth), scaled by the leaf value
+        patterns = (np.arange(1 << depth)[:, None] >> np.arange(depth)) & 1
+        self.table = _product_game_shapley(
+            z[:, None, :], patterns[None, :, :].astype(np.float64), active[:, None, :]
+        ) * forest.value[leaves][:, None, None]
+        self.table = self.table.reshape(n_leaves * (1 << depth), depth)
+
+        # Sums slot contributions into model features: (n_leaves * depth, n_features)
+        n_features = forest.keep.shape[0]
+        self.to_feature = np.zeros((n_leaves * depth, n_features))
+        rows = np.arange(n_leaves * depth)
+        self.to_feature[rows, feature.ravel()] = active.ravel()
+        # Path tables are stored slot-major, shape (depth, n_leaves)
+        self.feature = np.ascontiguousarray(feature.T)
+        self.base_value = float(forest.value[forest.roots].mean())
+
+    def shap_values(self, Z, chunk_size: int = 1024):
+        """
+        Attributions of `CompiledForest.transform` output, in model feature
+        space (after imputation and dropped columns), shape
+        (n_rows, n_features).
+        """
+        n = Z.shape[0]
+        depth, n_leaves = self.feature.shape
+        offset = (np.arange(n_leaves) << depth)[None, :]
+        out = np.empty((n, self.to_feature.shape[1]))
+        for lo in range(0, n, chunk_size):
+            # Slot-major (rows, depth, leaves) so each slot's tests are contiguous
+            x = Z[lo:lo + chunk_size][:, self.feature]
+            satisfied = ((x > self.lo) & (x <= self.hi)).view(np.uint8)
+            pattern = np.zeros((x.shape[0], n_leaves), dtype=np.uint8)
+            for j in range(depth):
+                pattern |= satisfied[:, j] << j
+            contrib = self.table[offset + pattern]
+            out[lo:lo + chunk_size] = contrib.reshape(x.shape[0], -1) @ self.to_feature
+        return out / self.forest.n_trees
+
+
+def forest_paths(forest):
+    """
+    Cached `ForestPaths` of a compiled forest or of a pipeline filename in
+    `pv_model_outputs/`; None if the pipeline is unavailable.
+    """
+    if isinstance(forest, str):
+        forest = compiled_forest(forest)
+        if forest is None:
+            return None
+    paths = _PATHS.get(id(forest))
+    if paths is None or paths.forest is not forest:
+        paths = _PATHS[id(forest)] = ForestPaths(forest)
+    return paths
+
+
+def input_attributions(forest: CompiledForest, Z, chunk_size: int = 1024):
+    """
+    Attributions of transformed rows `Z` over the pipeline inputs, shape
+    (n_rows, n_inputs); inputs the pipeline drops get 0.
+    """
+    attributions = np.zeros((Z.shape[0], forest.n_inputs))
+    attributions[:, forest.keep] = forest_paths(forest).shap_values(Z, chunk_size)
+    return attributions
+
+
+def explain(forest, X, chunk_size: int = 1024):
+    """
+    Predictions with per-feature attributions for a batch of rows.
+
+    Parameters
+    ----------
+    forest : CompiledForest or str
+        Compiled forest or a pipeline filename in `pv_model_outputs/`
+    X : array-like or DataFrame
+        Rows in training feature order (`ml_pipelines.feature_columns()`)
+
+    Returns
+    -------
+    BatchResults
+        prediction, base_value and attributions (n_rows, n_inputs), one
+        column per input. For every row
+        base_value + attributions.sum(axis=1) == prediction.
+    """
+    from models.results import BatchResults
+
+    paths = forest_paths(forest)
+    if paths is None:
+        raise FileNotFoundError(forest)
+    forest = paths.forest
+    if hasattr(X, "to_numpy"):
+        X = X.to_numpy(dtype=np.float64)
+    Z = forest.transform(X)
+    return BatchResults({
+        "prediction": forest.value[forest.apply(Z)].mean(axis=1),
+        "base_value": np.full(Z.shape[0], paths.base_value),
+        "attributions": input_attributions(forest, Z, chunk_size),
+    })
+
+
+def attribution_frame(results, columns, prefix: str = "why: "):
+    """
+    Flat table of batch results with one attribution column per input
+    (`prefix` + input name), for CSV and Excel export; `to_frame` keeps
+    only the 1-D columns.
+    """
+    frame = results.to_frame()
+    names = [prefix + str(c).strip() for c in columns]
+    for name, values in zip(names, results["attributions"].T):
+        frame[name] = values
+    return frame
+
+
+def top_attributions(attributions, columns, k: int = 5):
+    """
+    The `k` largest contributions of one row as (column, value) pairs,
+    largest magnitude first, for display next to a prediction.
+    """
+    attributions = np.asarray(attributions, dtype=np.float64)
+    order = np.argsort(-np.abs(attributions), kind="stable")[:k]
+    return [(str(columns[i]).strip(), float(attributions[i])) for i in order if attributions[i] != 0]
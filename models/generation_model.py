@@ -0,0 +1,152 @@
+# models/generation_model.py
+import numpy as np
+
+HOURS_PER_YEAR = 8760
+
+
+def hourly_irradiance_profile(irradiance_kwh_m2_day, sunrise: float = 6.5,
+                              sunset: float = 18.5):
+    """
+    Spread a daily irradiance figure over a half-sine day.
+
+    Parameters
+    ----------
+    irradiance_kwh_m2_day : float or array-like
+        Daily plane-of-array irradiance, a scalar or one value per day (365)
+    sunrise, sunset : float
+        Solar day bounds (local hour)
+
+    Returns
+    -------
+    np.ndarray
+        Hourly plane-of-array irradiance (W/m²), float32, length 8760
+    """
+    hours = np.arange(24, dtype=np.float32) + 0.5
+    shape = np.sin(np.pi * (hours - sunrise) / (sunset - sunrise))
+    shape = np.clip(shape, 0.0, None)
+    shape /= shape.sum()
+
+    daily_wh = np.broadcast_to(np.asarray(irradiance_kwh_m2_day, dtype=np.float32), (365,)) * 1000
+    return (daily_wh[:, None] * shape[None, :]).reshape(-1).astype(np.float32)
+
+
+def ambient_temperature_profile(mean_c: float = 27.0, swing_c: float = 8.0):
+    """Hourly ambient temperature (°C) with a diurnal swing peaking at 15:00."""
+    hours = np.arange(HOURS_PER_YEAR, dtype=np.float32) % 24
+    return (mean_c + swing_c / 2 * np.cos(2 * np.pi * (hours - 15) / 24)).astype(np.float32)
+
+
+def simulate_generation(
+    pv_kw,
+    poa_w_m2,
+    ambient_c,
+    year: int = 1,
+    dc_ac_ratio: float = 1.2,
+    temp_coefficient: float = -0.004,
+    noct: float = 45.0,
+    system_losses: float = 0.10,
+    inverter_efficiency: float = 0.96,
+    degradation_rate: float = 0.005,
+    chunk_size: int = 4096,
+    out=None
+):
+    """
+    Hourly AC generation for many PV systems in one pass.
+
+    Parameters
+    ----------
+    pv_kw : float or np.ndarray
+        DC nameplate capacity per system (kWp), shape (n_systems,)
+    poa_w_m2 : np.ndarray
+        Plane-of-array irradiance (W/m²), shape (8760,) shared by all
+        systems or (n_systems, 8760)
+    ambient_c : np.ndarray
+        Ambient temperature (°C), same layout as `poa_w_m2`
+    year : int
+        Operating year (1 = first year), used for degradation
+    dc_ac_ratio : float
+        DC/AC ratio; inverter output is clipped at pv_kw / dc_ac_ratio
+    temp_coefficient : float
+        Power temperature coefficient (1/°C)
+    noct : float
+        Nominal operating cell temperature (°C)
+    system_losses : float
+        DC losses (soiling, wiring, mismatch)
+    inverter_efficiency : float
+        Inverter conversion efficiency
+    degradation_rate : float
+        Annual module degradation rate
+    chunk_size : int
+        Systems processed per block, bounds temporary memory
+    out : np.ndarray, optional
+        Preallocated float32 array of shape (n_systems, 8760)
+
+    Returns
+    -------
+    np.ndarray
+        Hourly AC energy (kWh), float32, shape (n_systems, 8760)
+    """
+    pv_kw = np.atleast_1d(np.asarray(pv_kw, dtype=np.float32))
+    poa = np.asarray(poa_w_m2, dtype=np.float32)
+    ambient = np.asarray(ambient_c, dtype=np.float32)
+    n = pv_kw.shape[0]
+
+    if out is None:
+        out = np.empty((n, poa.shape[-1]), dtype=np.float32)
+
+    def derating(poa_rows, ambient_rows):
+        # Module temperature derating (NOCT cell-temperature model)
+        cell_c = ambient_rows + (noct - 20.0) / 800.0 * poa_rows
+        derate = (poa_rows / 1000.0) * (1.0 + temp_coefficient * (cell_c - 25.0))
+        return np.clip(derate, 0.0, None, out=derate)
+
+    def site_rows(values, start, stop):
+        return values[start:stop] if values.ndim == 2 else values
+
+    per_site = poa.ndim == 2 or ambient.ndim == 2
+    shared = None if per_site else derating(poa, ambient)[None, :]
+
+    scale = np.float32((1 - system_losses) * inverter_efficiency
+                       * (1 - degradation_rate) ** (year - 1))
+    inverter_kw = pv_kw / np.float32(dc_ac_ratio)
+
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        block = out[start:stop]
+        rows = shared if shared is not None else derating(
+            site_rows(poa, start, stop), site_rows(ambient, start, stop)
+        )
+        np.multiply(pv_kw[start:stop, None] * scale, rows, out=block)
+        np.minimum(block, inverter_kw[start:stop, None], out=block)
+    return out
+
+
+def annual_generation(pv_kw, poa_w_m2, ambient_c, **kwargs):
+    """Annual AC energy (kWh/year) per system from `simulate_generation`."""
+    return simulate_generation(pv_kw, poa_w_m2, ambient_c, **kwargs).sum(axis=1, dtype=np.float64)
+
+
+def performance_ratio(generation_kwh, pv_kw, poa_w_m2):
+    """
+    IEC 61724 performance ratio: final yield over reference yield.
+
+    Parameters
+    ----------
+    generation_kwh : np.ndarray
+        Hourly AC energy, shape (n_systems, hours), or annual totals
+    pv_kw : float or np.ndarray
+        DC nameplate capacity per system (kWp)
+    poa_w_m2 : np.ndarray
+        Plane-of-array irradiance (W/m²) over the same hours
+
+    Returns
+    -------
+    np.ndarray
+        Performance ratio (fraction) per system
+    """
+    energy = np.asarray(generation_kwh, dtype=np.float64)
+    if energy.ndim == 2:
+        energy = energy.sum(axis=1)
+    poa = np.asarray(poa_w_m2, dtype=np.float64)
+    reference_kwh_m2 = poa.sum(axis=-1) / 1000.0
+    return energy / (np.asarray(pv_kw, dtype=np.float64) * reference_kwh_m2)
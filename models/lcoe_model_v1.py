@@ -100,27 +100,34 @@ def predict_lcoe(
     discount_rate: float,
     lifetime: int = 25,
     performance_ratio: float = 0.75,
-    degradation_rate: float = 0.005
+    degradation_rate: float = 0.005,
+    annual_energy_kwh: float = None,
+    replacement_costs=None
 ):
     """
     Deterministic, bankable LCOE calculation
+
+    `annual_energy_kwh` is the first-year yield from
+    `models.generation_model.annual_generation`; when given it replaces the
+    flat `performance_ratio` estimate. `replacement_costs` holds
+    year-by-year replacement costs (₦), e.g. battery replacements from
+    `models.battery_model.replacement_costs`.
     """
 
+    if annual_energy_kwh is None:
+        annual_energy_kwh = pv_kw * irradiance * 365 * performance_ratio
+
     r = discount_rate / 100
 
     discounted_costs = capex  # CAPEX at year 0
     discounted_energy = 0.0
 
     for year in range(1, lifetime + 1):
-        energy = (
-            pv_kw
-            * irradiance
-            * 365
-            * performance_ratio
-            * ((1 - degradation_rate) ** (year - 1))
-        )
+        energy = annual_energy_kwh * ((1 - degradation_rate) ** (year - 1))
 
         discounted_energy += energy / ((1 + r) ** year)
         discounted_costs += opex_annual / ((1 + r) ** year)
+        if replacement_costs is not None:
+            discounted_costs += float(replacement_costs[year - 1]) / ((1 + r) ** year)
 
     return discounted_costs / discounted_energy
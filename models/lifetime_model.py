@@ -0,0 +1,353 @@
+# models/lifetime_model.py
+"""
+Streaming lifetime simulation.
+
+Holding every operating year at once needs lifetime × 8760 values per
+site. Here each year is instead produced by a chain of generator stages
+(generation → dispatch → billing → emissions) and folded straight into
+running NPV, LCOE and emissions accumulators, so peak memory is one year
+of hourly data per chunk of sites.
+
+Every stage consumes and yields per-year records (dicts of arrays for the
+current chunk), so stages can be reordered, dropped or replaced:
+
+    years = generation_stage(pv_kw, poa, ambient)
+    years = dispatch_stage(years, load, battery_kwh)
+    years = billing_stage(years, rates)
+    years = emission_stage(years)
+    result = reduce_lifetime(years, capex, opex, discount_rate)
+"""
+import numpy as np
+
+from models.billing_model import HOURS_PER_YEAR, escalation_factors
+from models.battery_model import BATTERY_COST_PER_KWH, RainflowCounter, remaining_capacity
+from models.emission_model import DIESEL_FACTOR, NIGERIA_GRID_FACTOR, expand_factors
+from models.generation_model import simulate_generation
+from models.results import BatchResults
+
+# Daily dispatch windows start at sunrise so that charging precedes the
+# evening and night discharge it pays for
+DAY_START_HOUR = 6
+
+
+def generation_stage(pv_kw, poa_w_m2, ambient_c, lifetime: int = 25,
+                     degradation_rate: float = 0.005, **kwargs):
+    """Yield {"year", "generation"} with hourly AC energy for each operating year."""
+    buffer = None
+    for year in range(1, lifetime + 1):
+        buffer = simulate_generation(pv_kw, poa_w_m2, ambient_c, year=year,
+                                     degradation_rate=degradation_rate, out=buffer, **kwargs)
+        yield {"year": year, "generation": buffer}
+
+
+def _shift(hourly, hours):
+    """Rotate the hour axis so index 0 is `hours` (0 leaves the array untouched)."""
+    return np.roll(hourly, -hours, axis=-1) if hours else hourly
+
+
+def dispatch_stage(
+    years,
+    load_kwh,
+    battery_kwh=0.0,
+    depth_of_discharge: float = 0.8,
+    round_trip_efficiency: float = 0.9,
+    calendar_fade: float = 0.02,
+    end_of_life: float = 0.8,
+    battery_cost_per_kwh: float = BATTERY_COST_PER_KWH,
+    battery_cost_decline: float = 0.0
+):
+    """
+    Daily-balance battery dispatch with ageing.
+
+    Within each sunrise-to-sunrise window, PV surplus charges the battery up
+    to its usable capacity and the stored energy then covers the window's
+    deficit hours, each reduced in proportion. Stored energy carries over
+    to the next window. Only 365 steps per year run in Python, each across
+    the whole chunk of sites.
+
+    The daily charge and discharge levels feed a `RainflowCounter`; usable
+    capacity fades with calendar age and cycle damage, and the battery is
+    replaced (at `battery_cost_per_kwh`) once it reaches `end_of_life`.
+
+    Adds grid_import, displaced (load met by PV or battery), load,
+    battery_capacity (fraction at the start of the year) and
+    replacement_cost to each record.
+    """
+    load = np.atleast_2d(np.asarray(load_kwh, dtype=np.float32))
+    battery = None
+    counter = None
+    stored = age = damage = capacity = None
+    eta = np.sqrt(round_trip_efficiency)
+
+    for record in years:
+        generation = record["generation"]
+        n = generation.shape[0]
+        if battery is None:
+            battery = np.broadcast_to(np.asarray(battery_kwh, dtype=np.float64), (n,)).copy()
+            counter = RainflowCounter(n)
+            stored, age, damage, capacity = np.zeros(n), np.zeros(n), np.zeros(n), np.ones(n)
+
+        site_load = np.broadcast_to(load, generation.shape)
+        net = _shift(generation - site_load, DAY_START_HOUR).reshape(n, 365, 24)
+        surplus = np.maximum(net, 0.0)
+        deficit = np.maximum(-net, 0.0)
+        surplus_day = surplus.sum(axis=2, dtype=np.float64)
+        deficit_day = deficit.sum(axis=2, dtype=np.float64)
+
+        usable = battery * depth_of_discharge * capacity
+        delivered = np.empty((n, 365))
+        levels = np.empty((n, 2 * 365))
+        for d in range(365):
+            stored += np.minimum(surplus_day[:, d] * eta, usable - stored)
+            levels[:, 2 * d] = stored
+            delivered[:, d] = np.minimum(deficit_day[:, d], stored * eta)
+            stored -= delivered[:, d] / eta
+            levels[:, 2 * d + 1] = stored
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            covered = np.where(deficit_day > 0, delivered / deficit_day, 0.0)
+        grid_import = deficit * (1.0 - covered[:, :, None]).astype(np.float32)
+        grid_import = _shift(grid_import.reshape(n, HOURS_PER_YEAR), -DAY_START_HOUR)
+
+        # Battery ageing on the twice-daily SoC turning points (fraction of nameplate)
+        has_battery = battery > 0
+        soc = np.divide(levels, battery[:, None], out=np.zeros_like(levels), where=has_battery[:, None])
+        damage += counter.update(soc)
+        age += 1
+        record_capacity = capacity
+        capacity = remaining_capacity(age, damage, calendar_fade, end_of_life)
+        replaced = has_battery & (capacity <= end_of_life)
+        replacement_cost = np.where(
+            replaced, battery * battery_cost_per_kwh * (1 - battery_cost_decline) ** record["year"], 0.0
+        )
+        damage[replaced], age[replaced], capacity[replaced] = 0.0, 0.0, 1.0
+
+        record.update(
+            load=site_load,
+            grid_import=grid_import,
+            displaced=site_load - grid_import,
+            battery_capacity=record_capacity,
+            replacement_cost=replacement_cost,
+        )
+        yield record
+
+
+def billing_stage(years, rates, escalation=0.0, lifetime: int = 25):
+    """
+    Bill savings for each year: (load − grid import) · hourly rates, escalated.
+
+    `rates` is an hourly vector (8760,) from `models.billing_model.build_rate_vector`
+    or one per site (n_sites, 8760). Adds bill_savings to each record.
+    """
+    rates = np.asarray(rates, dtype=np.float32)
+    factors = escalation_factors(escalation, lifetime)
+    for record in years:
+        offset = record["displaced"]
+        if rates.ndim == 1:
+            saved = offset @ rates
+        else:
+            saved = np.einsum("nh,nh->n", offset, rates)
+        record["bill_savings"] = saved.astype(np.float64) * factors[record["year"] - 1]
+        yield record
+
+
+def emission_stage(years, grid_factors=NIGERIA_GRID_FACTOR, diesel_share=0.0,
+                   diesel_factor: float = DIESEL_FACTOR, grid_decarbonization: float = 0.0):
+    """
+    Avoided emissions (tonnes) from displaced energy for each year.
+
+    Uses the same grid/diesel blend as `models.emission_model`, with the
+    grid factor decarbonized year on year. Adds tons to each record.
+    """
+    grid = expand_factors(grid_factors)
+    diesel = np.clip(expand_factors(diesel_share), 0.0, 1.0)
+    grid_part = ((1.0 - diesel) * grid).astype(np.float32)
+    diesel_part = (diesel * diesel_factor).astype(np.float32)
+    for record in years:
+        displaced = record["displaced"]
+        decarb = (1.0 - grid_decarbonization) ** (record["year"] - 1)
+        if grid_part.ndim == 1:
+            kg = (displaced @ grid_part) * decarb + displaced @ diesel_part
+        else:
+            kg = (np.einsum("nh,nh->n", displaced, grid_part) * decarb
+                  + np.einsum("nh,nh->n", displaced, diesel_part))
+        record["tons"] = kg.astype(np.float64) / 1000.0
+        yield record
+
+
+def reduce_lifetime(years, capex, opex_annual, discount_rate: float, opex_escalation: float = 0.0):
+    """
+    Fold a stream of yearly records into lifetime economics.
+
+    Follows `savings_model_v1.predict_savings` (net savings = bill savings −
+    O&M − replacements, discounted from year 1) and
+    `lcoe_model_v1.predict_lcoe` (discounted costs over discounted PV
+    generation) without keeping any hourly year after it is consumed.
+
+    Returns
+    -------
+    dict
+        Per site: npv, total_savings, payback_years, lcoe, annual_tons
+        (first year), lifetime_tons, replacements, plus annual_savings
+        (cumulative, n_sites × years) as in `savings_cashflows`. An empty
+        stream raises ValueError, since it gives no sites to report on.
+    """
+    r = discount_rate / 100.0
+    acc = None
+    cumulative_rows = []
+
+    for record in years:
+        year = record["year"]
+        generation = record["generation"].sum(axis=1, dtype=np.float64)
+        n = generation.shape[0]
+        if acc is None:
+            capex_arr = np.broadcast_to(np.asarray(capex, dtype=np.float64), (n,))
+            opex = np.broadcast_to(np.asarray(opex_annual, dtype=np.float64), (n,))
+            acc = {
+                "npv": -capex_arr.copy(),
+                "cash": np.zeros(n),
+                "payback": np.full(n, np.inf),
+                "cost": capex_arr.copy(),
+                "energy": np.zeros(n),
+                "tons": np.zeros(n),
+                "first_tons": None,
+                "replacements": np.zeros(n, dtype=np.int64),
+            }
+        discount = (1 + r) ** year
+        replacement = record.get("replacement_cost", 0.0)
+        year_opex = opex * (1 + opex_escalation) ** (year - 1) + replacement
+        net = record.get("bill_savings", 0.0) - year_opex
+
+        acc["npv"] += net / discount
+        acc["cash"] += net
+        cumulative_rows.append(acc["cash"].copy())
+        newly_paid = np.isinf(acc["payback"]) & (acc["cash"] - capex_arr > 0)
+        acc["payback"][newly_paid] = year
+        acc["cost"] += year_opex / discount
+        acc["energy"] += generation / discount
+        if "tons" in record:
+            acc["tons"] += record["tons"]
+            if acc["first_tons"] is None:
+                acc["first_tons"] = record["tons"].copy()
+        acc["replacements"] += np.asarray(replacement) > 0
+
+    if acc is None:
+        raise ValueError("reduce_lifetime needs at least one yearly record")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lcoe = acc["cost"] / acc["energy"]
+    return {
+        "npv": acc["npv"],
+        "total_savings": acc["cash"],
+        "payback_years": acc["payback"],
+        "lcoe": lcoe,
+        "annual_tons": acc["first_tons"] if acc["first_tons"] is not None else np.zeros_like(acc["tons"]),
+        "lifetime_tons": acc["tons"],
+        "replacements": acc["replacements"],
+        "annual_savings": np.stack(cumulative_rows, axis=1),
+    }
+
+
+def _simulate_chunk(arrays, lo, hi, lifetime, degradation_rate, tariff_escalation,
+                    discount_rate, grid_decarbonization, dispatch_kwargs):
+    """Run the stage chain for sites lo..hi-1; `arrays` may be shared-memory views."""
+    def rows(key):
+        arr = arrays[key]
+        return arr[lo:hi] if arr.ndim == 2 else arr
+
+    years = generation_stage(arrays["pv_kw"][lo:hi], rows("poa"), rows("ambient"),
+                             lifetime, degradation_rate)
+    years = dispatch_stage(years, rows("load"), arrays["battery_kwh"][lo:hi], **(dispatch_kwargs or {}))
+    years = billing_stage(years, rows("rates"), tariff_escalation, lifetime)
+    years = emission_stage(years, rows("grid_factors"), rows("diesel_share"),
+                           grid_decarbonization=grid_decarbonization)
+    return reduce_lifetime(years, arrays["capex"][lo:hi], arrays["opex"][lo:hi], discount_rate)
+
+
+def simulate_lifetime(
+    pv_kw,
+    load_kwh,
+    poa_w_m2,
+    ambient_c,
+    capex,
+    opex_annual,
+    discount_rate: float,
+    rates,
+    battery_kwh=0.0,
+    lifetime: int = 25,
+    degradation_rate: float = 0.005,
+    tariff_escalation=0.0,
+    grid_factors=NIGERIA_GRID_FACTOR,
+    diesel_share=0.0,
+    grid_decarbonization: float = 0.0,
+    chunk_size: int = 1024,
+    dispatch_kwargs=None,
+    workers: int = 1,
+    dtype=np.float64
+):
+    """
+    Lifetime economics and emissions for many sites, one year at a time.
+
+    Sites are processed in chunks of `chunk_size`; within a chunk the
+    generation → dispatch → billing → emission generators are reduced by
+    `reduce_lifetime`, so peak memory is a few (chunk_size, 8760) float32
+    arrays regardless of `lifetime`.
+
+    Parameters
+    ----------
+    pv_kw : float or array-like
+        PV capacity per site (kWp)
+    load_kwh : np.ndarray
+        Hourly load, (8760,) shared or (n_sites, 8760); a memory-mapped
+        `utils.profile_store.FleetProfileStore` window works as is
+    poa_w_m2, ambient_c : np.ndarray
+        Irradiance and temperature, (8760,) or (n_sites, 8760)
+    capex, opex_annual : float or array-like
+        Per-site investment (₦) and first-year O&M (₦/year)
+    discount_rate : float
+        Discount rate (%) e.g. 8.0
+    rates : np.ndarray
+        Hourly tariff (₦/kWh), see `models.billing_model.build_rate_vector`
+    battery_kwh : float or array-like
+        Battery nameplate capacity per site (kWh); 0 for PV only
+    dispatch_kwargs : dict, optional
+        Extra arguments for `dispatch_stage`
+    workers : int
+        Worker processes; above 1, inputs are published once to shared
+        memory (`utils.shared_arrays`) and chunks run in a process pool
+    dtype : numpy dtype
+        Storage type of the floating result columns, e.g. np.float32 for
+        large portfolios
+
+    Returns
+    -------
+    BatchResults
+        See `reduce_lifetime`; columns cover all sites
+    """
+    from utils.shared_arrays import map_chunks
+
+    pv_kw = np.atleast_1d(np.asarray(pv_kw, dtype=np.float64))
+    load = np.asarray(load_kwh, dtype=np.float32)
+    n = pv_kw.shape[0] if load.ndim == 1 else max(pv_kw.shape[0], load.shape[0])
+
+    def per_site(value):
+        return np.ascontiguousarray(np.broadcast_to(np.asarray(value, dtype=np.float64), (n,)))
+
+    arrays = {
+        "pv_kw": per_site(pv_kw),
+        "load": load,
+        "poa": np.asarray(poa_w_m2, dtype=np.float32),
+        "ambient": np.asarray(ambient_c, dtype=np.float32),
+        "rates": np.asarray(rates, dtype=np.float32),
+        "grid_factors": np.asarray(grid_factors, dtype=np.float64),
+        "diesel_share": np.asarray(diesel_share, dtype=np.float64),
+        "capex": per_site(capex),
+        "opex": per_site(opex_annual),
+        "battery_kwh": per_site(battery_kwh),
+    }
+    results = map_chunks(
+        _simulate_chunk, n, arrays, chunk_size=chunk_size, workers=workers,
+        lifetime=lifetime, degradation_rate=degradation_rate, tariff_escalation=tariff_escalation,
+        discount_rate=discount_rate, grid_decarbonization=grid_decarbonization,
+        dispatch_kwargs=dispatch_kwargs,
+    )
+    return BatchResults({key: np.concatenate([r[key] for r in results]) for key in results[0]}, dtype)
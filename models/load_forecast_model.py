@@ -0,0 +1,217 @@
+# models/load_forecast_model.py
+import time
+
+import numpy as np
+
+DEFAULT_LAGS = (24, 48, 168, 336)
+
+
+def _calendar_features(hours):
+    """Hour-of-day one-hot, weekend flag and month harmonics for absolute hours."""
+    hour_of_day = hours % 24
+    weekday = (hours // 24 + 3) % 7  # 1970-01-01 was a Thursday
+    month = hours.astype("datetime64[h]").astype("datetime64[M]").astype(np.int64) % 12
+
+    feats = np.zeros((hours.size, 27), dtype=np.float32)
+    feats[np.arange(hours.size), hour_of_day] = 1.0
+    feats[:, 24] = weekday >= 5
+    feats[:, 25] = np.sin(2 * np.pi * month / 12)
+    feats[:, 26] = np.cos(2 * np.pi * month / 12)
+    return feats
+
+
+def _as_matrix(loads, start):
+    """Accept a (sites, hours) array or a clean_load_profile frame."""
+    if hasattr(loads, "columns"):
+        start = loads["timestamp"].iloc[0] if start is None else start
+        loads = loads["load_kwh"].to_numpy()[None, :]
+    loads = np.atleast_2d(np.asarray(loads, dtype=np.float32))
+    if start is None:
+        raise ValueError("start timestamp is required for array input")
+    return loads, int(np.datetime64(start, "h").astype(np.int64))
+
+
+class LoadForecaster:
+    """
+    Ridge-regression load forecaster over cleaned hourly profiles.
+
+    Features for hour t are lagged loads (every lag ≥ 24 h so a whole day can
+    be predicted at once), 24 h and 168 h rolling means ending at t-24, and
+    calendar terms. Lags are zero-copy slices of the (sites, hours) matrix
+    and rolling means come from a cumulative sum. Loads are scaled by each
+    site's mean so one global model can serve every site; `per_site=True`
+    fits one model per site instead via batched normal equations.
+
+    Parameters
+    ----------
+    alpha : float
+        Ridge penalty
+    per_site : bool
+        Fit one coefficient vector per site instead of a global model
+    lags : tuple of int
+        Lag hours, each at least 24
+    """
+
+    def __init__(self, alpha: float = 1.0, per_site: bool = False, lags=DEFAULT_LAGS):
+        if min(lags) < 24:
+            raise ValueError("lags must be at least 24 hours for day-ahead forecasting")
+        self.alpha = alpha
+        self.per_site = per_site
+        self.lags = tuple(lags)
+        self.coef_ = None
+        self.scale_ = None
+        self.stats = {}
+
+    @property
+    def warmup(self):
+        return max(max(self.lags), 24 + 168)
+
+    @property
+    def n_features(self):
+        return len(self.lags) + 2 + 27 + 1
+
+    def _design(self, scaled, csum, first_hour, lo, hi):
+        """Features for target positions lo..hi-1: (sites, hi-lo, F)."""
+        n_sites, n_t = scaled.shape[0], hi - lo
+        X = np.empty((n_sites, n_t, self.n_features), dtype=np.float32)
+        for j, lag in enumerate(self.lags):
+            X[:, :, j] = scaled[:, lo - lag:hi - lag]
+        k = len(self.lags)
+        X[:, :, k] = (csum[:, lo - 23:hi - 23] - csum[:, lo - 47:hi - 47]) / 24
+        X[:, :, k + 1] = (csum[:, lo - 23:hi - 23] - csum[:, lo - 191:hi - 191]) / 168
+        X[:, :, k + 2:k + 29] = _calendar_features(np.arange(first_hour + lo, first_hour + hi))[None]
+        X[:, :, -1] = 1.0
+        return X
+
+    @staticmethod
+    def _prepare(scaled):
+        filled = np.where(np.isnan(scaled), 1.0, scaled).astype(np.float32)
+        csum = np.zeros((scaled.shape[0], scaled.shape[1] + 1), dtype=np.float64)
+        np.cumsum(filled, axis=1, out=csum[:, 1:])
+        return filled, csum
+
+    def fit(self, loads, start=None, chunk_hours: int = 2048, chunk_sites: int = 256):
+        """
+        Fit on hourly loads.
+
+        Parameters
+        ----------
+        loads : np.ndarray or pd.DataFrame
+            (sites, hours) matrix aligned on `start`, or `clean_load_profile`
+            output for one site. NaN hours (unfilled gaps) are skipped as
+            targets.
+        start : datetime-like
+            Timestamp of the first column
+        """
+        t0 = time.perf_counter()
+        loads, first_hour = _as_matrix(loads, start)
+        n_sites, n_hours = loads.shape
+        if n_hours <= self.warmup + 24:
+            raise ValueError(f"Need more than {self.warmup + 24} hours of history to fit")
+
+        self.scale_ = np.nanmean(loads, axis=1).astype(np.float32)
+        self.scale_[~(self.scale_ > 0)] = 1.0
+
+        F = self.n_features
+        shape = (n_sites, F, F) if self.per_site else (F, F)
+        xtx = np.zeros(shape)
+        xty = np.zeros(shape[:-1])
+        rows = 0
+
+        for s0 in range(0, n_sites, chunk_sites):
+            scaled = loads[s0:s0 + chunk_sites] / self.scale_[s0:s0 + chunk_sites, None]
+            filled, csum = self._prepare(scaled)
+            for lo in range(self.warmup, n_hours, chunk_hours):
+                hi = min(lo + chunk_hours, n_hours)
+                X = self._design(filled, csum, first_hour, lo, hi)
+                y = scaled[:, lo:hi]
+                ok = ~np.isnan(y)
+                X = X * ok[..., None]
+                y = np.where(ok, y, 0.0)
+                rows += int(ok.sum())
+                # float32 BLAS products per chunk, accumulated in float64
+                if self.per_site:
+                    Xt = X.transpose(0, 2, 1)
+                    xtx[s0:s0 + chunk_sites] += Xt @ X
+                    xty[s0:s0 + chunk_sites] += (Xt @ y[..., None].astype(np.float32))[..., 0]
+                else:
+                    Xf = X.reshape(-1, F)
+                    xtx += Xf.T @ Xf
+                    xty += Xf.T @ y.reshape(-1).astype(np.float32)
+
+        penalty = self.alpha * np.eye(F)
+        penalty[-1, -1] = 0.0  # leave the intercept unpenalised
+        self.coef_ = np.linalg.solve(xtx + penalty, xty[..., None])[..., 0].astype(np.float32)
+
+        elapsed = time.perf_counter() - t0
+        self.stats["fit_seconds"] = elapsed
+        self.stats["fit_rows"] = rows
+        self.stats["fit_rows_per_s"] = rows / elapsed if elapsed > 0 else float("inf")
+        return self
+
+    def predict(self, history, start=None, horizon: int = 24):
+        """
+        Forecast the `horizon` hours following the history, for every site.
+
+        Each 24-hour block only needs lags of 24 h or more, so it is predicted
+        in one step; longer horizons (e.g. 720 h month-ahead) feed each block
+        back as history for the next.
+
+        Parameters
+        ----------
+        history : np.ndarray or pd.DataFrame
+            Recent loads, (sites, hours) with at least `warmup` + 24 hours, sites
+            in the same order as at fit time
+        start : datetime-like
+            Timestamp of the first history column
+        horizon : int
+            Hours to forecast
+
+        Returns
+        -------
+        np.ndarray
+            Forecast loads (kWh), float32, shape (sites, horizon)
+        """
+        if self.coef_ is None:
+            raise RuntimeError("LoadForecaster is not fitted")
+        t0 = time.perf_counter()
+        history, first_hour = _as_matrix(history, start)
+        n_sites, n_hist = history.shape
+        keep = self.warmup + 24
+        if n_hist < keep:
+            raise ValueError(f"Need at least {keep} hours of history to predict")
+        history = history[:, -keep:] if n_hist > keep else history
+        first_hour += n_hist - history.shape[1]
+
+        scale = self.scale_[:n_sites, None]
+        scaled = history / scale
+        site_mean = np.nanmean(scaled, axis=1, keepdims=True)
+        scaled = np.where(np.isnan(scaled), site_mean, scaled)
+
+        n_blocks = -(-horizon // 24)
+        buf = np.concatenate([scaled, np.zeros((n_sites, n_blocks * 24), dtype=np.float32)], axis=1)
+        csum = np.zeros((n_sites, buf.shape[1] + 1), dtype=np.float64)
+        np.cumsum(buf[:, :scaled.shape[1]], axis=1, out=csum[:, 1:scaled.shape[1] + 1])
+
+        pos = scaled.shape[1]
+        for _ in range(n_blocks):
+            X = self._design(buf, csum, first_hour, pos, pos + 24)
+            if self.per_site:
+                pred = np.einsum("stf,sf->st", X, self.coef_[:n_sites])
+            else:
+                pred = X @ self.coef_
+            buf[:, pos:pos + 24] = np.maximum(pred, 0.0)
+            csum[:, pos + 1:pos + 25] = csum[:, pos:pos + 1] + np.cumsum(buf[:, pos:pos + 24], axis=1)
+            pos += 24
+
+        out = buf[:, scaled.shape[1]:scaled.shape[1] + horizon] * scale
+        elapsed = time.perf_counter() - t0
+        self.stats["predict_seconds"] = elapsed
+        self.stats["predict_site_hours_per_s"] = n_sites * horizon / elapsed if elapsed > 0 else float("inf")
+        return out
+
+    def predict_day_ahead(self, history, start=None):
+        return self.predict(history, start, horizon=24)
+
+    def predict_month_ahead(self, history, start=None):
+        return self.predict(history, start, horizon=30 * 24)
@@ -0,0 +1,225 @@
+# models/load_profile_model.py
+from collections import OrderedDict
+
+import numpy as np
+
+from models.billing_model import HOURS_PER_YEAR, calendar_index
+
+# Relative hourly demand (00:00-23:00), normalised to daily totals below
+ARCHETYPE_SHAPES = {
+    "residential": {
+        "weekday": [0.55, 0.50, 0.48, 0.47, 0.50, 0.65, 0.90, 1.00, 0.80, 0.65, 0.60, 0.60,
+                    0.62, 0.62, 0.60, 0.62, 0.70, 0.90, 1.25, 1.45, 1.50, 1.35, 1.05, 0.75],
+        "weekend": [0.60, 0.55, 0.50, 0.50, 0.50, 0.55, 0.70, 0.85, 0.95, 0.95, 0.90, 0.90,
+                    0.92, 0.90, 0.85, 0.85, 0.90, 1.05, 1.30, 1.45, 1.45, 1.30, 1.05, 0.80],
+        "seasonal_amplitude": 0.10,
+    },
+    "commercial": {
+        "weekday": [0.25, 0.25, 0.25, 0.25, 0.25, 0.30, 0.50, 0.90, 1.40, 1.60, 1.65, 1.70,
+                    1.65, 1.70, 1.70, 1.65, 1.50, 1.20, 0.80, 0.55, 0.40, 0.35, 0.30, 0.28],
+        "weekend": [0.25, 0.25, 0.25, 0.25, 0.25, 0.25, 0.30, 0.40, 0.55, 0.65, 0.70, 0.70,
+                    0.70, 0.70, 0.65, 0.60, 0.50, 0.40, 0.35, 0.30, 0.28, 0.27, 0.26, 0.25],
+        "seasonal_amplitude": 0.18,
+    },
+    "hospital": {
+        "weekday": [0.75, 0.72, 0.70, 0.70, 0.72, 0.78, 0.90, 1.05, 1.20, 1.28, 1.30, 1.30,
+                    1.28, 1.28, 1.25, 1.22, 1.15, 1.08, 1.02, 0.98, 0.92, 0.85, 0.80, 0.78],
+        "weekend": [0.75, 0.72, 0.70, 0.70, 0.72, 0.75, 0.82, 0.92, 1.02, 1.08, 1.10, 1.10,
+                    1.08, 1.08, 1.05, 1.02, 1.00, 0.98, 0.95, 0.92, 0.88, 0.82, 0.80, 0.78],
+        "seasonal_amplitude": 0.15,
+    },
+    "school": {
+        "weekday": [0.20, 0.20, 0.20, 0.20, 0.20, 0.25, 0.60, 1.40, 1.90, 2.00, 2.00, 1.95,
+                    1.90, 1.90, 1.70, 1.20, 0.70, 0.45, 0.35, 0.30, 0.25, 0.22, 0.20, 0.20],
+        "weekend": [0.20, 0.20, 0.20, 0.20, 0.20, 0.20, 0.22, 0.25, 0.28, 0.30, 0.30, 0.30,
+                    0.30, 0.30, 0.28, 0.26, 0.25, 0.24, 0.23, 0.22, 0.21, 0.20, 0.20, 0.20],
+        "seasonal_amplitude": 0.08,
+        # Term breaks (month number: fraction of normal load)
+        "month_factors": {4: 0.8, 8: 0.45, 12: 0.7},
+    },
+}
+
+# Latitude (°N) of common locations; any latitude can be passed directly
+LOCATION_LATITUDES = {
+    "lagos": 6.5, "port harcourt": 4.8, "ibadan": 7.4, "enugu": 6.4, "benin": 6.3,
+    "abuja": 9.1, "jos": 9.9, "ilorin": 8.5, "kaduna": 10.5, "kano": 12.0,
+    "maiduguri": 11.8, "sokoto": 13.1,
+}
+
+_SHAPE_CACHE = {}
+_PROFILE_CACHE = OrderedDict()
+_PROFILE_CACHE_SIZE = 256
+
+
+def _latitude(location):
+    if isinstance(location, str):
+        key = location.strip().lower()
+        if key not in LOCATION_LATITUDES:
+            raise ValueError(f"Unknown location {location!r}; pass a latitude instead")
+        return LOCATION_LATITUDES[key]
+    return float(location)
+
+
+def archetype_shape(archetype: str, location=9.1, year: int = 2025):
+    """
+    Unit hourly shape and daily seasonal factors for an archetype and location.
+
+    Returns
+    -------
+    tuple of np.ndarray
+        (shape, season): `shape` is float32 of length 8760 with each day
+        summing to 1; `season` holds 365 daily energy factors with mean 1.
+        Cached per (archetype, latitude, year).
+    """
+    archetype = archetype.lower()
+    lat = round(_latitude(location), 1)
+    key = (archetype, lat, year)
+    if key in _SHAPE_CACHE:
+        return _SHAPE_CACHE[key]
+    if archetype not in ARCHETYPE_SHAPES:
+        raise ValueError(f"Unknown archetype {archetype!r}; choose from {sorted(ARCHETYPE_SHAPES)}")
+
+    spec = ARCHETYPE_SHAPES[archetype]
+    cal = calendar_index(year)
+    weekday = np.asarray(spec["weekday"], dtype=np.float64)
+    weekend = np.asarray(spec["weekend"], dtype=np.float64)
+    weekday /= weekday.sum()
+    weekend /= weekend.sum()
+
+    is_weekend = cal["weekday"][::24] >= 5
+    shape = np.where(is_weekend[:, None], weekend[None, :], weekday[None, :]).reshape(-1)
+
+    # Cooling-driven seasonality: peak in the hot dry season (Mar-Apr), low
+    # in the rains (Jul-Aug); stronger swing further north
+    day = np.arange(365)
+    amplitude = spec["seasonal_amplitude"] * np.clip(0.4 + lat / 12.0, 0.5, 1.6)
+    season = 1.0 + amplitude * np.cos(2 * np.pi * (day - 95) / 365)
+    month = cal["month"][::24]
+    for m, factor in spec.get("month_factors", {}).items():
+        season[month == m - 1] *= factor
+    season /= season.mean()
+
+    result = (shape.astype(np.float32), season.astype(np.float32))
+    for arr in result:
+        arr.setflags(write=False)
+    _SHAPE_CACHE[key] = result
+    return result
+
+
+def generate_profiles(
+    daily_kwh,
+    peak_kw,
+    archetype="residential",
+    location=9.1,
+    year: int = 2025,
+    chunk_size: int = 2048,
+    out=None
+):
+    """
+    Hourly load profiles (8760 h) for many sites from daily energy and peak.
+
+    Each site scales its archetype's unit shape by the seasonal daily energy
+    and blends it with a flat profile so the annual peak matches `peak_kw`
+    as closely as the shape allows; daily energy is preserved exactly on
+    average. Sites with identical parameters are generated once.
+
+    Parameters
+    ----------
+    daily_kwh, peak_kw : float or array-like
+        Average daily consumption (kWh/day) and peak demand (kW) per site;
+        sites with zero daily energy get an all-zero profile, negative or
+        non-finite energy raises ValueError
+    archetype : str or array-like of str
+        residential, commercial, hospital or school
+    location : str, float or array-like
+        Location name from LOCATION_LATITUDES or latitude (°N)
+    year : int
+        Calendar year used for weekdays
+    chunk_size : int
+        Sites written per block
+    out : np.ndarray, optional
+        Preallocated (n_sites, 8760) float32 array, e.g. a
+        `utils.profile_store.FleetProfileStore` window
+
+    Returns
+    -------
+    np.ndarray
+        Hourly load (kWh), float32, shape (n_sites, 8760)
+    """
+    daily = np.atleast_1d(np.asarray(daily_kwh, dtype=np.float64))
+    if not np.all(daily >= 0):
+        raise ValueError("daily_kwh must be finite and non-negative")
+    n = daily.shape[0]
+    peak = np.broadcast_to(np.asarray(peak_kw, dtype=np.float64), (n,))
+    arch_names, arch_codes = np.unique(np.broadcast_to(np.asarray(archetype, dtype=str), (n,)),
+                                       return_inverse=True)
+    loc_names, loc_codes = np.unique(np.broadcast_to(np.asarray(location), (n,)), return_inverse=True)
+    lats = np.array([_latitude(loc) for loc in loc_names.tolist()])
+
+    if out is None:
+        out = np.empty((n, HOURS_PER_YEAR), dtype=np.float32)
+
+    group_keys, group_of = np.unique(arch_codes.reshape(-1) * len(loc_names) + loc_codes.reshape(-1),
+                                     return_inverse=True)
+    order = np.argsort(group_of.reshape(-1), kind="stable")
+    bounds = np.searchsorted(group_of.reshape(-1)[order], np.arange(len(group_keys) + 1))
+
+    for g, key in enumerate(group_keys):
+        rows = order[bounds[g]:bounds[g + 1]]
+        arch, lat = arch_names[key // len(loc_names)], lats[key % len(loc_names)]
+        shape, season = archetype_shape(arch, lat, year)
+        hourly_season = np.repeat(season, 24)
+        weighted = shape * hourly_season
+        flat = hourly_season / 24.0
+
+        # Peak is linear in the blend weight alpha at the shape's peak hour
+        h = int(np.argmax(weighted))
+        m1, m0 = weighted[h], flat[h]
+        alpha_max = (1 / 24) / max(1 / 24 - shape.min(), 1e-9)
+
+        params = np.stack([daily[rows], peak[rows]], axis=1)
+        uniq, inverse = np.unique(params, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        # Zero daily energy gives an all-zero profile whatever the blend
+        ratio = np.divide(uniq[:, 1], uniq[:, 0], out=np.full(len(uniq), m0), where=uniq[:, 0] > 0)
+        alpha = (ratio - m0) / (m1 - m0)
+        alpha = np.clip(alpha, 0.0, alpha_max)
+
+        for start in range(0, len(rows), chunk_size):
+            sel = inverse[start:start + chunk_size]
+            a = alpha[sel, None].astype(np.float32)
+            d = uniq[sel, 0, None].astype(np.float32)
+            block = d * (flat + a * (weighted - flat))
+            np.maximum(block, 0.0, out=block)
+            target = rows[start:start + chunk_size]
+            if np.all(np.diff(target) == 1):
+                out[target[0]:target[-1] + 1] = block
+            else:
+                out[target] = block
+    return out
+
+
+def load_profile(daily_kwh: float, peak_kw: float, archetype: str = "residential",
+                 location=9.1, year: int = 2025):
+    """
+    Single-site profile as a `clean_load_profile`-style DataFrame.
+
+    Results are cached by parameter key; the cached frame is copied on
+    return so callers may modify it.
+    """
+    import pandas as pd
+
+    key = (round(float(daily_kwh), 6), round(float(peak_kw), 6), archetype.lower(),
+           round(_latitude(location), 1), year)
+    if key in _PROFILE_CACHE:
+        _PROFILE_CACHE.move_to_end(key)
+        return _PROFILE_CACHE[key].copy()
+
+    values = generate_profiles(daily_kwh, peak_kw, archetype, location, year)[0]
+    timestamps = pd.date_range(f"{year}-01-01", f"{year}-12-31 23:00", freq="h")
+    timestamps = timestamps[~((timestamps.month == 2) & (timestamps.day == 29))]
+    frame = pd.DataFrame({"timestamp": timestamps, "load_kwh": values.astype(np.float64)})
+    _PROFILE_CACHE[key] = frame
+    if len(_PROFILE_CACHE) > _PROFILE_CACHE_SIZE:
+        _PROFILE_CACHE.popitem(last=False)
+    return frame.copy()
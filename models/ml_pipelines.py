@@ -0,0 +1,85 @@
+# models/ml_pipelines.py
+"""
+Lazy access to the trained scikit-learn pipelines in `pv_model_outputs/`.
+
+joblib, pandas and sklearn (pulled in when a pipeline is unpickled) are
+imported on first use only, so the deterministic models and anything that
+merely imports them stay NumPy-only at startup.
+"""
+import os
+
+ARTIFACT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pv_model_outputs")
+
+# Keywords used in training to spot target columns in the cleaned dataset
+TARGET_KEYWORDS = {
+    "25yr_savings": ["savings at 25yrs", "savings at 25yr", "25yr savings", "savings at 25yrs lifespan"],
+    "capacity": ["size/capacity", "existing pv system", "capacity", "kva", "kw", "system capacity"],
+    "co2": ["emission", "co2", "carbon", "reduced carbon", "kgco2"],
+    "lcoe": ["lcoe", "levelized cost", "levelised cost", "levelized cost of energy"]
+}
+
+_PIPELINES = {}
+_FEATURE_COLUMNS = None
+
+
+def find_target_column(cols, keywords):
+    for kw in keywords:
+        for c in cols:
+            if kw.lower() in str(c).lower():
+                return c
+    return None
+
+
+def load_pipeline(filename: str):
+    """
+    Unpickled pipeline `pv_model_outputs/<filename>`, or None if it is
+    missing or cannot be loaded. Loaded once per process.
+    """
+    if filename in _PIPELINES:
+        return _PIPELINES[filename]
+    pipeline = None
+    path = os.path.join(ARTIFACT_DIR, filename)
+    if os.path.exists(path):
+        import joblib
+
+        try:
+            pipeline = joblib.load(path)
+        except Exception:
+            pipeline = None
+    _PIPELINES[filename] = pipeline
+    return pipeline
+
+
+def feature_columns():
+    """
+    Numeric training feature columns reconstructed from
+    `cleaned_pv_dataset.csv` (same logic as training), or None.
+    """
+    global _FEATURE_COLUMNS
+    if _FEATURE_COLUMNS is not None:
+        return _FEATURE_COLUMNS or None
+    _FEATURE_COLUMNS = []
+    cleaned_csv = os.path.join(ARTIFACT_DIR, "cleaned_pv_dataset.csv")
+    if os.path.exists(cleaned_csv):
+        import numpy as np
+        import pandas as pd
+
+        try:
+            df_clean = pd.read_csv(cleaned_csv)
+            numeric_cols = df_clean.select_dtypes(include=[np.number]).columns.tolist()
+            detected = {k: find_target_column(df_clean.columns, kws) for k, kws in TARGET_KEYWORDS.items()}
+            exclude = [v for v in detected.values() if v is not None]
+            _FEATURE_COLUMNS = [c for c in numeric_cols if c not in exclude]
+        except Exception:
+            _FEATURE_COLUMNS = []
+    return _FEATURE_COLUMNS or None
+
+
+def predict_row(filename: str, row: dict, columns):
+    """Single-row prediction with pipeline `filename`; raises if unavailable."""
+    import pandas as pd
+
+    pipeline = load_pipeline(filename)
+    if pipeline is None:
+        raise FileNotFoundError(os.path.join(ARTIFACT_DIR, filename))
+    return pipeline.predict(pd.DataFrame([row], columns=columns))
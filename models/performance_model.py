@@ -1,8 +1,14 @@
-def compute_performance_ratio(pv_size_kw, irradiance, daily_load):
-    """Compute PV system performance ratio (%) using expected vs actual energy yield."""
+def compute_performance_ratio(pv_size_kw, irradiance, daily_load, expected_kwh=None):
+    """Compute PV system performance ratio (%) using expected vs actual energy yield.
+
+    `expected_kwh` takes the annual yield from `models.generation_model`
+    (temperature-derated, clipped and degraded); without it the flat 85%
+    system efficiency is assumed.
+    """
 
     # Expected annual generation
-    expected_kwh = pv_size_kw * irradiance * 365 * 0.85  # 85% overall system efficiency
+    if expected_kwh is None:
+        expected_kwh = pv_size_kw * irradiance * 365 * 0.85  # 85% overall system efficiency
 
     # Actual energy used by load
     actual_kwh = daily_load * 365
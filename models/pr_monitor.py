@@ -0,0 +1,240 @@
+# models/pr_monitor.py
+import numpy as np
+
+WINDOW_DAYS = 365
+SHORT_WINDOW_DAYS = 30
+
+
+def _to_day_numbers(timestamps):
+    ts = np.asarray(timestamps)
+    if np.issubdtype(ts.dtype, np.datetime64):
+        return ts.astype("datetime64[D]").astype(np.int64)
+    return ts.astype(np.int64)
+
+
+class PerformanceRatioMonitor:
+    """
+    Online performance-ratio tracking for a fleet of installed systems.
+
+    Telemetry is accumulated into the current day per system. When a system
+    moves to a new day, the closed day is pushed into a 365-slot ring buffer
+    and the 30-day and annual running sums are updated by adding the new day
+    and subtracting the one leaving the window, so every update is O(1) per
+    reading regardless of history length.
+
+    PR values are the IEC 61724 ratio of measured final yield to reference
+    yield, reported in percent: metered AC energy (kWh) over nameplate
+    (kWp) × plane-of-array insolation (kWh/m²) / 1 kW/m², the measured
+    counterpart of `models.generation_model.performance_ratio`. This is not
+    the load-over-expected-generation figure of `compute_performance_ratio`.
+
+    Parameters
+    ----------
+    pv_kw : array-like
+        DC nameplate capacity per system (kWp); system ids are row indices
+    min_insolation : float
+        Days with less plane-of-array insolation (kWh/m²) are excluded from
+        the daily PR trend
+    """
+
+    def __init__(self, pv_kw, min_insolation: float = 0.5):
+        self.pv_kw = np.asarray(pv_kw, dtype=np.float64)
+        self.min_insolation = min_insolation
+        n = self.pv_kw.shape[0]
+
+        self.current_day = np.full(n, -1, dtype=np.int64)
+        self.day_energy = np.zeros(n)
+        self.day_insolation = np.zeros(n)
+
+        self.ring_energy = np.zeros((n, WINDOW_DAYS))
+        self.ring_insolation = np.zeros((n, WINDOW_DAYS))
+        self.ring_pr = np.full((n, WINDOW_DAYS), np.nan)
+
+        self.energy_30 = np.zeros(n)
+        self.insolation_30 = np.zeros(n)
+        self.energy_365 = np.zeros(n)
+        self.insolation_365 = np.zeros(n)
+        self.last_daily_pr = np.full(n, np.nan)
+
+        # Windowed least-squares sums for the daily PR trend
+        self._origin = None
+        self._n = np.zeros(n)
+        self._sx = np.zeros(n)
+        self._sy = np.zeros(n)
+        self._sxx = np.zeros(n)
+        self._sxy = np.zeros(n)
+
+        self.late_readings = 0
+
+    @property
+    def n_systems(self):
+        return self.pv_kw.shape[0]
+
+    def update(self, system_ids, timestamps, energy_kwh, insolation_kwh_m2):
+        """
+        Ingest a time-ordered batch of telemetry readings.
+
+        Parameters
+        ----------
+        system_ids : array-like of int
+            Row index of each reading's system
+        timestamps : array-like
+            datetime64 values or integer day numbers
+        energy_kwh : array-like
+            AC energy delivered since the previous reading (kWh)
+        insolation_kwh_m2 : array-like
+            Plane-of-array insolation over the same interval (kWh/m²)
+        """
+        ids = np.asarray(system_ids, dtype=np.int64)
+        days = _to_day_numbers(timestamps)
+        energy = np.asarray(energy_kwh, dtype=np.float64)
+        insolation = np.asarray(insolation_kwh_m2, dtype=np.float64)
+        if ids.size == 0:
+            return
+        if self._origin is None:
+            self._origin = int(days.min())
+
+        for day in np.unique(days):
+            sel = days == day
+            day_ids = ids[sel]
+
+            late = self.current_day[day_ids] > day
+            if late.any():
+                self.late_readings += int(late.sum())
+                keep = ~late
+                day_ids = day_ids[keep]
+                sel = np.flatnonzero(sel)[keep]
+
+            rolling = np.unique(day_ids[self.current_day[day_ids] < day])
+            if rolling.size:
+                self._advance(rolling, int(day))
+
+            np.add.at(self.day_energy, day_ids, energy[sel])
+            np.add.at(self.day_insolation, day_ids, insolation[sel])
+
+    def _advance(self, ids, new_day):
+        """Close the current day of `ids` and move them to `new_day`."""
+        fresh = self.current_day[ids] < 0
+        self.current_day[ids[fresh]] = new_day
+        ids = ids[~fresh]
+        if ids.size == 0:
+            return
+
+        self._push(ids, self.current_day[ids], self.day_energy[ids], self.day_insolation[ids])
+        self.day_energy[ids] = 0.0
+        self.day_insolation[ids] = 0.0
+
+        # Days without telemetry enter the window as zero-energy, zero-sun days
+        gap = new_day - self.current_day[ids] - 1
+        stale = gap >= WINDOW_DAYS
+        if stale.any():
+            self._reset(ids[stale])
+        filling, gap = ids[~stale], gap[~stale]
+        for step in range(int(gap.max(initial=0))):
+            todo = filling[gap > step]
+            zeros = np.zeros(todo.size)
+            self._push(todo, self.current_day[todo] + step + 1, zeros, zeros)
+
+        self.current_day[ids] = new_day
+
+    def _push(self, ids, day, energy, insolation):
+        slot = day % WINDOW_DAYS
+        slot_30 = (day - SHORT_WINDOW_DAYS) % WINDOW_DAYS
+
+        self.energy_30[ids] += energy - self.ring_energy[ids, slot_30]
+        self.insolation_30[ids] += insolation - self.ring_insolation[ids, slot_30]
+        self.energy_365[ids] += energy - self.ring_energy[ids, slot]
+        self.insolation_365[ids] += insolation - self.ring_insolation[ids, slot]
+
+        # Trend sums: drop the day leaving the annual window, add the new one
+        x_old = (day - WINDOW_DAYS - self._origin).astype(np.float64)
+        y_old = self.ring_pr[ids, slot]
+        valid_old = ~np.isnan(y_old)
+        y_old = np.where(valid_old, y_old, 0.0)
+        self._n[ids] -= valid_old
+        self._sx[ids] -= valid_old * x_old
+        self._sy[ids] -= y_old
+        self._sxx[ids] -= valid_old * x_old ** 2
+        self._sxy[ids] -= x_old * y_old
+
+        valid = insolation >= self.min_insolation
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pr = np.where(valid, energy / (self.pv_kw[ids] * insolation) * 100, np.nan)
+        x = (day - self._origin).astype(np.float64)
+        y = np.where(valid, pr, 0.0)
+        self._n[ids] += valid
+        self._sx[ids] += valid * x
+        self._sy[ids] += y
+        self._sxx[ids] += valid * x ** 2
+        self._sxy[ids] += x * y
+
+        self.ring_energy[ids, slot] = energy
+        self.ring_insolation[ids, slot] = insolation
+        self.ring_pr[ids, slot] = pr
+        self.last_daily_pr[ids] = pr
+
+    def _reset(self, ids):
+        for arr in (self.ring_energy, self.ring_insolation):
+            arr[ids] = 0.0
+        self.ring_pr[ids] = np.nan
+        for arr in (self.energy_30, self.insolation_30, self.energy_365,
+                    self.insolation_365, self._n, self._sx, self._sy,
+                    self._sxx, self._sxy):
+            arr[ids] = 0.0
+
+    def performance_ratios(self):
+        """
+        Rolling PR (%) per system.
+
+        Returns
+        -------
+        dict
+            daily (last closed day), pr_30d and pr_annual arrays; NaN where
+            the window has no insolation yet
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pr_30 = self.energy_30 / (self.pv_kw * self.insolation_30) * 100
+            pr_365 = self.energy_365 / (self.pv_kw * self.insolation_365) * 100
+        return {
+            "daily": self.last_daily_pr.copy(),
+            "pr_30d": np.where(self.insolation_30 > 0, pr_30, np.nan),
+            "pr_annual": np.where(self.insolation_365 > 0, pr_365, np.nan),
+        }
+
+    def degradation_trend(self):
+        """Least-squares slope of daily PR over the annual window (% points/year)."""
+        denom = self._n * self._sxx - self._sx ** 2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = (self._n * self._sxy - self._sx * self._sy) / denom
+        return np.where((self._n >= 2) & (denom > 0), slope * WINDOW_DAYS, np.nan)
+
+    def flag_degradation(self, max_decline_per_year: float = 2.0,
+                         short_term_drop: float = 0.10, min_days: int = 90):
+        """
+        Flag systems whose PR is falling.
+
+        Parameters
+        ----------
+        max_decline_per_year : float
+            Allowed PR decline (% points/year) before a trend is flagged
+        short_term_drop : float
+            Flag when the 30-day PR is this fraction below the annual PR
+        min_days : int
+            Minimum valid days in the window before the trend is trusted
+
+        Returns
+        -------
+        dict
+            trending_down, underperforming and any_flag boolean arrays, plus
+            the trend_per_year used
+        """
+        trend = self.degradation_trend()
+        pr = self.performance_ratios()
+        trending_down = (self._n >= min_days) & (trend < -max_decline_per_year)
+        underperforming = pr["pr_30d"] < pr["pr_annual"] * (1 - short_term_drop)
+        return {
+            "trending_down": trending_down,
+            "underperforming": underperforming,
+            "any_flag": trending_down | underperforming,
+            "trend_per_year": trend,
+        }
@@ -0,0 +1,307 @@
+# models/representative_days.py
+"""
+Representative-day reduction of an hourly year.
+
+The 365 dispatch windows of a year (sunrise to sunrise, as in
+`models.lifetime_model`) are described by daily vectors of load and
+irradiance (plus ambient temperature when given), each series scaled by its
+annual peak so they weigh alike. Vectorized k-means groups the days into
+`k` clusters and each cluster is represented by its medoid, the real day
+closest to the cluster centre, weighted by the number of days it stands for.
+
+Annual metrics are then weighted sums over k × 24 hours instead of 8760:
+
+    days = select_days(load, poa, ambient)
+    reduced = simulate_year(pv_kw, load, poa, ambient, rates, battery_kwh, days=days)
+    full = simulate_year(pv_kw, load, poa, ambient, rates, battery_kwh)
+    error = reduction_error(reduced, full)
+
+`simulate_year` runs the same model on either set, so `reduction_error`
+measures the cost of the day selection alone. Sizing and optimization loops
+select days once, check the error on a sample of candidates, and evaluate
+the rest on the reduced set (about 365 / k times less work per candidate).
+
+The default k = 48 keeps the worst metric within about 2% at portfolio
+level and 3% per site on the benchmark's synthetic commercial portfolios
+(battery sized at half a day's load); k = 12 errs by up to 16% on grid
+import, bills after PV and grid emissions, since battery dispatch is
+sensitive to the day-to-day weather that few clusters average away.
+Where a tolerance matters, `fit_days` grows k until the error measured on a
+sample is within it.
+"""
+import numpy as np
+
+from models.billing_model import HOURS_PER_YEAR
+from models.clustering import kmeans, medoids, relative_error
+from models.emission_model import DIESEL_FACTOR, NIGERIA_GRID_FACTOR, expand_factors
+from models.generation_model import simulate_generation
+from models.lifetime_model import DAY_START_HOUR
+from models.results import BatchResults
+
+DAYS_PER_YEAR = 365
+
+# Representative days used when k is not given; see the module docstring
+DEFAULT_DAYS = 48
+
+# Columns returned by simulate_year
+METRICS = (
+    "generation_kwh", "load_kwh", "grid_import_kwh", "displaced_kwh", "bill_before",
+    "bill_after", "bill_savings", "grid_tons", "avoided_tons",
+)
+
+
+def daily_windows(hourly):
+    """
+    Reshape hourly values (..., 8760) into dispatch windows (..., 365, 24)
+    starting at DAY_START_HOUR.
+    """
+    hourly = np.asarray(hourly)
+    return np.roll(hourly, -DAY_START_HOUR, axis=-1).reshape(hourly.shape[:-1] + (DAYS_PER_YEAR, 24))
+
+
+def day_features(load_kwh, poa_w_m2, ambient_c=None):
+    """
+    One feature vector per dispatch window.
+
+    Multi-site series (n_sites, 8760) contribute their mean profile. Each
+    series is divided by its annual peak so load, irradiance and temperature
+    weigh alike whatever their units.
+
+    Returns
+    -------
+    np.ndarray
+        Features, shape (365, 24 × number of series)
+    """
+    blocks = []
+    for series in (load_kwh, poa_w_m2, ambient_c):
+        if series is None:
+            continue
+        series = np.asarray(series, dtype=np.float64)
+        if series.ndim == 2:
+            series = series.mean(axis=0)
+        series = np.broadcast_to(series, (HOURS_PER_YEAR,))
+        peak = np.abs(series).max()
+        blocks.append(daily_windows(series) / (peak if peak > 0 else 1.0))
+    return np.concatenate(blocks, axis=1)
+
+
+class RepresentativeDays:
+    """
+    Representative dispatch windows and the number of days each stands for.
+
+    Parameters
+    ----------
+    days : np.ndarray
+        Window index (0-364) of each representative day, shape (k,)
+    weights : np.ndarray
+        Days represented by each, shape (k,), summing to 365
+    labels : np.ndarray
+        Representative (0..k-1) of every window of the year, shape (365,)
+    """
+
+    __slots__ = ("days", "weights", "labels")
+
+    def __init__(self, days, weights, labels):
+        self.days = np.asarray(days, dtype=np.int64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.labels = np.asarray(labels, dtype=np.int64)
+
+    @classmethod
+    def full_year(cls):
+        """Every window once, for reference runs through the same code path."""
+        days = np.arange(DAYS_PER_YEAR)
+        return cls(days, np.ones(DAYS_PER_YEAR), days)
+
+    def __len__(self):
+        return self.days.shape[0]
+
+    def __repr__(self):
+        return f"RepresentativeDays(k={len(self)}, days={self.days.tolist()})"
+
+    @property
+    def hours(self):
+        """Hour-of-year index of every representative hour, shape (k × 24,)."""
+        return ((self.days[:, None] * 24 + np.arange(24) + DAY_START_HOUR) % HOURS_PER_YEAR).ravel()
+
+    @property
+    def hour_weights(self):
+        """Weight of every representative hour, shape (k × 24,)."""
+        return np.repeat(self.weights, 24)
+
+    def reduce(self, hourly):
+        """Representative hours of an hourly series (..., 8760); scalars pass through."""
+        hourly = np.asarray(hourly)
+        return hourly if hourly.ndim == 0 else hourly[..., self.hours]
+
+    def expand(self, reduced):
+        """Rebuild a full year (..., 8760) by repeating each representative day."""
+        reduced = np.asarray(reduced)
+        windows = reduced.reshape(reduced.shape[:-1] + (len(self), 24))[..., self.labels, :]
+        return np.roll(windows.reshape(reduced.shape[:-1] + (HOURS_PER_YEAR,)), DAY_START_HOUR, axis=-1)
+
+    def total(self, reduced):
+        """Weighted annual total of representative-hour values along the last axis."""
+        return np.asarray(reduced, dtype=np.float64) @ self.hour_weights
+
+
+def select_days(load_kwh, poa_w_m2, ambient_c=None, k: int = DEFAULT_DAYS, n_init: int = 4, seed: int = 0):
+    """
+    Cluster the year's dispatch windows into `k` representative days.
+
+    Parameters
+    ----------
+    load_kwh : array-like
+        Hourly load (8760,) or (n_sites, 8760)
+    poa_w_m2 : array-like
+        Hourly plane-of-array irradiance, same layouts
+    ambient_c : array-like, optional
+        Hourly ambient temperature, same layouts
+    k : int
+        Number of representative days
+    n_init, seed
+        k-means restarts and random seed
+
+    Returns
+    -------
+    RepresentativeDays
+    """
+    X = day_features(load_kwh, poa_w_m2, ambient_c)
+    labels, centers, _ = kmeans(X, k, n_init=n_init, seed=seed)
+    days, labels = medoids(X, labels, centers)
+    return RepresentativeDays(days, np.bincount(labels, minlength=days.shape[0]), labels)
+
+
+def fit_days(load_kwh, poa_w_m2, ambient_c, evaluate, tolerance: float = 1.0, k: int = 12,
+             metrics=METRICS, n_init: int = 4, seed: int = 0):
+    """
+    Smallest doubling of `k` whose representative days meet an error
+    tolerance.
+
+    Parameters
+    ----------
+    load_kwh, poa_w_m2, ambient_c
+        As for `select_days`
+    evaluate : callable
+        `evaluate(days)` returns results for a fixed sample of sites, e.g.
+        `lambda days: simulate_year(*sample_args, days=days)`; called once
+        with None for the full-year reference
+    tolerance : float
+        Largest accepted error (%), portfolio and per site, over `metrics`
+    k : int
+        First number of days tried; doubled until the tolerance is met
+        (capped at 365, which is exact)
+
+    Returns
+    -------
+    (RepresentativeDays, dict)
+        Selected days and their `reduction_error` report on the sample
+    """
+    reference = evaluate(None)
+    while True:
+        days = select_days(load_kwh, poa_w_m2, ambient_c, k=k, n_init=n_init, seed=seed)
+        error = reduction_error(evaluate(days), reference, metrics)
+        worst = max(max(report.values()) for report in error.values())
+        if worst <= tolerance or k >= DAYS_PER_YEAR:
+            return days, error
+        k = min(2 * k, DAYS_PER_YEAR)
+
+
+def simulate_year(
+    pv_kw,
+    load_kwh,
+    poa_w_m2,
+    ambient_c,
+    rates,
+    battery_kwh=0.0,
+    grid_factors=NIGERIA_GRID_FACTOR,
+    diesel_share=0.0,
+    diesel_factor: float = DIESEL_FACTOR,
+    depth_of_discharge: float = 0.8,
+    round_trip_efficiency: float = 0.9,
+    days: RepresentativeDays = None,
+    **generation_kwargs
+):
+    """
+    First-year energy, bill and emission totals for many sites.
+
+    Runs `simulate_generation` and a daily-balance battery dispatch on the
+    representative days (every day when `days` is None) and weights each
+    day by the days it represents. Each dispatch window starts with an empty
+    battery, since representative days are not consecutive; the reference
+    run uses the same rule so the two stay comparable.
+
+    Parameters
+    ----------
+    pv_kw, battery_kwh : float or array-like
+        Per-site PV (kWp) and battery (kWh) sizes
+    load_kwh, poa_w_m2, ambient_c, rates : array-like
+        Hourly series (8760,) shared by all sites or (n_sites, 8760)
+    grid_factors, diesel_share : float or array-like
+        Emission factor and diesel share layouts accepted by
+        `models.emission_model.expand_factors`
+    days : RepresentativeDays, optional
+        Output of `select_days`
+
+    Returns
+    -------
+    BatchResults
+        METRICS per site: annual generation, load, grid import and displaced
+        energy (kWh), bills before and after PV and their difference (₦),
+        residual grid emissions and avoided emissions (tonnes CO₂e)
+    """
+    if days is None:
+        days = RepresentativeDays.full_year()
+    poa = days.reduce(np.asarray(poa_w_m2, dtype=np.float32))
+    ambient = days.reduce(np.asarray(ambient_c, dtype=np.float32))
+    generation = simulate_generation(pv_kw, poa, ambient, **generation_kwargs)
+    n = generation.shape[0]
+    load = np.broadcast_to(days.reduce(np.asarray(load_kwh, dtype=np.float32)), generation.shape)
+
+    # Daily balance: surplus charges the battery, which then covers the
+    # window's deficit hours in proportion
+    net = (generation - load).reshape(n, len(days), 24)
+    deficit = np.maximum(-net, 0.0)
+    eta = np.sqrt(round_trip_efficiency)
+    usable = np.broadcast_to(np.asarray(battery_kwh, dtype=np.float64), (n,)) * depth_of_discharge
+    stored = np.minimum(np.maximum(net, 0.0).sum(axis=2, dtype=np.float64) * eta, usable[:, None])
+    deficit_day = deficit.sum(axis=2, dtype=np.float64)
+    delivered = np.minimum(deficit_day, stored * eta)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covered = np.where(deficit_day > 0, delivered / deficit_day, 0.0)
+    grid_import = (deficit * (1.0 - covered[:, :, None]).astype(np.float32)).reshape(n, -1)
+
+    weights = days.hour_weights
+    rate = days.reduce(np.asarray(rates, dtype=np.float64)) * weights
+    grid = expand_factors(grid_factors)
+    diesel = np.clip(expand_factors(diesel_share), 0.0, 1.0)
+    avoided_factor = days.reduce((1.0 - diesel) * grid + diesel * diesel_factor) * weights
+    grid_factor = days.reduce(grid) * weights
+
+    def weighted(hourly, hour_weights):
+        hourly = hourly.astype(np.float64)
+        if hour_weights.ndim == 1:
+            return hourly @ hour_weights
+        return np.einsum("nh,nh->n", hourly, hour_weights)
+
+    displaced = load - grid_import
+    bill_before = weighted(load, rate)
+    bill_after = weighted(grid_import, rate)
+    return BatchResults({
+        "generation_kwh": weighted(generation, weights),
+        "load_kwh": weighted(load, weights),
+        "grid_import_kwh": weighted(grid_import, weights),
+        "displaced_kwh": weighted(displaced, weights),
+        "bill_before": bill_before,
+        "bill_after": bill_after,
+        "bill_savings": bill_before - bill_after,
+        "grid_tons": weighted(grid_import, grid_factor) / 1000.0,
+        "avoided_tons": weighted(displaced, avoided_factor) / 1000.0,
+    })
+
+
+def reduction_error(reduced, reference, metrics=METRICS):
+    """
+    Error of representative-day totals against a full-year run; see
+    `models.clustering.relative_error`.
+    """
+    return relative_error(reduced, reference, metrics)
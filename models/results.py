@@ -0,0 +1,175 @@
+# models/results.py
+"""
+Result containers for the deterministic models.
+
+Single-site calls return small `__slots__` objects (no per-instance
+`__dict__`) that behave as read/write mappings, so existing `result["key"]`
+code keeps working. Portfolio runs use `BatchResults`, a struct-of-arrays
+container holding one NumPy column per metric, optionally in float32, that
+reports and rankings read column-wise without building per-site objects.
+"""
+from collections.abc import Mapping
+
+import numpy as np
+
+
+class _Result(Mapping):
+    """Mapping view over a fixed set of slots."""
+
+    __slots__ = ()
+
+    def __init__(self, *args, **kwargs):
+        if len(args) > len(self.__slots__):
+            raise TypeError(f"{type(self).__name__} takes {len(self.__slots__)} values, got {len(args)}")
+        values = dict(zip(self.__slots__, args), **kwargs)
+        missing = [name for name in self.__slots__ if name not in values]
+        if missing or len(values) != len(self.__slots__):
+            raise TypeError(f"{type(self).__name__} needs exactly {self.__slots__}, missing {missing}")
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __getitem__(self, key):
+        if key in self.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def __reduce__(self):
+        return type(self), tuple(getattr(self, name) for name in self.__slots__)
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class SizingResult(_Result):
+    """PV size (kW) and battery capacity (kWh)."""
+    __slots__ = ("pv_kw", "battery_kwh")
+
+
+class SavingsResult(_Result):
+    """
+    Savings over the analysis period; `annual_savings` is the cumulative
+    net savings per year as a NumPy array.
+    """
+    __slots__ = ("annual_savings", "total_savings", "payback_years", "npv", "capex", "opex")
+
+
+class CarbonResult(_Result):
+    """First-year and lifetime avoided emissions (tonnes CO₂e)."""
+    __slots__ = ("annual_tons", "lifetime_tons")
+
+
+class BatchResults(Mapping):
+    """
+    Columnar results for many sites.
+
+    Maps metric names to arrays whose first axis is the site (1-D for
+    per-site metrics, 2-D for per-site trajectories such as
+    `annual_savings`). Scalars are broadcast without copying. Floating
+    columns are stored as `dtype`, so float32 halves memory for large
+    portfolios; integer, boolean and label columns keep their own dtype.
+
+    Parameters
+    ----------
+    columns : mapping of str to array-like, optional
+        Metric columns
+    dtype : numpy dtype
+        Storage type of floating columns
+    n_sites : int, optional
+        Number of sites, needed only when every column is scalar
+    """
+
+    __slots__ = ("_columns", "dtype", "n_sites")
+
+    def __init__(self, columns=None, dtype=np.float64, n_sites: int = None):
+        self._columns = {}
+        self.dtype = np.dtype(dtype)
+        columns = dict(columns or {})
+        sizes = [np.shape(v)[0] for v in columns.values() if np.ndim(v) > 0]
+        self.n_sites = int(n_sites if n_sites is not None else (max(sizes) if sizes else 0))
+        for name, values in columns.items():
+            self[name] = values
+
+    @classmethod
+    def allocate(cls, n_sites: int, names, dtype=np.float64):
+        """Empty (NaN-filled) 1-D columns to be filled chunk by chunk."""
+        return cls({name: np.full(n_sites, np.nan, dtype=dtype) for name in names}, dtype, n_sites)
+
+    @classmethod
+    def concat(cls, batches, dtype=None):
+        """Stack batches with the same columns along the site axis."""
+        batches = list(batches)
+        dtype = dtype or batches[0].dtype
+        names = list(batches[0])
+        return cls({name: np.concatenate([np.asarray(b[name]) for b in batches]) for name in names}, dtype)
+
+    def __getitem__(self, name):
+        return self._columns[name]
+
+    def __setitem__(self, name, values):
+        values = np.asarray(values)
+        if values.dtype.kind == "f" and values.dtype != self.dtype:
+            values = values.astype(self.dtype)
+        if values.ndim == 0:
+            values = np.broadcast_to(values, (self.n_sites,))
+        elif values.shape[0] != self.n_sites:
+            raise ValueError(f"Column {name!r} has {values.shape[0]} rows, expected {self.n_sites}")
+        self._columns[name] = values
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self):
+        return len(self._columns)
+
+    def __repr__(self):
+        return f"BatchResults(n_sites={self.n_sites}, columns={list(self._columns)}, dtype={self.dtype})"
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the columns (broadcast scalars count once)."""
+        return sum(v.nbytes if v.strides[0] else v.itemsize for v in self._columns.values())
+
+    def slice(self, start: int, stop: int):
+        """Sites [start, stop) as views."""
+        part = BatchResults(dtype=self.dtype, n_sites=len(range(start, min(stop, self.n_sites))))
+        part._columns = {name: values[start:stop] for name, values in self._columns.items()}
+        return part
+
+    def chunks(self, chunk_size: int = 10_000):
+        """Consecutive `slice`s of at most `chunk_size` sites."""
+        for start in range(0, self.n_sites, chunk_size):
+            yield self.slice(start, start + chunk_size)
+
+    def take(self, index):
+        """Sites selected by an integer or boolean index array (copies)."""
+        index = np.asarray(index)
+        n = int(index.sum()) if index.dtype == bool else index.shape[0]
+        part = BatchResults(dtype=self.dtype, n_sites=n)
+        part._columns = {name: values[index] for name, values in self._columns.items()}
+        return part
+
+    def site(self, i: int) -> dict:
+        """One site's metrics as Python scalars (or arrays for 2-D columns)."""
+        return {name: values[i].item() if values.ndim == 1 else values[i]
+                for name, values in self._columns.items()}
+
+    def to_frame(self):
+        """pandas DataFrame of the 1-D columns."""
+        import pandas as pd
+
+        return pd.DataFrame({name: values for name, values in self._columns.items() if values.ndim == 1})
@@ -1,22 +1,13 @@
-import joblib
-from pathlib import Path
-from feature_builder import build_features
+import numpy as np
 
-_SAVINGS_PIPELINE = None
-
-def _load_pipeline():
-    global _SAVINGS_PIPELINE
-    if _SAVINGS_PIPELINE is not None:
-        return _SAVINGS_PIPELINE
-    base = Path(__file__).resolve().parents[1]
-    model_path = base / "pv_model_outputs" / "rf_25yr_savings.pkl"
-    if model_path.exists():
-        _SAVINGS_PIPELINE = joblib.load(model_path)
-    return _SAVINGS_PIPELINE
+from models import ml_pipelines
+from models.results import SavingsResult
 
 def predict_savings(df_input, tariff, capex, opex, discount_rate):
-    pipeline = _load_pipeline()
     try:
+        from feature_builder import build_features
+
+        pipeline = ml_pipelines.load_pipeline("rf_25yr_savings.pkl")
         # Build features for ML model
         df_features = build_features(
             df_input=df_input,
@@ -30,14 +21,15 @@ def predict_savings(df_input, tariff, capex, opex, discount_rate):
         pred = pipeline.predict(df_features)
         total_savings = float(pred[0])
         annual_savings = total_savings / 25
-        cumulative = [annual_savings * (i + 1) for i in range(25)]
-        return {
-            "annual_savings": cumulative,
-            "total_savings": total_savings,
-            "payback_years": capex / annual_savings if annual_savings > 0 else float("inf"),
-            "capex": capex,
-            "opex": opex
-        }
+        cumulative = annual_savings * np.arange(1, 26)
+        return SavingsResult(
+            annual_savings=cumulative,
+            total_savings=total_savings,
+            payback_years=capex / annual_savings if annual_savings > 0 else float("inf"),
+            npv=float("nan"),  # not modelled by the ML pipeline
+            capex=capex,
+            opex=opex
+        )
 
     except Exception:
         # fallback using only df_input (no df_features)
@@ -48,11 +40,12 @@ def predict_savings(df_input, tariff, capex, opex, discount_rate):
             annual_load = 100 * 365  # very rough default if df_input invalid
 
         annual_savings = annual_load * tariff * 0.65
-        cumulative = [annual_savings * (i + 1) for i in range(25)]
-        return {
-            "annual_savings": cumulative,
-            "total_savings": cumulative[-1] - capex - opex * 25,
-            "payback_years": capex / annual_savings if annual_savings > 0 else float('inf'),
-            "capex": capex,
-            "opex": opex
-        }
+        cumulative = annual_savings * np.arange(1, 26)
+        return SavingsResult(
+            annual_savings=cumulative,
+            total_savings=cumulative[-1] - capex - opex * 25,
+            payback_years=capex / annual_savings if annual_savings > 0 else float('inf'),
+            npv=float("nan"),
+            capex=capex,
+            opex=opex
+        )
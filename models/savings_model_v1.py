@@ -102,6 +102,8 @@
 
 import numpy as np
 
+from models.results import SavingsResult
+
 
 def predict_savings(
     annual_load_kwh: float,
@@ -110,7 +112,11 @@ def predict_savings(
     opex_annual: float,
     discount_rate: float,
     system_lifetime: int = 25,
-    pv_degradation: float = 0.007
+    pv_degradation: float = 0.007,
+    tariff_escalation: float = 0.0,
+    gross_savings=None,
+    opex_escalation: float = 0.0,
+    replacement_costs=None
 ):
     """
     Bankable deterministic savings model.
@@ -131,15 +137,39 @@ def predict_savings(
         Analysis period in years
     pv_degradation : float
         Annual PV degradation rate
+    tariff_escalation : float
+        Annual tariff escalation rate, e.g. 0.05 for 5%/year
+    gross_savings : array-like, optional
+        Year-by-year bill savings (₦/year) of one site from
+        `models.billing_model`, shape (system_lifetime,) or
+        (1, system_lifetime). When given it replaces the flat tariff × load
+        estimate; use `savings_cashflows` for many sites.
+    opex_escalation : float
+        Annual O&M cost escalation rate; see
+        `utils.macro_data.MacroTable.escalation_rate` for a GDP-based value
+    replacement_costs : array-like, optional
+        Year-by-year equipment replacement costs (₦), e.g. a row of
+        `models.battery_model.replacement_costs`
 
     Returns
     -------
-    dict
-        annual_savings, total_savings, payback_years, npv
+    SavingsResult
+        annual_savings (cumulative, NumPy array), total_savings,
+        payback_years, npv, capex, opex
     """
 
     r = discount_rate / 100.0
 
+    if gross_savings is not None:
+        gross_savings = np.asarray(gross_savings, dtype=float)
+        if gross_savings.ndim == 2 and gross_savings.shape[0] == 1:
+            gross_savings = gross_savings[0]
+        if gross_savings.shape != (system_lifetime,):
+            raise ValueError(
+                f"gross_savings has shape {gross_savings.shape}, expected ({system_lifetime},); "
+                "use savings_cashflows for per-site savings"
+            )
+
     annual_energy_offset = annual_load_kwh
     base_annual_savings = annual_energy_offset * tariff
 
@@ -149,9 +179,15 @@ def predict_savings(
     payback_year = None
 
     for year in range(1, system_lifetime + 1):
-        degradation_factor = (1 - pv_degradation) ** (year - 1)
-        gross_savings = base_annual_savings * degradation_factor
-        net_savings = gross_savings - opex_annual
+        if gross_savings is not None:
+            year_savings = float(gross_savings[year - 1])
+        else:
+            degradation_factor = (1 - pv_degradation) ** (year - 1)
+            escalation_factor = (1 + tariff_escalation) ** (year - 1)
+            year_savings = base_annual_savings * degradation_factor * escalation_factor
+        net_savings = year_savings - opex_annual * (1 + opex_escalation) ** (year - 1)
+        if replacement_costs is not None:
+            net_savings -= float(replacement_costs[year - 1])
 
         discounted = net_savings / ((1 + r) ** year)
 
@@ -165,11 +201,104 @@ def predict_savings(
     total_savings = sum(cashflows)
     npv = sum(discounted_cashflows) - capex
 
+    return SavingsResult(
+        annual_savings=np.cumsum(cashflows),
+        total_savings=total_savings,
+        payback_years=payback_year if payback_year else float("inf"),
+        npv=npv,
+        capex=capex,
+        opex=opex_annual
+    )
+
+
+def savings_cashflows(gross_savings, capex, opex_annual, discount_rate, replacement_costs=None):
+    """
+    Vectorized counterpart of `predict_savings` for many sites.
+
+    Parameters
+    ----------
+    gross_savings : np.ndarray
+        Gross bill savings, shape (n_sites, n_years) (₦/year)
+    capex : float or np.ndarray
+        Initial investment cost per site (₦)
+    opex_annual : float or np.ndarray
+        Annual O&M cost per site (₦/year)
+    discount_rate : float or np.ndarray
+        Discount rate (%) e.g. 8.0
+    replacement_costs : np.ndarray, optional
+        Replacement costs (₦), shape (n_sites, n_years) or (n_years,)
+
+    Returns
+    -------
+    dict
+        annual_savings (cumulative, n_sites × n_years), total_savings,
+        payback_years, npv
+    """
+    gross = np.atleast_2d(np.asarray(gross_savings, dtype=float))
+    capex = np.broadcast_to(np.asarray(capex, dtype=float), gross.shape[:1])
+    opex = np.asarray(opex_annual, dtype=float).reshape(-1, 1)
+    r = np.asarray(discount_rate, dtype=float).reshape(-1, 1) / 100.0
+
+    years = np.arange(1, gross.shape[1] + 1)
+    net = gross - opex
+    if replacement_costs is not None:
+        net = net - np.asarray(replacement_costs, dtype=float)
+    cumulative = np.cumsum(net, axis=1)
+
+    paid_back = (cumulative - capex[:, None]) > 0
+    payback = np.where(paid_back.any(axis=1), paid_back.argmax(axis=1) + 1.0, np.inf)
+    npv = (net / (1 + r) ** years).sum(axis=1) - capex
+
     return {
-        "annual_savings": np.cumsum(cashflows).tolist(),
-        "total_savings": total_savings,
-        "payback_years": payback_year if payback_year else float("inf"),
+        "annual_savings": cumulative,
+        "total_savings": cumulative[:, -1],
+        "payback_years": payback,
         "npv": npv,
-        "capex": capex,
-        "opex": opex_annual
     }
+
+
+def internal_rate_of_return(net_cashflows, capex, low: float = -0.99, high: float = 1.0,
+                            iterations: int = 45):
+    """
+    Vectorized IRR by bisection.
+
+    Parameters
+    ----------
+    net_cashflows : np.ndarray
+        Net annual cash flows for years 1..n, shape (n_sites, n_years) (₦)
+    capex : float or np.ndarray
+        Initial investment per site (₦)
+    low, high : float
+        Search bracket for the rate (fractions, e.g. 1.0 = 100%)
+    iterations : int
+        Bisection steps; 45 narrows the bracket below 1e-13
+
+    Returns
+    -------
+    np.ndarray
+        IRR as a fraction per site; NaN where NPV does not change sign
+        inside the bracket
+    """
+    net = np.atleast_2d(np.asarray(net_cashflows, dtype=float))
+    capex = np.broadcast_to(np.asarray(capex, dtype=float), net.shape[:1])
+    # Year-major rows so Horner's rule walks contiguous memory
+    flows = np.ascontiguousarray(net.T[::-1])
+
+    def npv(rate):
+        # NPV as a polynomial in x = 1/(1+r): x(c1 + x(c2 + ... + x c_n)) - capex
+        x = 1.0 / (1.0 + rate)
+        acc = np.zeros_like(x)
+        for row in flows:
+            acc += row
+            acc *= x
+        return acc - capex
+
+    lo = np.full(net.shape[0], low)
+    hi = np.full(net.shape[0], high)
+    valid = (npv(lo) > 0) & (npv(hi) < 0)
+    for _ in range(iterations):
+        mid = (lo + hi) / 2
+        above = npv(mid) > 0  # NPV falls with the rate for conventional flows
+        lo = np.where(above, mid, lo)
+        hi = np.where(above, hi, mid)
+    return np.where(valid, (lo + hi) / 2, np.nan)
@@ -0,0 +1,343 @@
+# models/site_dedup.py
+"""
+Portfolio reduction before the expensive stages.
+
+Large portfolios repeat themselves: the same state, archetype, tariff and
+sizing rules produce many identical or near-identical sites. Two pre-passes
+cut the number of sites that dispatch, optimization or Monte Carlo stages
+have to evaluate:
+
+- `deduplicate` groups rows that are identical after canonicalization
+  (strings stripped and lower-cased, -0.0 folded into 0.0, NaNs unified,
+  hourly profiles compared byte for byte). Results are exact.
+- `cluster_sites` groups similar sites with weighted k-means on z-scored
+  features and the shape of their load profile. Size-dependent inputs are
+  divided by a per-site size (`scale_by`, e.g. annual load) first, so a
+  cluster's medoid stands for sites of any size, and size-dependent outputs
+  are scaled back per site when broadcasting. `SiteGroups.validate` reports
+  the error on a sample of sites evaluated exactly.
+
+    groups = cluster_sites(params, k=500, scale_by="annual_load_kwh",
+                           extensive=("pv_kw", "capex", "opex_annual"))
+    reps = evaluate_candidates(**groups.take(params))
+    results = groups.broadcast(reps, extensive=("npv", "total_savings", ...))
+    error = groups.validate(evaluate_candidates, params, extensive=(...))
+"""
+import hashlib
+
+import numpy as np
+
+from models.billing_model import HOURS_PER_YEAR, calendar_index
+from models.clustering import kmeans, medoids, relative_error
+from models.results import BatchResults
+
+
+def _per_site(params):
+    """Number of sites spanned by a dict of per-site arrays and shared scalars."""
+    sizes = [np.shape(v)[0] for v in params.values() if np.ndim(v) > 0]
+    return max(sizes) if sizes else 1
+
+
+def _canonical_column(values, n):
+    """
+    int64 keys that are equal exactly when the canonical inputs are equal.
+
+    Floats compare by bit pattern after folding -0.0 into 0.0 and every NaN
+    into one; strings are stripped and lower-cased; (n, T) arrays such as
+    hourly profiles become one 64-bit digest per row.
+    """
+    values = np.asarray(values)
+    if values.ndim == 0:
+        values = np.broadcast_to(values, (n,))
+    if values.ndim == 2:
+        return np.array([int.from_bytes(hashlib.blake2b(np.ascontiguousarray(row).tobytes(), digest_size=8)
+                                        .digest(), "little", signed=True) for row in values], dtype=np.int64)
+    if values.dtype.kind in "OUS":
+        labels = np.char.lower(np.char.strip(values.astype(str)))
+        _, codes = np.unique(labels, return_inverse=True)
+        return codes.astype(np.int64)
+    if values.dtype.kind in "biu":
+        return values.astype(np.int64)
+    floats = values.astype(np.float64) + 0.0
+    floats[np.isnan(floats)] = np.nan
+    return floats.view(np.int64)
+
+
+def _group_rows(keys):
+    """
+    Group identical rows of an int64 key matrix with one lexsort.
+
+    Returns first-occurrence representatives, the group of every row and
+    group sizes.
+    """
+    n = keys.shape[0]
+    order = np.lexsort(keys.T[::-1])
+    ordered = keys[order]
+    new = np.ones(n, dtype=bool)
+    new[1:] = (ordered[1:] != ordered[:-1]).any(axis=1)
+    group = np.cumsum(new) - 1
+    inverse = np.empty(n, dtype=np.int64)
+    inverse[order] = group
+    # lexsort is stable, so each group's first sorted row is its first occurrence
+    return order[new], inverse, np.bincount(group)
+
+
+class SiteGroups:
+    """
+    Representative sites and how results broadcast back to every site.
+
+    Parameters
+    ----------
+    representatives : np.ndarray
+        Site index of each group's representative, shape (n_groups,)
+    inverse : np.ndarray
+        Group of every site, shape (n_sites,)
+    scale : np.ndarray, optional
+        Size of every site relative to its representative, shape
+        (n_sites,); ones for exact deduplication
+    """
+
+    __slots__ = ("representatives", "inverse", "counts", "scale")
+
+    def __init__(self, representatives, inverse, scale=None):
+        self.representatives = np.asarray(representatives, dtype=np.int64)
+        self.inverse = np.asarray(inverse, dtype=np.int64)
+        self.counts = np.bincount(self.inverse, minlength=self.representatives.shape[0])
+        self.scale = np.ones(self.inverse.shape[0]) if scale is None else np.asarray(scale, dtype=np.float64)
+
+    @property
+    def n_sites(self) -> int:
+        return self.inverse.shape[0]
+
+    @property
+    def n_groups(self) -> int:
+        return self.representatives.shape[0]
+
+    @property
+    def reduction(self) -> float:
+        """Sites per evaluated representative."""
+        return self.n_sites / max(self.n_groups, 1)
+
+    def __repr__(self):
+        return f"SiteGroups(n_sites={self.n_sites}, n_groups={self.n_groups}, reduction={self.reduction:.1f}x)"
+
+    def take(self, params, sites=None):
+        """
+        Per-site inputs of the representatives (or of `sites`); shared
+        scalars and hourly vectors pass through.
+        """
+        sites = self.representatives if sites is None else np.asarray(sites)
+        n = self.n_sites
+        return {key: value[sites] if np.ndim(value) > 0 and np.shape(value)[0] == n else value
+                for key, value in params.items()}
+
+    def broadcast(self, results, extensive=(), dtype=None):
+        """
+        Results for every site from results of the representatives.
+
+        Columns named in `extensive` (energy, money, emissions) are
+        multiplied by each site's scale; the rest (ratios, LCOE, payback)
+        are copied from the representative.
+        """
+        dtype = dtype or getattr(results, "dtype", np.float64)
+        out = BatchResults(dtype=dtype, n_sites=self.n_sites)
+        for name, values in results.items():
+            values = np.asarray(values)[self.inverse]
+            if name in extensive:
+                values = values * self.scale.reshape((-1,) + (1,) * (values.ndim - 1))
+            out[name] = values
+        return out
+
+    def sample(self, size: int = 256, seed: int = 0):
+        """Sorted random sites for validation, drawn from multi-site groups first."""
+        rng = np.random.default_rng(seed)
+        shared = np.flatnonzero(self.counts[self.inverse] > 1)
+        pool = shared if shared.shape[0] >= size else np.arange(self.n_sites)
+        return np.sort(rng.choice(pool, size=min(size, pool.shape[0]), replace=False))
+
+    def validate(self, evaluate, params, extensive=(), metrics=None, size: int = 256, seed: int = 0,
+                 approx=None):
+        """
+        Approximation error on a sample of sites evaluated exactly.
+
+        `evaluate(**params)` is called once on the representatives (unless
+        their broadcast results are passed as `approx`) and once on the
+        sample.
+
+        Returns
+        -------
+        dict
+            See `models.clustering.relative_error`
+        """
+        sites = self.sample(size, seed)
+        exact = evaluate(**self.take(params, sites))
+        if approx is None:
+            approx = self.broadcast(evaluate(**self.take(params)), extensive)
+        metrics = metrics or [name for name in exact if np.ndim(exact[name]) == 1]
+        return relative_error({name: np.asarray(approx[name])[sites] for name in metrics}, exact, metrics)
+
+
+def deduplicate(params, profiles=None, columns=None):
+    """
+    Exact duplicate detection over per-site inputs.
+
+    Parameters
+    ----------
+    params : dict
+        Per-site arrays (n_sites,) or (n_sites, T), strings allowed, and
+        scalars shared by all sites
+    profiles : np.ndarray, optional
+        Hourly series per site (n_sites, 8760), compared byte for byte
+    columns : sequence of str, optional
+        Inputs that define identity; every per-site entry by default
+
+    Returns
+    -------
+    SiteGroups
+        First occurrence of each distinct site as its representative
+    """
+    n = _per_site(params) if profiles is None else np.shape(profiles)[0]
+    columns = [name for name in (columns or params) if np.ndim(params[name]) > 0]
+    keys = [_canonical_column(params[name], n) for name in columns]
+    if profiles is not None:
+        keys.append(_canonical_column(profiles, n))
+    if not keys:
+        return SiteGroups([0], np.zeros(n, dtype=np.int64))
+    representatives, inverse, _ = _group_rows(np.stack(keys, axis=1))
+
+    # Digests can in principle collide: give any profile that differs from
+    # its representative a group of its own
+    if profiles is not None:
+        profiles = np.asarray(profiles)
+        merged = np.flatnonzero(representatives[inverse] != np.arange(n))
+        differs = np.array([not np.array_equal(profiles[i], profiles[representatives[inverse[i]]])
+                            for i in merged], dtype=bool)
+        moved = merged[differs]
+        if moved.shape[0]:
+            inverse[moved] = representatives.shape[0] + np.arange(moved.shape[0])
+            representatives = np.concatenate([representatives, moved])
+    return SiteGroups(representatives, inverse)
+
+
+def profile_shape(profiles, year: int = 2025, chunk_size: int = 4096):
+    """
+    Scale-free shape of hourly profiles: the average day (24 values) and
+    the monthly split (12 values), both as fractions of the annual total.
+
+    Returns
+    -------
+    (np.ndarray, np.ndarray)
+        Shapes (n_sites, 36) and annual totals (n_sites,)
+    """
+    profiles = np.asarray(profiles)
+    if profiles.ndim == 1:
+        profiles = profiles[None, :]
+    n = profiles.shape[0]
+    month_start = np.flatnonzero(np.diff(calendar_index(year)["month"], prepend=-1))
+    shapes = np.empty((n, 36))
+    totals = np.empty(n)
+    for lo in range(0, n, chunk_size):
+        block = np.asarray(profiles[lo:lo + chunk_size], dtype=np.float64)
+        total = block.sum(axis=1)
+        safe = np.where(total > 0, total, 1.0)[:, None]
+        shapes[lo:lo + chunk_size, :24] = block.reshape(-1, HOURS_PER_YEAR // 24, 24).sum(axis=1) / safe
+        shapes[lo:lo + chunk_size, 24:] = np.add.reduceat(block, month_start, axis=1) / safe
+        totals[lo:lo + chunk_size] = total
+    return shapes, totals
+
+
+def cluster_sites(
+    params,
+    k: int,
+    features=None,
+    profiles=None,
+    scale_by=None,
+    extensive=(),
+    profile_weight: float = 1.0,
+    n_init: int = 2,
+    seed: int = 0
+):
+    """
+    Group similar sites around k representative (medoid) sites.
+
+    Exact duplicates are merged first and clustered once, weighted by their
+    count. Numeric features are z-scored; string features are one-hot
+    encoded far apart, so sites of different categories share a cluster
+    only when `k` is smaller than the number of category combinations.
+
+    Parameters
+    ----------
+    params : dict
+        Per-site inputs and shared scalars, as for `deduplicate`
+    k : int
+        Number of representatives
+    features : sequence of str, optional
+        Inputs to cluster on; every 1-D per-site entry by default
+    profiles : np.ndarray, optional
+        Hourly load per site (n_sites, 8760), clustered on its shape
+    scale_by : str or array-like, optional
+        Per-site size (an input name or an array); the annual profile
+        total when omitted and `profiles` is given
+    extensive : sequence of str
+        Inputs proportional to size (e.g. pv_kw, capex), divided by the
+        size before clustering
+    profile_weight : float
+        Weight of the profile shape relative to all other features
+
+    Returns
+    -------
+    SiteGroups
+        Medoid representatives with each site's size relative to its
+        medoid in `scale`
+    """
+    exact = deduplicate(params, profiles)
+    reps = exact.representatives
+    n = exact.n_sites
+
+    size = None
+    if isinstance(scale_by, str):
+        size = np.broadcast_to(np.asarray(params[scale_by], dtype=np.float64), (n,))
+    elif scale_by is not None:
+        size = np.broadcast_to(np.asarray(scale_by, dtype=np.float64), (n,))
+
+    blocks = []
+    if profiles is not None:
+        shapes, totals = profile_shape(np.asarray(profiles)[reps])
+        if size is None:
+            size = totals[exact.inverse]
+        spread = shapes.std(axis=0).sum()
+        blocks.append(shapes * (profile_weight / spread if spread > 0 else 0.0))
+
+    names = [name for name in (features or params)
+             if name != scale_by and np.ndim(params[name]) == 1]
+    numeric = []
+    for name in names:
+        values = np.asarray(params[name])[reps]
+        if values.dtype.kind in "OUS":
+            codes = _canonical_column(values, reps.shape[0])
+            onehot = np.zeros((reps.shape[0], codes.max() + 1))
+            onehot[np.arange(reps.shape[0]), codes] = 10.0 * max(len(names), 1)
+            blocks.append(onehot)
+            continue
+        values = values.astype(np.float64)
+        if name in extensive and size is not None:
+            values = values / np.where(size[reps] > 0, size[reps], 1.0)
+        numeric.append(values)
+    if numeric:
+        numeric = np.stack(numeric, axis=1)
+        std = np.nanstd(numeric, axis=0)
+        z = (numeric - np.nanmean(numeric, axis=0)) / np.where(std > 0, std, 1.0)
+        blocks.append(np.nan_to_num(z))
+    if not blocks:
+        return exact
+
+    X = np.concatenate(blocks, axis=1)
+    labels, centers, _ = kmeans(X, k, weights=exact.counts, n_init=n_init, seed=seed)
+    medoid, labels = medoids(X, labels, centers)
+    representatives = reps[medoid]
+    inverse = labels[exact.inverse]
+    if size is None:
+        return SiteGroups(representatives, inverse)
+    rep_size = size[representatives][inverse]
+    scale = np.divide(size, rep_size, out=np.ones(n), where=rep_size > 0)
+    return SiteGroups(representatives, inverse, scale)
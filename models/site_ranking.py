@@ -0,0 +1,272 @@
+# models/site_ranking.py
+import heapq
+
+import numpy as np
+
+from models.emission_model import NIGERIA_GRID_FACTOR
+from models.results import BatchResults
+from models.savings_model_v1 import internal_rate_of_return, savings_cashflows
+
+# True where larger values rank higher
+METRIC_DESCENDING = {
+    "npv": True,
+    "irr": True,
+    "total_savings": True,
+    "annual_tons": True,
+    "lifetime_tons": True,
+    "lcoe": False,
+    "payback_years": False,
+}
+
+# Tie-breakers applied after the ranking metric, in order
+DEFAULT_TIE_BREAKERS = {
+    "npv": ("irr", "lcoe"),
+    "irr": ("npv", "lcoe"),
+    "lcoe": ("npv", "irr"),
+}
+
+
+def evaluate_candidates(
+    pv_kw,
+    annual_load_kwh,
+    tariff,
+    capex,
+    opex_annual,
+    discount_rate,
+    irradiance=5.0,
+    annual_energy_kwh=None,
+    lifetime: int = 25,
+    performance_ratio: float = 0.75,
+    degradation_rate: float = 0.005,
+    tariff_escalation: float = 0.0,
+    carbon_factor: float = NIGERIA_GRID_FACTOR
+):
+    """
+    Screening economics for a chunk of candidate sites in one vectorized pass.
+
+    PV output (the `predict_lcoe` yield estimate unless `annual_energy_kwh`
+    is given) offsets grid purchases up to the site's load. Savings, NPV
+    and payback follow `savings_cashflows`, LCOE follows `predict_lcoe`.
+
+    Parameters
+    ----------
+    All parameters are scalars or arrays of shape (n_candidates,).
+
+    Returns
+    -------
+    BatchResults
+        npv, irr, lcoe, payback_years, total_savings, annual_tons and
+        lifetime_tons, each of shape (n_candidates,)
+    """
+    pv_kw = np.atleast_1d(np.asarray(pv_kw, dtype=np.float64))
+    n = pv_kw.shape[0]
+
+    def col(value):
+        return np.broadcast_to(np.asarray(value, dtype=np.float64), (n,))[:, None]
+
+    if annual_energy_kwh is None:
+        energy = pv_kw[:, None] * col(irradiance) * 365 * performance_ratio
+    else:
+        energy = col(annual_energy_kwh)
+
+    years = np.arange(lifetime)
+    yearly_energy = energy * (1 - degradation_rate) ** years
+    gross = np.minimum(yearly_energy, col(annual_load_kwh)) * col(tariff) * (1 + tariff_escalation) ** years
+    capex_col, opex_col, rate_col = col(capex), col(opex_annual), col(discount_rate)
+
+    cash = savings_cashflows(gross, capex_col[:, 0], opex_col, rate_col)
+    discount = (1 + rate_col / 100.0) ** (years + 1)
+    lcoe = (capex_col[:, 0] + (opex_col / discount).sum(axis=1)) / (yearly_energy / discount).sum(axis=1)
+    tons = yearly_energy * carbon_factor / 1000.0
+
+    return BatchResults({
+        "npv": cash["npv"],
+        "irr": internal_rate_of_return(gross - opex_col, capex_col[:, 0]),
+        "lcoe": lcoe,
+        "payback_years": cash["payback_years"],
+        "total_savings": cash["total_savings"],
+        "annual_tons": tons[:, 0],
+        "lifetime_tons": tons.sum(axis=1),
+    })
+
+
+class StreamingTopK:
+    """
+    Bounded top-k of one ranking over a stream of metric chunks.
+
+    Each chunk is cut down to its best k candidates with `argpartition`
+    (keeping every candidate tied with the k-th on the ranking metric), and
+    only those enter a k-sized min-heap whose root is the current k-th
+    best. Ties on the ranking metric are broken by `tie_breakers` in order,
+    then by stream position (earlier wins); tie-breakers missing from the
+    first chunk are skipped, so precomputed metric chunks without them fall
+    back to the next available key and then to stream position. NaN always
+    ranks last. Memory is O(k) whatever the number of candidates.
+
+    Parameters
+    ----------
+    k : int
+        Number of sites to keep
+    by : str
+        Ranking metric
+    tie_breakers : sequence of str
+        Further metrics compared when earlier ones are equal
+    descending : dict, optional
+        Direction overrides for metrics not in METRIC_DESCENDING
+    """
+
+    def __init__(self, k: int, by: str, tie_breakers=(), descending=None):
+        self.k = k
+        self.keys = (by,) + tuple(t for t in tie_breakers if t != by)
+        self._resolved = False
+        directions = dict(METRIC_DESCENDING, **(descending or {}))
+        self._sign = {key: 1.0 if directions.get(key, True) else -1.0 for key in self.keys}
+        self._heap = []
+
+    def _score(self, metrics, key):
+        """Metric oriented so that larger is better, NaN mapped to -inf."""
+        score = self._sign[key] * np.asarray(metrics[key], dtype=np.float64)
+        return np.where(np.isnan(score), -np.inf, score)
+
+    def push(self, metrics, positions, records):
+        """
+        Offer a chunk of feasible candidates.
+
+        Parameters
+        ----------
+        metrics : dict of np.ndarray
+            Metric columns for the chunk
+        positions : np.ndarray
+            Global stream position of each candidate
+        records : callable
+            `records(i)` builds the output dict for chunk row i; only called
+            for rows that enter the heap
+        """
+        if self.keys[0] not in metrics:
+            raise ValueError(f"Chunk has no {self.keys[0]!r} column to rank by")
+        if not self._resolved:
+            # Heap keys must compare alike across chunks, so the tie-breakers
+            # are fixed by the first chunk
+            self.keys = tuple(key for key in self.keys if key in metrics)
+            self._resolved = True
+        missing = [key for key in self.keys if key not in metrics]
+        if missing:
+            raise ValueError(f"Chunk lacks tie-breaker columns {missing} present in earlier chunks")
+        primary = self._score(metrics, self.keys[0])
+        n = primary.shape[0]
+        if n == 0:
+            return
+        if len(self._heap) == self.k:
+            # Nothing below the current k-th best can get in
+            candidates = np.flatnonzero(primary >= self._heap[0][0][0])
+        else:
+            candidates = np.arange(n)
+        if candidates.size > self.k:
+            part = np.argpartition(-primary[candidates], self.k - 1)
+            kth = primary[candidates[part[self.k - 1]]]
+            candidates = candidates[primary[candidates] >= kth]
+
+        scores = [primary[candidates]] + [self._score(metrics, key)[candidates] for key in self.keys[1:]]
+        for row, i in enumerate(candidates):
+            key = tuple(float(s[row]) for s in scores) + (-int(positions[i]),)
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, (key, records(i)))
+            elif key > self._heap[0][0]:
+                heapq.heapreplace(self._heap, (key, records(i)))
+
+    def result(self):
+        """Ranked list of records, best first, each with its 1-based rank."""
+        ranked = sorted(self._heap, key=lambda entry: entry[0], reverse=True)
+        return [dict(record, rank=i + 1) for i, (_, record) in enumerate(ranked)]
+
+
+def candidate_chunks(params: dict, chunk_size: int = 100_000):
+    """
+    Slice a dict of per-candidate arrays (NumPy, memmap, or scalars shared
+    by all) into chunks for `rank_sites`.
+    """
+    sizes = [len(v) for v in params.values() if np.ndim(v) > 0]
+    n = max(sizes) if sizes else 1
+    for lo in range(0, n, chunk_size):
+        yield {key: value[lo:lo + chunk_size] if np.ndim(value) > 0 else value
+               for key, value in params.items()}
+
+
+def rank_sites(
+    chunks,
+    k: int = 100,
+    by=("npv", "irr", "lcoe"),
+    tie_breakers=None,
+    max_payback=None,
+    min_co2_tons=None,
+    constraints=None,
+    evaluate=evaluate_candidates
+):
+    """
+    Stream candidate chunks through the screening economics and keep the
+    best `k` sites for each ranking metric.
+
+    Parameters
+    ----------
+    chunks : iterable of dict
+        Per-chunk candidate parameters for `evaluate` (see
+        `candidate_chunks`). An optional `site_id` array labels candidates;
+        otherwise the stream position is used. Chunks that already hold the
+        metric columns are ranked as they are.
+    k : int
+        Sites kept per ranking
+    by : str or sequence of str
+        Ranking metrics, each with its own top-k
+    tie_breakers : dict, optional
+        Metric -> tie-breaking metrics; DEFAULT_TIE_BREAKERS otherwise
+    max_payback : float, optional
+        Drop candidates with a longer simple payback (years)
+    min_co2_tons : float, optional
+        Drop candidates avoiding less CO₂ per year (tonnes)
+    constraints : callable, optional
+        `constraints(metrics) -> bool mask` of further feasible candidates
+    evaluate : callable
+        Maps a chunk's parameters to metric columns
+
+    Returns
+    -------
+    dict
+        Ranking metric -> ranked list of dicts (site_id, rank and every
+        metric), best first
+    """
+    by = (by,) if isinstance(by, str) else tuple(by)
+    tie_breakers = DEFAULT_TIE_BREAKERS if tie_breakers is None else tie_breakers
+    rankers = {metric: StreamingTopK(k, metric, tie_breakers.get(metric, ())) for metric in by}
+    offset = 0
+
+    for chunk in chunks:
+        chunk = dict(chunk)
+        site_ids = chunk.pop("site_id", None)
+        if all(metric in chunk for metric in by):
+            metrics = {key: np.asarray(value) for key, value in chunk.items()}
+        else:
+            metrics = evaluate(**chunk)
+        n = len(next(iter(metrics.values())))
+
+        feasible = np.ones(n, dtype=bool)
+        if max_payback is not None:
+            feasible &= metrics["payback_years"] <= max_payback
+        if min_co2_tons is not None:
+            feasible &= metrics["annual_tons"] >= min_co2_tons
+        if constraints is not None:
+            feasible &= np.asarray(constraints(metrics), dtype=bool)
+
+        rows = np.flatnonzero(feasible)
+        kept = {key: value[rows] for key, value in metrics.items()}
+        positions = offset + rows
+
+        def record(i, kept=kept, rows=rows, positions=positions):
+            out = {"site_id": site_ids[rows[i]] if site_ids is not None else int(positions[i])}
+            out.update({key: float(value[i]) for key, value in kept.items()})
+            return out
+
+        for ranker in rankers.values():
+            ranker.push(kept, positions, record)
+        offset += n
+
+    return {metric: ranker.result() for metric, ranker in rankers.items()}
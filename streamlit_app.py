@@ -98,14 +98,25 @@
 #     st.line_chart(savings["annual_savings"])
 
 
+import time
+
+import numpy as np
 import streamlit as st
-import pandas as pd
 
 from models.savings_model_v1 import predict_savings
+from models.billing_model import BAND_TARIFFS, band_tariff, bill_savings, build_rate_vector
 from models.system_size_model_v1 import predict_system_size
 from models.carbon_model_v1 import predict_carbon_reduction
 from models.lcoe_model_v1 import predict_lcoe
 from models.performance_model import compute_performance_ratio
+from models.load_profile_model import ARCHETYPE_SHAPES, load_profile
+from models.generation_model import (
+    simulate_generation, hourly_irradiance_profile, ambient_temperature_profile
+)
+from utils.charts import line_chart_data
+from utils.forecast_cache import cached_call, default_cache
+from utils.reports import generate_report
+from utils.uploads import file_digest, submit_upload
 
 # ---------------- Page Config ----------------
 st.set_page_config(
@@ -122,12 +133,97 @@ Visualize economic, environmental, and system performance metrics in a modern da
 
 CAPEX_PER_KW = 400_000.0  # ₦/kW
 OPEX_PERCENT = 0.01       # 1% of CAPEX per year
+SYSTEM_LIFETIME = 25      # years
+PV_DEGRADATION = 0.007    # per year, as in predict_savings
+
+
+# ---------------- Forecast ----------------
+def run_forecast(daily_load, peak_demand, site_type, irradiance, tariff, discount_rate,
+                 carbon_factor, diesel_share, load_kwh=None):
+    """
+    Every dashboard model output for one set of inputs. Runs through
+    `utils.forecast_cache`, so identical inputs are served from disk across
+    reruns, sessions and restarts. `load_kwh` is an uploaded 8760-hour
+    profile that replaces the synthetic one. `tariff` is a rate (₦/kWh) or
+    a NERC band letter.
+    """
+    annual_load_kwh = daily_load * 365
+    df = load_profile(daily_load, peak_demand, site_type)
+    if load_kwh is not None:
+        df["load_kwh"] = load_kwh
+
+    # ---- System Sizing ----
+    system_size = predict_system_size(
+        daily_load_kwh=daily_load,
+        peak_demand_kw=peak_demand,
+        irradiance_kwh_m2_day=irradiance
+    )
+    max_reasonable_pv = annual_load_kwh / 1000 * 2.0
+    system_size["pv_kw"] = min(system_size["pv_kw"], max_reasonable_pv)
+
+    # ---- Hourly PV Generation ----
+    pv_hourly_kwh = simulate_generation(
+        system_size["pv_kw"],
+        hourly_irradiance_profile(irradiance),
+        ambient_temperature_profile()
+    )[0]
+    pv_generation_kwh = float(pv_hourly_kwh.sum(dtype="float64"))
+    load_hourly_kwh = df["load_kwh"].to_numpy(dtype=np.float64)
+    displaced_kwh = np.minimum(pv_hourly_kwh, load_hourly_kwh)
+
+    # ---- CAPEX & OPEX ----
+    capex = system_size["pv_kw"] * CAPEX_PER_KW
+    opex = capex * OPEX_PERCENT
+    capex = max(capex, 0)
+    opex = min(opex, capex * 0.05)
+
+    # ---- Savings Prediction ----
+    # Year-by-year bill savings from the hourly load and the grid import
+    # left once degraded PV output displaces what it can
+    rates = build_rate_vector(tariff)
+    degradation = (1 - PV_DEGRADATION) ** np.arange(SYSTEM_LIFETIME)
+    grid_import_kwh = np.maximum(
+        load_hourly_kwh - pv_hourly_kwh.astype(np.float64) * degradation[:, None], 0.0
+    )
+    gross_savings = bill_savings(load_hourly_kwh, grid_import_kwh[None], rates, SYSTEM_LIFETIME)
+    savings = predict_savings(
+        annual_load_kwh=annual_load_kwh,
+        tariff=float(rates.mean()),
+        capex=capex,
+        opex_annual=opex,
+        discount_rate=discount_rate,
+        system_lifetime=SYSTEM_LIFETIME,
+        gross_savings=gross_savings
+    )
+    carbon = predict_carbon_reduction(
+        df, carbon_factor, displaced_kwh=displaced_kwh, diesel_share=diesel_share
+    )
+    lcoe_value = predict_lcoe(
+        capex=capex, opex_annual=opex, irradiance=irradiance,
+        discount_rate=discount_rate, pv_kw=system_size["pv_kw"],
+        annual_energy_kwh=pv_generation_kwh
+    )
+    performance = compute_performance_ratio(
+        pv_size_kw=system_size["pv_kw"],
+        irradiance=irradiance,
+        daily_load=daily_load,
+        expected_kwh=pv_generation_kwh
+    )
+    return {
+        "system_size": system_size, "capex": capex, "opex": opex, "savings": savings,
+        "carbon": carbon, "lcoe": lcoe_value, "performance": performance,
+    }
 
 # ---------------- Sidebar Inputs ----------------
 with st.sidebar:
     with st.expander("📥 Input Parameters", expanded=True):
 
         st.markdown("**Energy Demand**")
+        uploaded = st.file_uploader(
+            "Load Profile (CSV/Excel, optional)", type=["csv", "xlsx", "xls"],
+            help="Metered readings with a timestamp column and a load/kWh column. "
+                 "When given, the cleaned hourly profile replaces the synthetic one."
+        )
         daily_load = st.number_input(
             "Daily Energy Consumption (kWh/day)",
             min_value=1.0, value=120.0,
@@ -138,6 +234,10 @@ with st.sidebar:
             min_value=0.1, value=25.0,
             help="Maximum expected instantaneous load in kW"
         )
+        site_type = st.selectbox(
+            "Site Type", options=sorted(ARCHETYPE_SHAPES), index=sorted(ARCHETYPE_SHAPES).index("residential"),
+            help="Load-shape archetype used to build the hourly profile"
+        )
 
         st.markdown("**Solar Resource**")
         irradiance = st.number_input(
@@ -147,10 +247,18 @@ with st.sidebar:
         )
 
         st.markdown("**Financial Parameters**")
-        tariff = st.number_input(
-            "Tariff Rate (₦/kWh)", min_value=0.0, value=120.0,
-            help="Cost of grid electricity per kWh"
+        tariff_band = st.selectbox(
+            "Tariff Band", options=["Custom"] + sorted(BAND_TARIFFS),
+            help="NERC service band; Custom bills at the rate below"
         )
+        if tariff_band == "Custom":
+            tariff = st.number_input(
+                "Tariff Rate (₦/kWh)", min_value=0.0, value=120.0,
+                help="Cost of grid electricity per kWh"
+            )
+        else:
+            tariff = band_tariff(tariff_band)
+            st.caption(f"Band {tariff_band} tariff: ₦{tariff:,.1f}/kWh")
         discount_rate = st.number_input(
             "Discount Rate (%)", min_value=0.0, max_value=30.0, value=8.0,
             help="Discount rate for financial calculations"
@@ -161,93 +269,61 @@ with st.sidebar:
             "Grid CO₂ Factor (kg/kWh)", min_value=0.1, value=0.55,
             help="Carbon intensity of grid electricity"
         )
+        diesel_share = st.slider(
+            "Diesel Backup Share (%)", min_value=0, max_value=100, value=0,
+            help="Share of demand otherwise met by diesel generators during grid outages"
+        )
 
         st.markdown("---")
         run_button = st.button("🚀 Run Forecast", type="primary")
 
-# ---------------- Run Models ----------------
+# A Run click survives the reruns that poll a background upload parse
 if run_button:
-    with st.spinner("Running ML-powered forecasting..."):
+    st.session_state["run_requested"] = True
+
+# ---------------- Uploaded Load Profile ----------------
+upload = None
+if uploaded is not None:
+    # Hash once per uploaded file rather than on every rerun
+    upload_key = (uploaded.name, uploaded.size, getattr(uploaded, "file_id", None))
+    if st.session_state.get("upload_key") != upload_key:
+        st.session_state["upload_key"] = upload_key
+        st.session_state["upload_digest"] = file_digest(uploaded.getbuffer())
+    job = submit_upload(uploaded.getbuffer(), uploaded.name, digest=st.session_state["upload_digest"])
+
+    if not job.done:
+        st.sidebar.progress(job.progress, text=f"{job.message} ({uploaded.name})")
+        time.sleep(0.5)
+        st.rerun()
+    elif job.error is not None:
+        st.sidebar.error(f"Could not read {uploaded.name}: {job.error}")
+    else:
+        upload = job.result
+        st.sidebar.success(
+            f"{upload.filename}: {upload.rows_valid:,} of {upload.rows_read:,} readings used, "
+            f"{upload.hourly.size:,} hours, {upload.daily_kwh:,.1f} kWh/day, peak {upload.peak_kw:,.1f} kW"
+        )
 
-        annual_load_kwh = daily_load * 365
-        df = pd.DataFrame({"load_kwh": [annual_load_kwh]})
+# ---------------- Run Models ----------------
+if st.session_state.pop("run_requested", False):
+    with st.spinner("Running ML-powered forecasting..."):
 
-        # ---- System Sizing ----
-        system_size = predict_system_size(
-            daily_load_kwh=daily_load,
-            peak_demand_kw=peak_demand,
-            irradiance_kwh_m2_day=irradiance
-        )
-        max_reasonable_pv = annual_load_kwh / 1000 * 2.0
-        system_size["pv_kw"] = min(system_size["pv_kw"], max_reasonable_pv)
-
-        # ---- CAPEX & OPEX ----
-        capex = system_size["pv_kw"] * CAPEX_PER_KW
-        opex = capex * OPEX_PERCENT
-        capex = max(capex, 0)
-        opex = min(opex, capex * 0.05)
-
-        # ---- Savings Prediction ----
-        savings = predict_savings(
-            annual_load_kwh=annual_load_kwh,
-            tariff=tariff,
-            capex=capex,
-            opex_annual=opex,
-            discount_rate=discount_rate
-        )
-        carbon = predict_carbon_reduction(df, carbon_factor)
-        lcoe_value = predict_lcoe(
-            capex=capex, opex_annual=opex, irradiance=irradiance,
-            discount_rate=discount_rate, pv_kw=system_size["pv_kw"]
-        )
-        performance = compute_performance_ratio(
-            pv_size_kw=system_size["pv_kw"],
-            irradiance=irradiance,
-            daily_load=daily_load
+        if upload is not None:
+            daily_load, peak_demand = upload.daily_kwh, upload.peak_kw
+        forecast = cached_call(
+            run_forecast, daily_load, peak_demand, site_type, irradiance, tariff, discount_rate,
+            carbon_factor, diesel_share / 100.0, upload.typical if upload is not None else None
         )
+        system_size, capex, opex = forecast["system_size"], forecast["capex"], forecast["opex"]
+        savings, carbon = forecast["savings"], forecast["carbon"]
+        lcoe_value, performance = forecast["lcoe"], forecast["performance"]
 
     st.success("✅ Forecast completed successfully!")
-
-
-    # ---------------- Generate Executive Summary ----------------
-    def generate_report(system_size, capex, opex, savings, carbon, lcoe, performance, tariff):
-        report = f"Based on the current inputs, the recommended PV system size is {system_size['pv_kw']:.1f} kW "
-        report += f"with a battery storage of {system_size['battery_kwh']:.1f} kWh. "
-
-        # Performance Ratio
-        if performance < 70:
-            report += f"The system's performance ratio is {performance:.1f}%, which is below optimal. "
-            report += "Improvements in panel orientation, cleaning, or higher-efficiency panels are advised. "
-        else:
-            report += f"The system performs efficiently with a performance ratio of {performance:.1f}%. "
-
-        # Economic insights
-        payback = savings["payback_years"]
-        report += f"The initial investment cost is ₦{capex:,.0f} with annual OPEX of ₦{opex:,.0f}. "
-        if payback > 15:
-            report += f"However, the payback period is {payback:.1f} years, which is relatively long; consider reducing CAPEX or exploring incentives. "
-        else:
-            report += f"The payback period of {payback:.1f} years indicates a reasonable return on investment. "
-
-        if lcoe > tariff:
-            report += f"The levelized cost of electricity (LCOE) is ₦{lcoe:,.2f}/kWh, which exceeds the current grid tariff of ₦{tariff:,.2f}/kWh. "
-            report += "Electricity from this PV system may be more expensive than grid electricity. "
-        else:
-            report += f"The LCOE is ₦{lcoe:,.2f}/kWh, below the grid tariff, making this system economically favorable. "
-
-        # Environmental impact
-        report += f"Environmentally, the system avoids {carbon['annual_tons']:.2f} tons of CO₂ annually and "
-        report += f"{carbon['lifetime_tons']:.2f} tons over its lifetime, contributing positively to sustainability. "
-
-        # Savings vs CAPEX
-        total_savings = savings["total_savings"]
-        if total_savings < capex:
-            report += f"However, the total projected savings over 25 years is ₦{total_savings:,.0f}, which is below the initial CAPEX. "
-            report += "System optimization could improve economic outcomes. "
-        else:
-            report += f"The total projected savings over 25 years is ₦{total_savings:,.0f}, exceeding the initial investment, highlighting long-term financial benefits. "
-
-        return report
+    cache_stats = default_cache().stats()
+    st.sidebar.caption(
+        f"Forecast cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+        f"({cache_stats['hit_rate']:.0%} hit rate), {cache_stats['entries']:,} entries"
+    )
 
 
     # ---------------- KPI Cards ----------------
@@ -283,7 +359,13 @@ if run_button:
 
     st.info(report_text)
 
-    # st.subheader("📈 Annual Savings Trend")
-    # st.line_chart(savings["annual_savings"])
+    st.subheader("📈 Annual Savings Trend")
+    st.line_chart(
+        line_chart_data(
+            savings["annual_savings"], np.arange(1, len(savings["annual_savings"]) + 1),
+            x_label="Year", y_label="Cumulative Savings (₦)"
+        ),
+        x="Year", y="Cumulative Savings (₦)"
+    )
 
     # st.info(f"*CAPEX is fixed at ₦{CAPEX_PER_KW:,.0f}/kW. OPEX is {OPEX_PERCENT*100:.1f}% of CAPEX per year.*")
@@ -0,0 +1,179 @@
+"""
+Multi-resolution aggregate pyramid for load profiles.
+
+Readings are reduced once into 15-minute, hourly, daily, monthly and annual
+levels holding sum, mean, max, min, count and missing count per site and
+period. Each coarser level is reduced from the one below it rather than
+from the raw series, and every level is sorted by (site, period) with site
+offsets, so totals, peaks and daily figures are direct lookups.
+"""
+import numpy as np
+
+LEVELS = ["15min", "hour", "day", "month", "year"]
+_LEVEL_SECONDS = {"15min": 900, "hour": 3600, "day": 86400}
+
+
+def _period_start(seconds, level):
+    """Start (epoch seconds) of the period containing each timestamp."""
+    if level in _LEVEL_SECONDS:
+        step = _LEVEL_SECONDS[level]
+        return seconds // step * step
+    unit = "M" if level == "month" else "Y"
+    return seconds.astype("datetime64[s]").astype(f"datetime64[{unit}]").astype("datetime64[s]").astype(np.int64)
+
+
+def _period_end(start, level):
+    if level in _LEVEL_SECONDS:
+        return start + _LEVEL_SECONDS[level]
+    unit = "M" if level == "month" else "Y"
+    nxt = start.astype("datetime64[s]").astype(f"datetime64[{unit}]") + 1
+    return nxt.astype("datetime64[s]").astype(np.int64)
+
+
+def _reduce(site, period, values_sum, values_max, values_min, count):
+    """Group consecutive equal (site, period) rows, which are already sorted."""
+    change = np.empty(site.size, dtype=bool)
+    change[:1] = True
+    change[1:] = (site[1:] != site[:-1]) | (period[1:] != period[:-1])
+    starts = np.flatnonzero(change)
+    return (
+        site[starts],
+        period[starts],
+        np.add.reduceat(values_sum, starts),
+        np.maximum.reduceat(values_max, starts),
+        np.minimum.reduceat(values_min, starts),
+        np.add.reduceat(count, starts),
+    )
+
+
+class LoadPyramid:
+    """
+    Precomputed aggregates of one or more load series.
+
+    Use `build_pyramid` to construct. `levels[name]` is a dict of equal-length
+    arrays: site (row into `site_ids`), period (datetime64[s] start), sum,
+    mean, max, min, count and missing.
+    """
+
+    def __init__(self, site_ids, levels, step_seconds):
+        self.site_ids = list(site_ids)
+        self.levels = levels
+        self.step_seconds = step_seconds
+        self._site_index = {s: i for i, s in enumerate(self.site_ids)}
+        self._offsets = {
+            name: np.searchsorted(level["site"], np.arange(len(self.site_ids) + 1))
+            for name, level in levels.items()
+        }
+
+    def level(self, name, site=None):
+        """Aggregates at `name`, optionally for a single site (array views)."""
+        level = self.levels[name]
+        if site is None:
+            return level
+        i = self._site_index[site]
+        lo, hi = self._offsets[name][i], self._offsets[name][i + 1]
+        return {k: v[lo:hi] for k, v in level.items()}
+
+    def value(self, name, site, timestamp, stat: str = "sum"):
+        """Single aggregate for the period containing `timestamp`."""
+        rows = self.level(name, site)
+        seconds = np.datetime64(timestamp, "s").astype(np.int64)
+        start = _period_start(np.asarray([seconds]), name)[0]
+        pos = np.searchsorted(rows["period"].astype(np.int64), start)
+        if pos < rows["period"].size and rows["period"][pos].astype(np.int64) == start:
+            return rows[stat][pos]
+        return np.nan
+
+    def total(self, site=None):
+        """Total energy over all readings, per site or for one site."""
+        return self._per_site("year", "sum", np.add, site)
+
+    def peak(self, site=None):
+        """Maximum reading, per site or for one site."""
+        return self._per_site("year", "max", np.maximum, site)
+
+    def annual(self, site=None):
+        return self.level("year", site)
+
+    def daily(self, site=None):
+        return self.level("day", site)
+
+    def _per_site(self, name, stat, ufunc, site):
+        level = self.levels[name]
+        offsets = self._offsets[name]
+        present = offsets[:-1] < offsets[1:]
+        out = np.full(len(self.site_ids), np.nan)
+        out[present] = ufunc.reduceat(level[stat], offsets[:-1][present])
+        return out if site is None else out[self._site_index[site]]
+
+
+def build_pyramid(timestamps, values, site_ids=None, step_seconds: int = None):
+    """
+    Build a `LoadPyramid` from validated readings.
+
+    Parameters
+    ----------
+    timestamps : array-like of datetime64
+        Reading timestamps (duplicates should already be removed)
+    values : array-like of float
+        Energy per reading (kWh)
+    site_ids : array-like, optional
+        Site of each reading; a single unnamed site when omitted
+    step_seconds : int, optional
+        Native reading interval used for missing counts; inferred as the
+        median spacing when omitted
+
+    Returns
+    -------
+    LoadPyramid
+        Levels finer than the native interval are omitted.
+    """
+    seconds = np.asarray(timestamps, dtype="datetime64[s]").astype(np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    if site_ids is None:
+        names, site = np.array(["site"]), np.zeros(seconds.size, dtype=np.int64)
+    else:
+        names, site = np.unique(np.asarray(site_ids), return_inverse=True)
+
+    order = np.lexsort((seconds, site))
+    seconds, values, site = seconds[order], values[order], site[order]
+
+    if step_seconds is None:
+        same_site = site[1:] == site[:-1]
+        steps = np.diff(seconds)[same_site]
+        step_seconds = int(np.median(steps)) if steps.size else 3600
+    step_seconds = max(int(step_seconds), 1)
+
+    # Span of each site's readings, for missing counts in partial periods
+    first = np.full(len(names), np.iinfo(np.int64).max)
+    last = np.full(len(names), np.iinfo(np.int64).min)
+    np.minimum.at(first, site, seconds)
+    np.maximum.at(last, site, seconds)
+    last = last + step_seconds
+
+    levels = {}
+    current = (site, seconds, values, values, values, np.ones(seconds.size, dtype=np.int64))
+    for name in LEVELS:
+        if name in _LEVEL_SECONDS and _LEVEL_SECONDS[name] < step_seconds:
+            continue
+        lvl_site, ts, s, mx, mn, cnt = current
+        reduced = _reduce(lvl_site, _period_start(ts, name), s, mx, mn, cnt)
+        r_site, start, r_sum, r_max, r_min, r_count = reduced
+
+        end = _period_end(start, name)
+        span = np.minimum(end, last[r_site]) - np.maximum(start, first[r_site])
+        expected = np.maximum(np.ceil(span / step_seconds), r_count).astype(np.int64)
+
+        levels[name] = {
+            "site": r_site,
+            "period": start.astype("datetime64[s]"),
+            "sum": r_sum,
+            "mean": r_sum / r_count,
+            "max": r_max,
+            "min": r_min,
+            "count": r_count,
+            "missing": expected - r_count,
+        }
+        current = reduced
+
+    return LoadPyramid(names.tolist(), levels, step_seconds)
@@ -0,0 +1,237 @@
+"""
+Plot-data preparation for long series.
+
+Hourly profiles, dispatch traces and multi-year trajectories are reduced to
+roughly one point per pixel before they reach the browser, with
+shape-preserving downsampling:
+
+- min-max keeps the lowest and highest sample of every bucket, so peaks
+  and troughs survive at any zoom level;
+- LTTB (Largest-Triangle-Three-Buckets) keeps, per bucket, the sample that
+  forms the largest triangle with the previous pick and the next bucket's
+  mean, which follows the visual shape of smooth series.
+
+`ChartCache` holds a min-max pyramid per registered series (bucket sizes
+2, 4, 8, ...) so a view of any window is cut from the coarsest level that
+still has enough points, then downsampled to the requested width. Views
+are cached by (series, window, width, method); each one costs O(width)
+however long the series is.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+METHODS = ("lttb", "minmax")
+
+
+def _numeric_x(x):
+    """Float x axis for area computations (datetime64 as epoch units)."""
+    x = np.asarray(x)
+    if x.dtype.kind in "mM":
+        return x.astype(np.int64).astype(np.float64)
+    return x.astype(np.float64, copy=False)
+
+
+def _merge_pairs(lo_idx, hi_idx):
+    """Per-bucket (min, max) indices as one increasing array without repeats."""
+    picks = np.sort(np.stack([lo_idx, hi_idx], axis=1), axis=1).ravel()
+    keep = np.empty(picks.shape[0], dtype=bool)
+    keep[:1] = True
+    keep[1:] = picks[1:] != picks[:-1]
+    return picks[keep]
+
+
+def minmax_indices(y, n_buckets: int):
+    """
+    Indices of the minimum and maximum of each of `n_buckets` equal buckets.
+
+    Parameters
+    ----------
+    y : array-like
+        Series, shape (n,)
+    n_buckets : int
+        Number of buckets; up to 2 points are kept per bucket
+
+    Returns
+    -------
+    np.ndarray
+        Sorted unique indices into `y`
+    """
+    y = np.asarray(y)
+    n = y.shape[0]
+    if n <= 2 * n_buckets:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    n_buckets = -(-n // size)
+    # Pad with the last value so the series reshapes into whole buckets;
+    # padded positions clip back onto index n - 1
+    blocks = np.pad(y, (0, n_buckets * size - n), mode="edge").reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    return _merge_pairs(np.minimum(blocks.argmin(axis=1) + offsets, n - 1),
+                        np.minimum(blocks.argmax(axis=1) + offsets, n - 1))
+
+
+def lttb_indices(x, y, n_out: int):
+    """
+    Largest-Triangle-Three-Buckets selection.
+
+    The first and last samples are always kept; the rest are split into
+    `n_out - 2` buckets. Bucket means come from one `reduceat` pass and each
+    bucket's pick is a vectorized argmax, evaluated for all series at once.
+
+    Parameters
+    ----------
+    x : array-like
+        Sample positions, shape (n,), increasing
+    y : array-like
+        One series (n,) or several sharing `x` (n_series, n)
+    n_out : int
+        Points to keep per series
+
+    Returns
+    -------
+    np.ndarray
+        Indices, shape (n_out,) or (n_series, n_out)
+    """
+    x = _numeric_x(x)
+    y = np.asarray(y, dtype=np.float64)
+    single = y.ndim == 1
+    y = np.atleast_2d(y)
+    n_series, n = y.shape
+    if n_out >= n or n_out < 3:
+        idx = np.broadcast_to(np.arange(n), (n_series, n)).copy()
+        return idx[0] if single else idx
+
+    n_buckets = n_out - 2
+    edges = (np.arange(n_buckets + 1) * (n - 2) / n_buckets).astype(np.int64) + 1
+    counts = np.diff(edges)
+    mean_x = np.append(np.add.reduceat(x[1:-1], edges[:-1] - 1) / counts, x[-1])
+    mean_y = np.concatenate([np.add.reduceat(y[:, 1:-1], edges[:-1] - 1, axis=1) / counts, y[:, -1:]], axis=1)
+
+    out = np.empty((n_series, n_out), dtype=np.int64)
+    out[:, 0], out[:, -1] = 0, n - 1
+    rows = np.arange(n_series)
+    a = np.zeros(n_series, dtype=np.int64)
+    for b in range(n_buckets):
+        lo, hi = edges[b], edges[b + 1]
+        ax, ay = x[a][:, None], y[rows, a][:, None]
+        cx, cy = mean_x[b + 1], mean_y[:, b + 1][:, None]
+        area = np.abs((ax - cx) * (y[:, lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        a = lo + area.argmax(axis=1)
+        out[:, b + 1] = a
+    return out[0] if single else out
+
+
+def downsample(y, x=None, width: int = 1000, method: str = "lttb"):
+    """
+    Reduce a series to about `width` points for plotting.
+
+    Returns
+    -------
+    (np.ndarray, np.ndarray)
+        Selected x and y values (x defaults to sample positions)
+    """
+    y = np.asarray(y)
+    x = np.arange(y.shape[0]) if x is None else np.asarray(x)
+    if method == "lttb":
+        idx = lttb_indices(x, y, width)
+    elif method == "minmax":
+        idx = minmax_indices(y, max(width // 2, 1))
+    else:
+        raise ValueError(f"Unknown method {method!r}; choose from {METHODS}")
+    return x[idx], y[idx]
+
+
+class _Pyramid:
+    """Min-max candidate indices of one series at bucket sizes 2, 4, 8, ..."""
+
+    def __init__(self, x, y, min_points: int = 256):
+        self.x, self.y = x, y
+        n = y.shape[0]
+        self.levels = [np.arange(n)]
+        lo_idx, hi_idx = np.arange(n), np.arange(n)
+        while lo_idx.shape[0] > min_points:
+            if lo_idx.shape[0] % 2:
+                lo_idx, hi_idx = np.append(lo_idx, lo_idx[-1]), np.append(hi_idx, hi_idx[-1])
+            lo_pair, hi_pair = lo_idx.reshape(-1, 2), hi_idx.reshape(-1, 2)
+            take_lo = y[lo_pair[:, 1]] < y[lo_pair[:, 0]]
+            take_hi = y[hi_pair[:, 1]] > y[hi_pair[:, 0]]
+            lo_idx = np.where(take_lo, lo_pair[:, 1], lo_pair[:, 0])
+            hi_idx = np.where(take_hi, hi_pair[:, 1], hi_pair[:, 0])
+            self.levels.append(_merge_pairs(lo_idx, hi_idx))
+
+    def candidates(self, lo: int, hi: int, width: int):
+        """Indices in [lo, hi) from the coarsest level with >= 2 * width of them."""
+        # Each level is a subset of the one below it, so the first level
+        # (coarsest first) with enough indices is the one to use
+        for level in reversed(self.levels[1:]):
+            a, b = np.searchsorted(level, [lo, hi])
+            if b - a >= 2 * width:
+                best = level[a:b]
+                break
+        else:
+            best = self.levels[0][lo:hi]
+        # Keep the window's own end points so views line up with their bounds
+        if best.shape[0] and (best[0] != lo or best[-1] != hi - 1):
+            best = np.unique(np.concatenate([[lo], best, [hi - 1]]))
+        return best
+
+
+class ChartCache:
+    """
+    Zoom-aware downsampled views of registered series.
+
+        charts = ChartCache()
+        charts.register("site-7/load", load_kwh, timestamps)
+        x, y = charts.view("site-7/load", start, end, width=800)
+
+    Parameters
+    ----------
+    max_entries : int
+        Views kept (least recently used are evicted first)
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._series = {}
+        self._views = OrderedDict()
+
+    def register(self, key, y, x=None):
+        """Add or replace a series; its cached views are dropped."""
+        y = np.asarray(y)
+        x = np.arange(y.shape[0]) if x is None else np.asarray(x)
+        if x.shape != y.shape or y.ndim != 1:
+            raise ValueError(f"x and y must be 1-D and equal length, got {x.shape} and {y.shape}")
+        self._series[key] = _Pyramid(x, y)
+        for view_key in [k for k in self._views if k[0] == key]:
+            del self._views[view_key]
+
+    def __contains__(self, key):
+        return key in self._series
+
+    def view(self, key, start=None, end=None, width: int = 1000, method: str = "lttb"):
+        """
+        Downsampled (x, y) of series `key` between x values `start` and
+        `end` (inclusive; whole series when omitted).
+        """
+        view_key = (key, start, end, width, method)
+        if view_key in self._views:
+            self._views.move_to_end(view_key)
+            return self._views[view_key]
+
+        pyramid = self._series[key]
+        lo = 0 if start is None else int(np.searchsorted(pyramid.x, start, side="left"))
+        hi = pyramid.x.shape[0] if end is None else int(np.searchsorted(pyramid.x, end, side="right"))
+        idx = pyramid.candidates(lo, hi, width)
+        x, y = downsample(pyramid.y[idx], pyramid.x[idx], width, method)
+
+        self._views[view_key] = (x, y)
+        if len(self._views) > self.max_entries:
+            self._views.popitem(last=False)
+        return x, y
+
+
+def line_chart_data(y, x=None, width: int = 1000, method: str = "lttb", x_label: str = "x", y_label: str = "y"):
+    """Downsampled columns for `st.line_chart(data, x=x_label, y=y_label)`."""
+    x, y = downsample(y, x, width, method)
+    return {x_label: x, y_label: y}
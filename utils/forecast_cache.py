@@ -0,0 +1,331 @@
+"""
+Disk-backed cache of model forecasts shared by sessions, CLI runs and workers.
+
+Entries live in one SQLite database in WAL mode, so any number of processes
+can read while one writes, and writers queue on a busy timeout instead of
+failing. Keys are SHA-256 digests of a canonical encoding of the call:
+
+    namespace (function) | model version | positional and keyword inputs
+
+Floats are encoded by value (so 8 and 8.0 match), NumPy arrays and
+DataFrames by dtype, shape and bytes, and mappings with sorted keys. The
+model version hashes the source of `models/*.py` and the size and mtime of
+`pv_model_outputs/*.pkl`, so editing model code or retraining a pipeline
+invalidates every older entry; those are purged the first time a process
+opens the cache.
+
+Eviction is LRU under both an entry cap and a byte cap. Hit and miss counts
+are kept per process in `ForecastCache.stats()`.
+"""
+import hashlib
+import os
+import pickle
+import sqlite3
+import struct
+import threading
+import time
+from collections.abc import Mapping
+from pathlib import Path
+
+import numpy as np
+
+_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_PATH = _ROOT / "data" / "forecast_cache.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    namespace TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE INDEX IF NOT EXISTS entries_version ON entries (version);
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO totals VALUES (0, 0, 0);
+"""
+
+_VERSIONS = {}
+_SOURCES = {}
+
+
+def model_version(root=_ROOT) -> str:
+    """
+    Fingerprint of the deterministic model code and trained artifacts.
+
+    Computed once per process and root.
+    """
+    root = Path(root)
+    if root in _VERSIONS:
+        return _VERSIONS[root]
+    h = hashlib.sha256()
+    for path in sorted((root / "models").glob("*.py")):
+        h.update(path.name.encode())
+        h.update(path.read_bytes())
+    for path in sorted((root / "pv_model_outputs").glob("*.pkl")):
+        st = path.stat()
+        h.update(f"{path.name}:{st.st_size}:{st.st_mtime_ns}".encode())
+    _VERSIONS[root] = h.hexdigest()[:16]
+    return _VERSIONS[root]
+
+
+def source_version(func) -> str:
+    """Fingerprint of the file defining `func`, rehashed when it changes."""
+    code = getattr(func, "__code__", None)
+    path = getattr(code, "co_filename", None)
+    if not path or not os.path.exists(path):
+        return ""
+    st = os.stat(path)
+    stamp = (st.st_size, st.st_mtime_ns)
+    cached = _SOURCES.get(path)
+    if cached is None or cached[0] != stamp:
+        with open(path, "rb") as fh:
+            cached = (stamp, hashlib.sha256(fh.read()).hexdigest()[:16])
+        _SOURCES[path] = cached
+    return cached[1]
+
+
+def _encode(value, h):
+    """Feed a canonical, type-tagged encoding of `value` into hash `h`."""
+    if value is None or isinstance(value, (bool, np.bool_)):
+        h.update(b"N" if value is None else b"T" if value else b"F")
+    elif isinstance(value, (int, float, np.integer, np.floating)):
+        # By value, so 8, 8.0 and np.float32(8) share an entry
+        h.update(b"f" + struct.pack("<d", float(value)))
+    elif isinstance(value, str):
+        data = value.encode()
+        h.update(b"s" + struct.pack("<q", len(data)) + data)
+    elif isinstance(value, bytes):
+        h.update(b"b" + struct.pack("<q", len(value)) + value)
+    elif isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise TypeError("object arrays have no canonical encoding")
+        array = np.ascontiguousarray(value)
+        h.update(b"a" + array.dtype.str.encode() + struct.pack(f"<{array.ndim + 1}q", array.ndim, *array.shape))
+        h.update(memoryview(array).cast("B"))
+    elif isinstance(value, Mapping):
+        h.update(b"m" + struct.pack("<q", len(value)))
+        for key in sorted(value, key=repr):
+            _encode(key, h)
+            _encode(value[key], h)
+    elif isinstance(value, (list, tuple)):
+        h.update(b"l" + struct.pack("<q", len(value)))
+        for item in value:
+            _encode(item, h)
+    elif hasattr(value, "columns") and hasattr(value, "to_numpy"):
+        # DataFrame: column names plus each column's values
+        h.update(b"d" + struct.pack("<q", len(value.columns)))
+        for name in value.columns:
+            _encode(str(name), h)
+            column = value[name].to_numpy()
+            if column.dtype.hasobject:
+                column = column.astype(str)
+            elif column.dtype.kind in "mM":
+                column = column.astype(np.int64)
+            _encode(column, h)
+    else:
+        raise TypeError(f"cannot build a cache key from {type(value).__name__}")
+
+
+def cache_key(namespace: str, args=(), kwargs=None, version: str = None) -> str:
+    """Canonical SHA-256 key of a call; raises TypeError for unhashable inputs."""
+    h = hashlib.sha256()
+    _encode(namespace, h)
+    _encode(version or model_version(), h)
+    _encode(list(args), h)
+    _encode(dict(kwargs or {}), h)
+    return h.hexdigest()
+
+
+class ForecastCache:
+    """
+    LRU forecast cache in a SQLite database.
+
+    Parameters
+    ----------
+    path : str or Path
+        Database file, data/forecast_cache.sqlite by default
+    max_entries : int
+        Entry cap
+    max_bytes : int
+        Cap on the total size of stored values
+    timeout : float
+        Seconds a writer waits for another process's lock
+    """
+
+    def __init__(self, path=DEFAULT_PATH, max_entries: int = 100_000, max_bytes: int = 512 << 20,
+                 timeout: float = 30.0):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.version = model_version()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._local = threading.local()
+        self._purged = False
+
+    # ---- connections (one per thread and process) ----
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        self._local.conn, self._local.pid = conn, os.getpid()
+        if not self._purged:
+            self._purge_stale(conn)
+        return conn
+
+    def _purge_stale(self, conn):
+        """Drop entries written by other model versions."""
+        with _transaction(conn):
+            removed = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries WHERE version != ?", (self.version,)
+            ).fetchone()
+            if removed[0]:
+                conn.execute("DELETE FROM entries WHERE version != ?", (self.version,))
+                conn.execute("UPDATE totals SET entries = entries - ?, bytes = bytes - ?", removed)
+        self._purged = True
+
+    # ---- public API ----
+    def get(self, key, default=None):
+        try:
+            conn = self._connect()
+            row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+            conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+            value = pickle.loads(row[0])
+        except (sqlite3.Error, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            self.errors += 1
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def put(self, key, value, namespace: str = ""):
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            self.errors += 1
+            return
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            conn = self._connect()
+            with _transaction(conn):
+                old = conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, self.version, namespace, blob, len(blob), now, now),
+                )
+                conn.execute(
+                    "UPDATE totals SET entries = entries + ?, bytes = bytes + ?",
+                    (0 if old else 1, len(blob) - (old[0] if old else 0)),
+                )
+                self._evict(conn)
+        except sqlite3.Error:
+            self.errors += 1
+
+    def _evict(self, conn):
+        """Delete least recently used entries until both caps hold."""
+        entries, total = conn.execute("SELECT entries, bytes FROM totals").fetchone()
+        if entries <= self.max_entries and total <= self.max_bytes:
+            return
+        # Walk the LRU order once, summing sizes until enough is freed
+        over_entries = max(entries - self.max_entries, 0)
+        over_bytes = max(total - self.max_bytes, 0)
+        victims, freed = [], 0
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            if len(victims) >= over_entries and freed >= over_bytes:
+                break
+            victims.append((key,))
+            freed += size
+        conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+        conn.execute("UPDATE totals SET entries = entries - ?, bytes = bytes - ?", (len(victims), freed))
+
+    def call(self, func, *args, **kwargs):
+        """
+        `func(*args, **kwargs)` through the cache.
+
+        The source file defining `func` is part of the key, so callers
+        outside `models/` (e.g. the dashboard) are invalidated when they
+        change too. Calls whose inputs have no canonical encoding run
+        uncached.
+        """
+        namespace = f"{func.__module__}.{func.__qualname__}"
+        try:
+            key = cache_key(namespace, args, kwargs, f"{self.version}:{source_version(func)}")
+        except TypeError:
+            return func(*args, **kwargs)
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = func(*args, **kwargs)
+            self.put(key, value, namespace)
+        return value
+
+    def clear(self):
+        conn = self._connect()
+        with _transaction(conn):
+            conn.execute("DELETE FROM entries")
+            conn.execute("UPDATE totals SET entries = 0, bytes = 0")
+
+    def stats(self) -> dict:
+        """Per-process hit/miss counts and rates plus the database totals."""
+        entries, total = self._connect().execute("SELECT entries, bytes FROM totals").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "miss_rate": self.misses / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": total,
+            "version": self.version,
+        }
+
+
+class _transaction:
+    """BEGIN IMMEDIATE ... COMMIT, rolled back on error."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, *exc):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+_DEFAULT = None
+
+
+def default_cache() -> ForecastCache:
+    """Process-wide cache at DEFAULT_PATH (FORECAST_CACHE_PATH overrides)."""
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = ForecastCache(os.environ.get("FORECAST_CACHE_PATH", DEFAULT_PATH))
+    return _DEFAULT
+
+
+def cached_call(func, *args, **kwargs):
+    """`func(*args, **kwargs)` through the default cache."""
+    return default_cache().call(func, *args, **kwargs)
@@ -0,0 +1,464 @@
+"""
+Asyncio ingestion of inverter and meter telemetry from local sources.
+
+Readings arrive as text lines, either CSV `timestamp,site_id,channel,value`
+or JSON objects with the same keys. Sources are async generators that yield
+chunks of lines; `IngestionPipeline` batches them, parses and validates each
+batch, normalizes it to hourly means the same way `clean_load_profile` does
+(sorted, first duplicate kept, negatives dropped, short gaps interpolated),
+and fans the hourly frames out to consumers through bounded queues. A full
+queue suspends the stages upstream of it, down to the socket or file reader.
+"""
+import asyncio
+import io
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ["timestamp", "site_id", "channel", "value"]
+
+
+# ----------------------------------------------------
+# Sources
+# ----------------------------------------------------
+async def replay_lines(lines, chunk_size: int = 1000, rate: float = None):
+    """
+    Replay recorded readings, the local stand-in for live sources.
+
+    Parameters
+    ----------
+    lines : iterable of str, or path to a file of readings
+    chunk_size : int
+        Lines yielded per chunk
+    rate : float, optional
+        Target lines per second; unthrottled when None
+    """
+    if isinstance(lines, (str, Path)):
+        with open(lines, encoding="utf-8") as fh:
+            lines = fh.read().splitlines()
+    lines = list(lines)
+    for start in range(0, len(lines), chunk_size):
+        chunk = lines[start:start + chunk_size]
+        yield chunk
+        await asyncio.sleep(len(chunk) / rate if rate else 0)
+
+
+async def tail_file(path, poll_interval: float = 0.5, from_start: bool = False,
+                    stop_at_eof: bool = False):
+    """Follow a growing file, yielding newly appended complete lines."""
+    with open(path, encoding="utf-8") as fh:
+        if not from_start:
+            fh.seek(0, io.SEEK_END)
+        partial = ""
+        while True:
+            data = fh.read(1 << 20)
+            if data:
+                data = partial + data
+                lines = data.split("\n")
+                partial = lines.pop()
+                if lines:
+                    yield lines
+                continue
+            if stop_at_eof:
+                if partial:
+                    yield [partial]
+                return
+            await asyncio.sleep(poll_interval)
+
+
+async def watch_directory(path, pattern: str = "*.csv", poll_interval: float = 1.0,
+                          processed_dir=None, chunk_size: int = 10000,
+                          stop_when_empty: bool = False):
+    """
+    Ingest files dropped into a directory.
+
+    Each new file is read in chunks and then moved to `processed_dir` when
+    one is given; otherwise its name is remembered so it is read only once.
+    """
+    path = Path(path)
+    seen = set()
+    if processed_dir is not None:
+        processed_dir = Path(processed_dir)
+        processed_dir.mkdir(parents=True, exist_ok=True)
+
+    while True:
+        files = sorted(p for p in path.glob(pattern) if p.is_file() and p.name not in seen)
+        for file in files:
+            with open(file, encoding="utf-8") as fh:
+                chunk = []
+                for line in fh:
+                    chunk.append(line.rstrip("\n"))
+                    if len(chunk) >= chunk_size:
+                        yield chunk
+                        chunk = []
+                if chunk:
+                    yield chunk
+            if processed_dir is not None:
+                file.replace(processed_dir / file.name)
+            else:
+                seen.add(file.name)
+        if not files and stop_when_empty:
+            return
+        await asyncio.sleep(poll_interval)
+
+
+async def tcp_lines(host: str = "127.0.0.1", port: int = 0, max_chunks: int = 64,
+                    on_listening=None):
+    """
+    Accept newline-delimited readings on a local TCP port.
+
+    Connections feed a bounded queue; when it is full the handlers stop
+    reading, so TCP flow control pushes back on the senders.
+    `on_listening(port)` is called once the server is bound.
+    """
+    chunks = asyncio.Queue(maxsize=max_chunks)
+
+    async def handle(reader, writer):
+        partial = b""
+        while True:
+            data = await reader.read(1 << 16)
+            if not data:
+                break
+            lines = (partial + data).split(b"\n")
+            partial = lines.pop()
+            if lines:
+                await chunks.put([ln.decode("utf-8", "replace") for ln in lines])
+        if partial:
+            await chunks.put([partial.decode("utf-8", "replace")])
+        writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    if on_listening is not None:
+        on_listening(server.sockets[0].getsockname()[1])
+    async with server:
+        while True:
+            yield await chunks.get()
+
+
+class _UdpLines(asyncio.DatagramProtocol):
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.dropped = 0
+
+    def datagram_received(self, data, addr):
+        try:
+            self.chunks.put_nowait(data.decode("utf-8", "replace").splitlines())
+        except asyncio.QueueFull:
+            # UDP has no flow control; count what we shed
+            self.dropped += 1
+
+
+async def udp_lines(host: str = "127.0.0.1", port: int = 0, max_chunks: int = 1024,
+                    on_listening=None):
+    """Receive readings as UDP datagrams (one or more lines each)."""
+    chunks = asyncio.Queue(maxsize=max_chunks)
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: _UdpLines(chunks), local_addr=(host, port))
+    if on_listening is not None:
+        on_listening(transport.get_extra_info("sockname")[1])
+    try:
+        while True:
+            yield await chunks.get()
+    finally:
+        transport.close()
+
+
+# ----------------------------------------------------
+# Parsing and validation
+# ----------------------------------------------------
+def parse_batch(lines):
+    """
+    Parse and validate a batch of raw lines.
+
+    Invalid timestamps, non-numeric or negative values and missing site ids
+    are rejected, following `clean_load_profile`.
+
+    Returns
+    -------
+    tuple
+        (DataFrame with timestamp, site_id, channel, value; rejected count)
+    """
+    lines = [ln for ln in lines if ln.strip()]
+    if not lines:
+        return pd.DataFrame(columns=FIELDS), 0
+
+    json_lines = [ln for ln in lines if ln.lstrip().startswith("{")]
+    csv_lines = [ln for ln in lines if not ln.lstrip().startswith("{")]
+    frames = []
+    if csv_lines:
+        frames.append(pd.read_csv(io.StringIO("\n".join(csv_lines)), header=None,
+                                  names=FIELDS, usecols=range(4), dtype=str,
+                                  on_bad_lines="skip", skipinitialspace=True))
+    if json_lines:
+        records = []
+        for ln in json_lines:
+            try:
+                records.append(json.loads(ln))
+            except ValueError:
+                continue
+        frames.append(pd.DataFrame.from_records(records, columns=FIELDS))
+
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce", format="mixed")
+    df["value"] = pd.to_numeric(df["value"], errors="coerce")
+    df["site_id"] = df["site_id"].astype(str).str.strip()
+    df["channel"] = df["channel"].astype(str).str.strip().str.lower()
+
+    valid = (df["timestamp"].notna() & df["value"].notna() & (df["value"] >= 0)
+             & (df["site_id"] != "") & (df["site_id"] != "nan"))
+    rejected = len(lines) - int(valid.sum())
+    return df.loc[valid].reset_index(drop=True), rejected
+
+
+class IncrementalHourlyNormalizer:
+    """
+    Streaming equivalent of the hourly resampling in `clean_load_profile`.
+
+    Each (site, channel) series keeps its open hour (sum and count), the last
+    accepted timestamp and the last emitted hourly value. Readings at or
+    before the last accepted timestamp are duplicates or late and are
+    dropped. Completed hours are emitted as means; gaps up to
+    `max_gap_hours` are linearly interpolated from the last emitted value,
+    longer gaps are left missing.
+    """
+
+    def __init__(self, max_gap_hours: int = 6):
+        self.max_gap_hours = max_gap_hours
+        self._state = {}
+        self.dropped = 0
+
+    def push(self, df):
+        """Add a parsed batch; return the hours it completed."""
+        if df.empty:
+            return self._frame([])
+
+        df = df.assign(_t=df["timestamp"].astype("datetime64[s]").astype(np.int64))
+        df = df.sort_values(["site_id", "channel", "_t"], kind="stable")
+
+        last_t = pd.Series({k: v["last_t"] for k, v in self._state.items()}, dtype="float64")
+        keys = pd.MultiIndex.from_arrays([df["site_id"], df["channel"]])
+        previous = last_t.reindex(keys).to_numpy() if len(last_t) else np.full(len(df), np.nan)
+        fresh = ~(df["_t"].to_numpy() <= previous)
+        fresh &= ~df.duplicated(["site_id", "channel", "_t"]).to_numpy()
+        self.dropped += int((~fresh).sum())
+        df = df.loc[fresh]
+
+        df = df.assign(_h=df["_t"] // 3600)
+        hourly = df.groupby(["site_id", "channel", "_h"], sort=True)["value"].agg(["sum", "count"])
+        last_seen = df.groupby(["site_id", "channel"])["_t"].max()
+
+        out = []
+        for (site, channel), grp in hourly.groupby(level=[0, 1], sort=False):
+            hours = grp.index.get_level_values(2).to_numpy()
+            sums = grp["sum"].to_numpy(dtype=np.float64, copy=True)
+            counts = grp["count"].to_numpy(dtype=np.int64, copy=True)
+            state = self._state.setdefault((site, channel), {
+                "open_hour": None, "sum": 0.0, "count": 0,
+                "last_t": -np.inf, "last_hour": None, "last_value": None,
+            })
+            state["last_t"] = float(last_seen[(site, channel)])
+
+            if state["open_hour"] is not None:
+                if state["open_hour"] == hours[0]:
+                    sums[0] += state["sum"]
+                    counts[0] += state["count"]
+                else:
+                    hours = np.concatenate(([state["open_hour"]], hours))
+                    sums = np.concatenate(([state["sum"]], sums))
+                    counts = np.concatenate(([state["count"]], counts))
+
+            state["open_hour"], state["sum"], state["count"] = hours[-1], sums[-1], counts[-1]
+            if len(hours) > 1:
+                out.extend(self._emit(site, channel, state, hours[:-1], sums[:-1] / counts[:-1]))
+        return self._frame(out)
+
+    def flush(self):
+        """Emit every open hour, e.g. at end of stream."""
+        out = []
+        for (site, channel), state in self._state.items():
+            if state["open_hour"] is not None:
+                out.extend(self._emit(site, channel, state, np.array([state["open_hour"]]),
+                                      np.array([state["sum"] / state["count"]])))
+                state["open_hour"] = None
+        return self._frame(out)
+
+    def _emit(self, site, channel, state, hours, means):
+        if state["last_hour"] is not None:
+            hours = np.concatenate(([state["last_hour"]], hours))
+            means = np.concatenate(([state["last_value"]], means))
+            start = 1
+        else:
+            start = 0
+
+        rows = [(site, channel, h, v) for h, v in zip(hours[start:], means[start:])]
+        steps = np.diff(hours)
+        for i in np.flatnonzero((steps > 1) & (steps <= self.max_gap_hours + 1)):
+            gap = np.arange(hours[i] + 1, hours[i + 1])
+            filled = np.interp(gap, hours[i:i + 2], means[i:i + 2])
+            rows.extend((site, channel, h, v) for h, v in zip(gap, filled))
+
+        state["last_hour"], state["last_value"] = hours[-1], means[-1]
+        return rows
+
+    @staticmethod
+    def _frame(rows):
+        df = pd.DataFrame(rows, columns=["site_id", "channel", "hour", "kwh"])
+        df["timestamp"] = pd.to_datetime(df["hour"].astype(np.int64) * 3600, unit="s")
+        df = df.sort_values(["site_id", "channel", "timestamp"], kind="stable")
+        return df[["site_id", "channel", "timestamp", "kwh"]].reset_index(drop=True)
+
+
+def to_load_profile(hourly, site_id, channel: str = "meter"):
+    """Select one series from normalizer output in `clean_load_profile` form."""
+    sel = hourly[(hourly["site_id"] == site_id) & (hourly["channel"] == channel)]
+    return sel[["timestamp", "kwh"]].rename(columns={"kwh": "load_kwh"}).reset_index(drop=True)
+
+
+# ----------------------------------------------------
+# Pipeline
+# ----------------------------------------------------
+class IngestMetrics:
+    """Counters and throughput for an ingestion run."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.lines = 0
+        self.valid = 0
+        self.rejected = 0
+        self.late_or_duplicate = 0
+        self.batches = 0
+        self.hours_emitted = 0
+        self.queue_high_water = {}
+
+    def observe_queue(self, name, queue):
+        self.queue_high_water[name] = max(self.queue_high_water.get(name, 0), queue.qsize())
+
+    def as_dict(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            "lines": self.lines,
+            "valid": self.valid,
+            "rejected": self.rejected,
+            "late_or_duplicate": self.late_or_duplicate,
+            "batches": self.batches,
+            "hours_emitted": self.hours_emitted,
+            "elapsed_s": elapsed,
+            "lines_per_s": self.lines / elapsed if elapsed > 0 else 0.0,
+            "queue_high_water": dict(self.queue_high_water),
+        }
+
+
+class IngestionPipeline:
+    """
+    Source → batcher → parser/normalizer → consumers, joined by bounded queues.
+
+    Parameters
+    ----------
+    source : async iterable of list[str]
+        One of the sources above
+    consumers : list of callables
+        Each receives the hourly DataFrame of a batch; coroutine functions
+        are awaited. Every consumer has its own bounded queue, so a slow
+        consumer holds back the whole pipeline instead of growing memory.
+    batch_size : int
+        Lines per parse batch
+    batch_timeout : float
+        Seconds to wait before flushing a partial batch
+    queue_size : int
+        Capacity of each inter-stage queue (in batches)
+    max_gap_hours : int
+        Interpolation limit passed to `IncrementalHourlyNormalizer`
+    """
+
+    _DONE = object()
+
+    def __init__(self, source, consumers, batch_size: int = 5000,
+                 batch_timeout: float = 1.0, queue_size: int = 8,
+                 max_gap_hours: int = 6):
+        self.source = source
+        self.consumers = list(consumers)
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.queue_size = queue_size
+        self.normalizer = IncrementalHourlyNormalizer(max_gap_hours)
+        self.metrics = IngestMetrics()
+
+    async def run(self):
+        """Run until the source is exhausted; return the metrics."""
+        raw = asyncio.Queue(maxsize=self.queue_size)
+        batches = asyncio.Queue(maxsize=self.queue_size)
+        outs = [asyncio.Queue(maxsize=self.queue_size) for _ in self.consumers]
+
+        tasks = [
+            asyncio.create_task(self._read(raw)),
+            asyncio.create_task(self._batch(raw, batches)),
+            asyncio.create_task(self._normalize(batches, outs)),
+        ]
+        tasks += [asyncio.create_task(self._consume(fn, q)) for fn, q in zip(self.consumers, outs)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return self.metrics.as_dict()
+
+    async def _read(self, raw):
+        async for chunk in self.source:
+            self.metrics.lines += len(chunk)
+            await raw.put(chunk)
+            self.metrics.observe_queue("raw", raw)
+        await raw.put(self._DONE)
+
+    async def _batch(self, raw, batches):
+        batch, done = [], False
+        while not done:
+            try:
+                chunk = await asyncio.wait_for(raw.get(), self.batch_timeout)
+            except asyncio.TimeoutError:
+                chunk = None
+            if chunk is self._DONE:
+                done = True
+            elif chunk:
+                batch.extend(chunk)
+            if batch and (done or chunk is None or len(batch) >= self.batch_size):
+                await batches.put(batch)
+                self.metrics.observe_queue("batches", batches)
+                batch = []
+        await batches.put(self._DONE)
+
+    async def _normalize(self, batches, outs):
+        while True:
+            batch = await batches.get()
+            if batch is self._DONE:
+                hourly = self.normalizer.flush()
+            else:
+                df, rejected = parse_batch(batch)
+                self.metrics.rejected += rejected
+                self.metrics.valid += len(df)
+                self.metrics.batches += 1
+                dropped_before = self.normalizer.dropped
+                hourly = self.normalizer.push(df)
+                self.metrics.late_or_duplicate += self.normalizer.dropped - dropped_before
+
+            if not hourly.empty:
+                self.metrics.hours_emitted += len(hourly)
+                for i, q in enumerate(outs):
+                    await q.put(hourly)
+                    self.metrics.observe_queue(f"consumer_{i}", q)
+            if batch is self._DONE:
+                for q in outs:
+                    await q.put(self._DONE)
+                return
+
+    async def _consume(self, fn, queue):
+        while True:
+            item = await queue.get()
+            if item is self._DONE:
+                return
+            result = fn(item)
+            if asyncio.iscoroutine(result):
+                await result
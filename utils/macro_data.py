@@ -0,0 +1,167 @@
+"""
+Columnar loader for the World Bank GDP table in data/gdp_data.csv.
+
+The wide CSV (one column per year, one row per country) is parsed once into
+long, typed arrays (country index, year, value) and cached as an .npz file
+next to the CSV. Later loads read the cache, which is rebuilt automatically
+when the CSV's size or modification time changes. Queries work on a dense
+countries × years matrix built from the long arrays, so range slices,
+growth rates and CAGRs run over every country at once.
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_CSV = Path(__file__).resolve().parents[1] / "data" / "gdp_data.csv"
+
+_TABLES = {}
+
+
+def _fingerprint(path):
+    st = os.stat(path)
+    return np.array([st.st_size, st.st_mtime_ns], dtype=np.int64)
+
+
+def _parse_csv(path):
+    import pandas as pd
+
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    year_cols = [c for c in df.columns if str(c).strip().isdigit()]
+    wide = df[year_cols].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+
+    country_idx, year_pos = np.nonzero(~np.isnan(wide))
+    years = np.array([int(c) for c in year_cols], dtype=np.int16)
+    return {
+        "codes": df["Country Code"].to_numpy(dtype=str),
+        "names": df["Country Name"].to_numpy(dtype=str),
+        "indicator": np.array(df["Indicator Code"].iloc[0] if len(df) else ""),
+        "country": country_idx.astype(np.int32),
+        "year": years[year_pos],
+        "value": wide[country_idx, year_pos],
+    }
+
+
+class MacroTable:
+    """
+    Long-format macro series with a country-code index.
+
+    Attributes
+    ----------
+    codes, names : np.ndarray
+        ISO3 codes and country names, one per row of `matrix`
+    country, year, value : np.ndarray
+        Long columns, one entry per non-missing observation
+    years : np.ndarray
+        Year axis of `matrix`
+    matrix : np.ndarray
+        Dense countries × years values with NaN for missing observations
+    """
+
+    def __init__(self, columns):
+        self.codes = columns["codes"]
+        self.names = columns["names"]
+        self.indicator = str(columns["indicator"])
+        self.country = columns["country"]
+        self.year = columns["year"]
+        self.value = columns["value"]
+        self.index = {code: i for i, code in enumerate(self.codes.tolist())}
+
+        first = int(self.year.min()) if self.year.size else 0
+        last = int(self.year.max()) if self.year.size else -1
+        self.years = np.arange(first, last + 1, dtype=np.int16)
+        self.matrix = np.full((self.codes.size, self.years.size), np.nan)
+        self.matrix[self.country, self.year - first] = self.value
+
+    def rows(self, codes=None):
+        if codes is None:
+            return slice(None)
+        if isinstance(codes, str):
+            return [self.index[codes]]
+        return [self.index[c] for c in codes]
+
+    def _cols(self, start=None, end=None):
+        first = int(self.years[0])
+        lo = 0 if start is None else int(start) - first
+        hi = self.years.size if end is None else int(end) - first + 1
+        return slice(max(lo, 0), max(hi, 0))
+
+    def window(self, codes=None, start=None, end=None):
+        """Values for countries over years start..end inclusive (view when codes is None)."""
+        cols = self._cols(start, end)
+        return self.matrix[self.rows(codes), cols]
+
+    def series(self, code, start=None, end=None):
+        """(years, values) for one country."""
+        cols = self._cols(start, end)
+        return self.years[cols], self.matrix[self.index[code], cols]
+
+    def growth_rates(self, codes=None, start=None, end=None):
+        """Year-on-year growth rates; column j is growth into year start+j+1."""
+        values = self.window(codes, start, end)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return values[:, 1:] / values[:, :-1] - 1
+
+    def cagr(self, start, end, codes=None):
+        """Compound annual growth rate between two years for each country."""
+        first = self.window(codes, start, start)[:, 0]
+        last = self.window(codes, end, end)[:, 0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (last / first) ** (1.0 / (int(end) - int(start))) - 1
+
+    def escalation_rate(self, code: str = "NGA", years: int = 10, end=None):
+        """
+        CAGR over the latest `years` years with data for `code`, for use as
+        `tariff_escalation` in `savings_model_v1.predict_savings`.
+        """
+        yrs, vals = self.series(code, end=end)
+        ok = ~np.isnan(vals)
+        if ok.sum() < 2:
+            raise ValueError(f"Not enough data for {code}")
+        last = int(yrs[ok][-1])
+        start = max(last - years, int(yrs[ok][0]))
+        return float(self.cagr(start, last, [code])[0])
+
+
+def load_macro_table(csv_path=DEFAULT_CSV, cache_path=None, refresh: bool = False):
+    """
+    Load a World Bank wide CSV through its columnar .npz cache.
+
+    Parameters
+    ----------
+    csv_path : str or Path
+        Wide CSV, data/gdp_data.csv by default
+    cache_path : str or Path, optional
+        Cache location; the CSV path with an .npz suffix by default
+    refresh : bool
+        Rebuild the cache even if it is current
+
+    Returns
+    -------
+    MacroTable
+        Shared per process for a given CSV path
+    """
+    csv_path = Path(csv_path)
+    cache_path = Path(cache_path) if cache_path else csv_path.with_suffix(".npz")
+    fingerprint = _fingerprint(csv_path)
+
+    key = str(csv_path.resolve())
+    cached = _TABLES.get(key)
+    if cached is not None and not refresh and np.array_equal(cached[0], fingerprint):
+        return cached[1]
+
+    columns = None
+    if cache_path.exists() and not refresh:
+        with np.load(cache_path, allow_pickle=False) as npz:
+            if np.array_equal(npz["fingerprint"], fingerprint):
+                columns = {k: npz[k] for k in npz.files if k != "fingerprint"}
+
+    if columns is None:
+        columns = _parse_csv(csv_path)
+        tmp = cache_path.with_suffix(".tmp.npz")
+        np.savez(tmp, fingerprint=fingerprint, **columns)
+        os.replace(tmp, cache_path)
+
+    table = MacroTable(columns)
+    _TABLES[key] = (fingerprint, table)
+    return table
@@ -1,7 +1,11 @@
 import pandas as pd
 import numpy as np
 
-def clean_load_profile(df: pd.DataFrame) -> pd.DataFrame:
+from utils.aggregates import build_pyramid
+from utils.data_quality import long_run_mask
+
+def clean_load_profile(df: pd.DataFrame, return_pyramid: bool = False,
+                       max_gap_hours: int = 6):
     """
     Cleans and standardizes the load-profile dataset to ensure
     it is suitable for the ML forecasting models.
@@ -14,6 +18,15 @@ def clean_load_profile(df: pd.DataFrame) -> pd.DataFrame:
         A cleaned dataframe with:
         - 'timestamp' (datetime)
         - 'load_kwh' (float)
+
+        With `return_pyramid=True`, a tuple of the dataframe and a
+        `utils.aggregates.LoadPyramid` of 15-min to annual aggregates built
+        from the validated readings before resampling and gap filling.
+
+    Gaps longer than `max_gap_hours` are left as NaN rather than filled, so
+    an outage does not turn into fabricated load; run
+    `utils.data_quality.profile_load_quality` on the raw data to see them.
+    Pass `max_gap_hours=None` to fill every gap.
     """
 
     # ----------------------------------------------------
@@ -59,19 +72,27 @@ def clean_load_profile(df: pd.DataFrame) -> pd.DataFrame:
     # 5. Fill missing timestamps (optional)
     #    We enforce hourly resolution if timestamps are regular
     # ----------------------------------------------------
+    if return_pyramid:
+        pyramid = build_pyramid(df["timestamp"].to_numpy(), df["load_kwh"].to_numpy())
+
     df = df.set_index("timestamp")
 
     try:
         freq = df.index.inferred_freq
         if freq is None:
             # try forcing hourly frequency
-            df = df.resample("1H").mean()
+            df = df.resample("1h").mean()
     except:
-        df = df.resample("1H").mean()
+        df = df.resample("1h").mean()
 
     # ----------------------------------------------------
-    # 6. Forward-fill missing load entries
+    # 6. Forward-fill missing load entries (short gaps only)
     # ----------------------------------------------------
-    df["load_kwh"] = df["load_kwh"].interpolate(method="linear").fillna(method="bfill")
+    missing = df["load_kwh"].isna().to_numpy()
+    df["load_kwh"] = df["load_kwh"].interpolate(method="linear").bfill()
+    if max_gap_hours is not None:
+        df.loc[long_run_mask(missing, max_gap_hours), "load_kwh"] = np.nan
 
+    if return_pyramid:
+        return df.reset_index(), pyramid
     return df.reset_index()
@@ -0,0 +1,283 @@
+"""
+Memory-mapped store for aligned hourly profiles of a whole fleet.
+
+Profiles live in one float32 sites × hours matrix on disk with a shared
+hourly time axis and a site-id → row index, instead of one pandas frame
+with its own datetime index per site. The matrix is allocated with spare
+rows and columns so appending sites or hours usually writes in place; when
+capacity runs out the file is regrown (doubled) once.
+
+The matrix file is named after its capacity and the metadata names the
+file in use. A regrown copy is written in full before the metadata is
+switched to it, so a crash at any point leaves metadata that matches
+its file.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+
+META_FILE = "meta.json"
+# Matrix file of stores whose metadata does not name one
+VALUES_FILE = "values.f32"
+HOUR = np.timedelta64(1, "h")
+
+
+class FleetProfileStore:
+    """
+    Sites × hours float32 matrix backed by a memory-mapped file.
+
+    Parameters
+    ----------
+    path : str or Path
+        Store directory, created with `FleetProfileStore.create`
+    mode : str
+        "r" for read-only views, "r+" to allow appends and writes
+    """
+
+    def __init__(self, path, mode: str = "r"):
+        self.path = Path(path)
+        self.mode = mode
+        with open(self.path / META_FILE, encoding="utf-8") as fh:
+            meta = json.load(fh)
+        self.start = np.datetime64(meta["start"], "h")
+        self.n_hours = int(meta["n_hours"])
+        self.site_ids = list(meta["site_ids"])
+        self._cap_sites = int(meta["cap_sites"])
+        self._cap_hours = int(meta["cap_hours"])
+        self._values_file = meta.get("values_file", VALUES_FILE)
+        self._index = {sid: i for i, sid in enumerate(self.site_ids)}
+        self._open()
+
+    @classmethod
+    def create(cls, path, start, n_hours: int = 0, cap_sites: int = 1024,
+               cap_hours: int = 8760):
+        """Create an empty store whose time axis begins at `start`."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        cap_hours = max(cap_hours, n_hours)
+        values_file = cls._values_name(cap_sites, cap_hours)
+        np.memmap(path / values_file, dtype=np.float32, mode="w+",
+                  shape=(cap_sites, cap_hours)).flush()
+        cls._write_meta(path, {
+            "start": str(np.datetime64(start, "h")),
+            "n_hours": n_hours,
+            "site_ids": [],
+            "cap_sites": cap_sites,
+            "cap_hours": cap_hours,
+            "values_file": values_file,
+        })
+        return cls(path, mode="r+")
+
+    @staticmethod
+    def _values_name(cap_sites, cap_hours):
+        return f"values_{cap_sites}x{cap_hours}.f32"
+
+    @staticmethod
+    def _write_meta(path, meta):
+        tmp = Path(path) / (META_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(meta, fh)
+        tmp.replace(Path(path) / META_FILE)
+
+    def _open(self):
+        self._values = np.memmap(self.path / self._values_file, dtype=np.float32, mode=self.mode,
+                                 shape=(self._cap_sites, self._cap_hours))
+
+    def _save_meta(self):
+        self._write_meta(self.path, {
+            "start": str(self.start),
+            "n_hours": self.n_hours,
+            "site_ids": self.site_ids,
+            "cap_sites": self._cap_sites,
+            "cap_hours": self._cap_hours,
+            "values_file": self._values_file,
+        })
+
+    # ----------------------------------------------------
+    # Index and time axis
+    # ----------------------------------------------------
+    @property
+    def n_sites(self):
+        return len(self.site_ids)
+
+    @property
+    def shape(self):
+        return self.n_sites, self.n_hours
+
+    def rows(self, site_ids):
+        """
+        Row numbers for one or more site ids (KeyError if unknown). Integers
+        are site ids here as everywhere else; see `window(rows=...)` for
+        addressing by row number.
+        """
+        if isinstance(site_ids, (str, int, np.integer)):
+            return self._index[site_ids]
+        return np.fromiter((self._index[s] for s in site_ids), dtype=np.int64)
+
+    def hour_of(self, timestamp):
+        """Column of the hour containing `timestamp`."""
+        return int((np.datetime64(timestamp, "h") - self.start) // HOUR)
+
+    def time_axis(self, start: int = 0, stop: int = None):
+        """Hourly timestamps for columns start..stop."""
+        stop = self.n_hours if stop is None else stop
+        return self.start + np.arange(start, stop) * HOUR
+
+    # ----------------------------------------------------
+    # Reads
+    # ----------------------------------------------------
+    @property
+    def values(self):
+        """The populated matrix as a memory-mapped view."""
+        return self._values[:self.n_sites, :self.n_hours]
+
+    def window(self, sites=None, start=None, stop=None, rows=None):
+        """
+        Profiles for a subset of sites over a time window.
+
+        Parameters
+        ----------
+        sites : site id or list of site ids, optional
+            Sites by id, integers included (as in `rows`); all sites when
+            both `sites` and `rows` are None
+        start, stop : int or datetime-like, optional
+            Column bounds or timestamps; the whole axis when None
+        rows : slice or array-like of int, optional
+            Sites by row number instead of id
+
+        Returns
+        -------
+        np.ndarray
+            A zero-copy memmap view when the rows form a regular stride
+            (a slice, a single site or an evenly spaced id list); otherwise
+            a gathered copy of just the requested rows and hours.
+        """
+        cols = slice(self._col(start, 0), self._col(stop, self.n_hours))
+        values = self.values
+        if sites is not None and rows is not None:
+            raise ValueError("Pass either sites (ids) or rows (row numbers), not both")
+        if sites is None and rows is None:
+            return values[:, cols]
+        if isinstance(rows, slice):
+            return values[rows, cols]
+        if isinstance(sites, (str, int, np.integer)):
+            return values[self._index[sites], cols]
+
+        rows = self.rows(sites) if sites is not None else np.asarray(rows, dtype=np.int64).ravel()
+        if rows.size == 1:
+            return values[rows[0]:rows[0] + 1, cols]
+        steps = np.diff(rows)
+        if steps.size and steps[0] > 0 and (steps == steps[0]).all():
+            return values[rows[0]:rows[-1] + 1:steps[0], cols]
+        return values[rows, cols]
+
+    def _col(self, value, default):
+        if value is None:
+            return default
+        if isinstance(value, (int, np.integer)):
+            return int(value)
+        return self.hour_of(value)
+
+    # ----------------------------------------------------
+    # Writes
+    # ----------------------------------------------------
+    def append_sites(self, site_ids, profiles=None):
+        """
+        Add sites, optionally with profiles covering the current time axis.
+
+        Returns the row numbers of the new sites.
+        """
+        site_ids = list(site_ids)
+        dup = [s for s in site_ids if s in self._index]
+        if dup:
+            raise ValueError(f"Sites already in store: {dup[:5]}")
+        first = self.n_sites
+        last = first + len(site_ids)
+        self._reserve(last, self.n_hours)
+
+        # Rows past n_sites are unused, so a failed write leaves no trace;
+        # the sites are only indexed once their profiles are in place
+        rows = slice(first, last)
+        if profiles is None:
+            self._values[rows, :self.n_hours] = np.nan
+        else:
+            self._values[rows, :self.n_hours] = np.asarray(profiles, dtype=np.float32)
+
+        for i, sid in enumerate(site_ids):
+            self._index[sid] = first + i
+        self.site_ids.extend(site_ids)
+        self._save_meta()
+        return np.arange(first, last)
+
+    def append_profile(self, site_id, df, column: str = "load_kwh"):
+        """
+        Add one site from a `clean_load_profile` frame.
+
+        Readings are placed on the shared axis by timestamp; hours outside
+        the axis are ignored and hours without a reading stay NaN.
+        """
+        hours = ((df["timestamp"].to_numpy().astype("datetime64[h]") - self.start)
+                 // HOUR).astype(np.int64)
+        inside = (hours >= 0) & (hours < self.n_hours)
+        row = np.full(self.n_hours, np.nan, dtype=np.float32)
+        row[hours[inside]] = df[column].to_numpy(dtype=np.float32)[inside]
+        return self.append_sites([site_id], row[None, :])[0]
+
+    def append_hours(self, values):
+        """Extend the time axis with hours for every site (n_sites × k)."""
+        values = np.asarray(values, dtype=np.float32)
+        if values.ndim == 1:
+            values = values[:, None]
+        if values.shape[0] != self.n_sites:
+            raise ValueError("append_hours needs one row per site in the store")
+        first = self.n_hours
+        self._reserve(self.n_sites, first + values.shape[1])
+        self._values[:self.n_sites, first:first + values.shape[1]] = values
+        self.n_hours = first + values.shape[1]
+        self._save_meta()
+
+    def write(self, sites, values, start=0):
+        """Overwrite a block of existing sites starting at hour `start`."""
+        rows = self.rows(sites)
+        start = self._col(start, 0)
+        values = np.asarray(values, dtype=np.float32)
+        self._values[rows, start:start + values.shape[-1]] = values
+
+    def _reserve(self, n_sites, n_hours):
+        if n_sites <= self._cap_sites and n_hours <= self._cap_hours:
+            return
+        cap_sites = max(self._cap_sites, 1)
+        while cap_sites < n_sites:
+            cap_sites *= 2
+        cap_hours = max(self._cap_hours, 1)
+        while cap_hours < n_hours:
+            cap_hours *= 2
+
+        values_file = self._values_name(cap_sites, cap_hours)
+        grown = np.memmap(self.path / values_file, dtype=np.float32, mode="w+",
+                          shape=(cap_sites, cap_hours))
+        step = max(1, (64 << 20) // (4 * max(self.n_hours, 1)))
+        for start in range(0, self.n_sites, step):
+            stop = min(start + step, self.n_sites)
+            grown[start:stop, :self.n_hours] = self._values[start:stop, :self.n_hours]
+        grown.flush()
+        del grown
+        self._values.flush()
+
+        # The metadata switch is the commit point: until it lands, readers
+        # and a restarted writer still see the old, intact file
+        old_file = self._values_file
+        self._cap_sites, self._cap_hours, self._values_file = cap_sites, cap_hours, values_file
+        self._save_meta()
+        self._open()
+        try:
+            # Views handed out earlier keep the old mapping alive until released
+            (self.path / old_file).unlink()
+        except OSError:
+            pass
+
+    def flush(self):
+        if self.mode != "r":
+            self._values.flush()
+            self._save_meta()
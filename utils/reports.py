@@ -0,0 +1,209 @@
+"""
+Executive-summary reports for one site or a whole portfolio.
+
+Each narrative branch (performance ratio below 70%, payback over 15 years,
+LCOE above tariff, savings below CAPEX) is one bit of a 4-bit code computed
+for a whole chunk of sites with vectorized masks. The 16 possible summaries
+are precompiled once into positional format strings, so rendering a site is
+a single `str.format` call on the template its code selects.
+
+Batch results are columnar: a `models.results.BatchResults`, a dict of
+equal-length arrays (NumPy or memmap) or an iterable of either. Writers
+stream chunk by chunk, so memory stays constant whatever the number of
+sites.
+"""
+import csv
+import html
+import re
+from collections.abc import Mapping
+
+import numpy as np
+
+# Columns read from batch results, in template field order
+FIELDS = (
+    "pv_kw", "battery_kwh", "performance_ratio", "capex", "opex", "payback_years",
+    "lcoe", "tariff", "annual_tons", "lifetime_tons", "total_savings",
+)
+
+_INTRO = (
+    "Based on the current inputs, the recommended PV system size is {pv_kw:.1f} kW "
+    "with a battery storage of {battery_kwh:.1f} kWh. "
+)
+_PERFORMANCE = (
+    "The system performs efficiently with a performance ratio of {performance_ratio:.1f}%. ",
+    "The system's performance ratio is {performance_ratio:.1f}%, which is below optimal. "
+    "Improvements in panel orientation, cleaning, or higher-efficiency panels are advised. ",
+)
+_COSTS = "The initial investment cost is ₦{capex:,.0f} with annual OPEX of ₦{opex:,.0f}. "
+_PAYBACK = (
+    "The payback period of {payback_years:.1f} years indicates a reasonable return on investment. ",
+    "However, the payback period is {payback_years:.1f} years, which is relatively long; "
+    "consider reducing CAPEX or exploring incentives. ",
+)
+_LCOE = (
+    "The LCOE is ₦{lcoe:,.2f}/kWh, below the grid tariff, making this system economically favorable. ",
+    "The levelized cost of electricity (LCOE) is ₦{lcoe:,.2f}/kWh, which exceeds the current grid "
+    "tariff of ₦{tariff:,.2f}/kWh. Electricity from this PV system may be more expensive than grid "
+    "electricity. ",
+)
+_CARBON = (
+    "Environmentally, the system avoids {annual_tons:.2f} tons of CO₂ annually and "
+    "{lifetime_tons:.2f} tons over its lifetime, contributing positively to sustainability. "
+)
+_SAVINGS = (
+    "The total projected savings over 25 years is ₦{total_savings:,.0f}, exceeding the initial "
+    "investment, highlighting long-term financial benefits. ",
+    "However, the total projected savings over 25 years is ₦{total_savings:,.0f}, which is below "
+    "the initial CAPEX. System optimization could improve economic outcomes. ",
+)
+
+# Bit of each branch in the template code
+LOW_PERFORMANCE, LONG_PAYBACK, LCOE_ABOVE_TARIFF, SAVINGS_BELOW_CAPEX = 1, 2, 4, 8
+
+
+def _compile(text):
+    """Replace named fields with their FIELDS position."""
+    return re.sub(r"\{(\w+)", lambda m: "{%d" % FIELDS.index(m.group(1)), text)
+
+
+TEMPLATES = tuple(
+    _compile(
+        _INTRO
+        + _PERFORMANCE[bool(code & LOW_PERFORMANCE)]
+        + _COSTS
+        + _PAYBACK[bool(code & LONG_PAYBACK)]
+        + _LCOE[bool(code & LCOE_ABOVE_TARIFF)]
+        + _CARBON
+        + _SAVINGS[bool(code & SAVINGS_BELOW_CAPEX)]
+    ).format
+    for code in range(16)
+)
+
+
+def narrative_codes(results):
+    """
+    Template code (sum of branch bits) for every site in a chunk.
+
+    Parameters
+    ----------
+    results : mapping of array-like
+        Columns named in FIELDS
+
+    Returns
+    -------
+    np.ndarray
+        int8 codes in [0, 16)
+    """
+    def col(name):
+        return np.asarray(results[name], dtype=np.float64)
+
+    capex = col("capex")
+    return (
+        (col("performance_ratio") < 70) * LOW_PERFORMANCE
+        + (col("payback_years") > 15) * LONG_PAYBACK
+        + (col("lcoe") > col("tariff")) * LCOE_ABOVE_TARIFF
+        + (col("total_savings") < capex) * SAVINGS_BELOW_CAPEX
+    ).astype(np.int8)
+
+
+def _chunks(results, chunk_size):
+    """Normalize a dict of columns or an iterable of them into dict chunks."""
+    if not isinstance(results, Mapping):
+        yield from results
+        return
+    n = max((len(v) for v in results.values() if np.ndim(v) > 0), default=1)
+    for lo in range(0, n, chunk_size):
+        yield {key: value[lo:lo + chunk_size] if np.ndim(value) > 0 else value
+               for key, value in results.items()}
+
+
+def iter_reports(results, chunk_size: int = 10_000):
+    """
+    Yield (site_id, columns, summaries) per chunk of batch results.
+
+    `columns` is the chunk's FIELDS as broadcast float64 arrays and
+    `summaries` the rendered text for each site. An optional `site_id`
+    column labels sites; otherwise the position in the stream is used.
+    """
+    offset = 0
+    for chunk in _chunks(results, chunk_size):
+        n = max((len(v) for v in chunk.values() if np.ndim(v) > 0), default=1)
+        columns = {name: np.broadcast_to(np.asarray(chunk[name], dtype=np.float64), (n,)) for name in FIELDS}
+        codes = narrative_codes(columns).tolist()
+        rows = zip(*(columns[name].tolist() for name in FIELDS))
+        summaries = [TEMPLATES[code](*row) for code, row in zip(codes, rows)]
+        site_id = chunk.get("site_id")
+        site_id = np.arange(offset, offset + n) if site_id is None else np.asarray(site_id)
+        yield site_id, columns, summaries
+        offset += n
+
+
+def generate_report(system_size, capex, opex, savings, carbon, lcoe, performance, tariff):
+    """Executive summary for a single site from the dashboard's model outputs."""
+    row = {
+        "pv_kw": system_size["pv_kw"],
+        "battery_kwh": system_size["battery_kwh"],
+        "performance_ratio": performance,
+        "capex": capex,
+        "opex": opex,
+        "payback_years": savings["payback_years"],
+        "lcoe": lcoe,
+        "tariff": tariff,
+        "annual_tons": carbon["annual_tons"],
+        "lifetime_tons": carbon["lifetime_tons"],
+        "total_savings": savings["total_savings"],
+    }
+    code = int(narrative_codes(row))
+    return TEMPLATES[code](*(float(row[name]) for name in FIELDS))
+
+
+class _Output:
+    """Open `target` (path or text file object) for writing."""
+
+    def __init__(self, target):
+        self.target = target
+        self.fh = None
+
+    def __enter__(self):
+        if hasattr(self.target, "write"):
+            return self.target
+        self.fh = open(self.target, "w", encoding="utf-8", newline="")
+        return self.fh
+
+    def __exit__(self, *exc):
+        if self.fh is not None:
+            self.fh.close()
+
+
+def write_markdown(results, target, title: str = "Portfolio Report", chunk_size: int = 10_000):
+    """Stream one Markdown section per site to a path or file object."""
+    with _Output(target) as fh:
+        fh.write(f"# {title}\n\n")
+        for site_id, _, summaries in iter_reports(results, chunk_size):
+            fh.write("".join(f"## Site {sid}\n\n{text}\n\n" for sid, text in zip(site_id.tolist(), summaries)))
+
+
+def write_html(results, target, title: str = "Portfolio Report", chunk_size: int = 10_000):
+    """Stream a self-contained HTML document with one section per site."""
+    with _Output(target) as fh:
+        title = html.escape(title)
+        fh.write(f'<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n<title>{title}</title>\n'
+                 f'</head>\n<body>\n<h1>{title}</h1>\n')
+        for site_id, _, summaries in iter_reports(results, chunk_size):
+            fh.write("".join(
+                f"<section>\n<h2>Site {html.escape(str(sid))}</h2>\n<p>{html.escape(text)}</p>\n</section>\n"
+                for sid, text in zip(site_id.tolist(), summaries)
+            ))
+        fh.write("</body>\n</html>\n")
+
+
+def write_csv(results, target, chunk_size: int = 10_000):
+    """Stream one CSV row per site: site_id, every FIELDS column and the summary."""
+    with _Output(target) as fh:
+        writer = csv.writer(fh)
+        writer.writerow(("site_id",) + FIELDS + ("summary",))
+        for site_id, columns, summaries in iter_reports(results, chunk_size):
+            writer.writerows(zip(site_id.tolist(), *(columns[name].tolist() for name in FIELDS), summaries))
+
+
+WRITERS = {"html": write_html, "md": write_markdown, "csv": write_csv}
@@ -0,0 +1,174 @@
+"""
+Shared-memory data plane for process-pool workers.
+
+Large read-only inputs (load profiles, parameter tables, compiled model
+arrays) are copied once into POSIX shared memory by the parent with
+`SharedArrayPool.publish`. Workers receive a small picklable
+`SharedArrayHandle` and `attach` to it for a zero-copy, read-only NumPy
+view, so nothing large is pickled per task.
+
+Segments are unlinked when the pool is closed, when the interpreter exits
+and on SIGTERM; if the parent is killed outright, multiprocessing's
+resource tracker unlinks whatever it created.
+"""
+import atexit
+import os
+import signal
+import sys
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import NamedTuple
+
+import numpy as np
+
+_ATTACHED = {}
+_LIVE_POOLS = set()
+_PREVIOUS_SIGTERM = None
+
+
+class SharedArrayHandle(NamedTuple):
+    """Picklable reference to a published array."""
+    name: str
+    shape: tuple
+    dtype: str
+
+
+def _cleanup_all():
+    for pool in list(_LIVE_POOLS):
+        pool.close()
+    for shm in _ATTACHED.values():
+        try:
+            shm.close()
+        except BufferError:
+            pass  # views still alive; the mapping goes away with the process
+    _ATTACHED.clear()
+
+
+def _on_sigterm(signum, frame):
+    _cleanup_all()
+    if callable(_PREVIOUS_SIGTERM):
+        _PREVIOUS_SIGTERM(signum, frame)
+    else:
+        sys.exit(128 + signum)
+
+
+def _install_handlers():
+    global _PREVIOUS_SIGTERM
+    if _PREVIOUS_SIGTERM is not None:
+        return
+    atexit.register(_cleanup_all)
+    try:
+        _PREVIOUS_SIGTERM = signal.signal(signal.SIGTERM, _on_sigterm)
+    except ValueError:
+        # Not the main thread (e.g. inside Streamlit's script runner)
+        _PREVIOUS_SIGTERM = signal.SIG_DFL
+
+
+class SharedArrayPool:
+    """
+    Owner of a set of shared-memory arrays.
+
+    Use as a context manager so segments are released as soon as the work
+    is done:
+
+        with SharedArrayPool() as pool:
+            handles = pool.publish_many({"load": load, "rates": rates})
+            ...  # pass handles to workers
+    """
+
+    def __init__(self, prefix: str = "pvfc"):
+        self.prefix = prefix
+        self._segments = {}
+        self._owner = os.getpid()
+        _install_handlers()
+        _LIVE_POOLS.add(self)
+
+    def publish(self, array, name: str = None) -> SharedArrayHandle:
+        """Copy `array` into a new shared segment and return its handle."""
+        array = np.asarray(array, order="C")
+        name = name or f"{self.prefix}_{os.getpid()}_{uuid.uuid4().hex[:12]}"
+        shm = shared_memory.SharedMemory(name=name, create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+        self._segments[shm.name] = shm
+        return SharedArrayHandle(shm.name, array.shape, array.dtype.str)
+
+    def publish_many(self, arrays: dict) -> dict:
+        return {key: self.publish(value) for key, value in arrays.items()}
+
+    def close(self):
+        """Unlink every segment this pool created (only in the owning process)."""
+        if os.getpid() != self._owner:
+            return
+        for shm in self._segments.values():
+            try:
+                shm.close()
+                shm.unlink()
+            except (BufferError, FileNotFoundError):
+                pass
+        self._segments.clear()
+        _LIVE_POOLS.discard(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach(handle: SharedArrayHandle) -> np.ndarray:
+    """
+    Read-only zero-copy view of a published array.
+
+    Segments are attached once per process and kept open for later tasks.
+    """
+    shm = _ATTACHED.get(handle.name)
+    if shm is None:
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=handle.name, track=False)
+        else:
+            # Pool workers share the parent's resource tracker, so this
+            # registration is a no-op rather than a second owner
+            shm = shared_memory.SharedMemory(name=handle.name)
+        _ATTACHED[handle.name] = shm
+        _install_handlers()
+    view = np.ndarray(handle.shape, dtype=np.dtype(handle.dtype), buffer=shm.buf)
+    view.flags.writeable = False
+    return view
+
+
+def attach_many(handles: dict) -> dict:
+    return {key: attach(h) if isinstance(h, SharedArrayHandle) else h for key, h in handles.items()}
+
+
+def _run_chunk(func, handles, lo, hi, kwargs):
+    return func(attach_many(handles), lo, hi, **kwargs)
+
+
+def map_chunks(func, n_items: int, arrays: dict, chunk_size: int = 1024, workers: int = None,
+               **kwargs):
+    """
+    Run `func(arrays, lo, hi, **kwargs)` over item ranges in a process pool.
+
+    `arrays` values that are NumPy arrays are published to shared memory once
+    and reach every task as read-only views; other values are passed as is.
+    `func` must be a module-level function. With `workers=1` everything runs
+    in-process on the original arrays.
+
+    Returns
+    -------
+    list
+        `func` results in chunk order
+    """
+    bounds = [(lo, min(lo + chunk_size, n_items)) for lo in range(0, n_items, chunk_size)]
+    if workers == 1 or len(bounds) <= 1:
+        return [func(arrays, lo, hi, **kwargs) for lo, hi in bounds]
+
+    with SharedArrayPool() as pool:
+        handles = {
+            key: pool.publish(value) if isinstance(value, np.ndarray) else value
+            for key, value in arrays.items()
+        }
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_run_chunk, func, handles, lo, hi, kwargs) for lo, hi in bounds]
+            return [f.result() for f in futures]
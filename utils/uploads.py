@@ -0,0 +1,459 @@
+"""
+Background parsing of uploaded load-profile files.
+
+Large CSV or Excel meter exports are read in chunks on a worker thread.
+Only the timestamp and load columns are kept, as compact datetime/float
+arrays, so memory is a small multiple of the reading count rather than of
+the file's text. The readings are summed into hourly energy, gap-filled by
+`clean_load_profile` and folded into a typical 8760-hour year that the
+dashboard's models use in place of the synthetic profile.
+
+Results are keyed by the SHA-256 of the file bytes, kept in memory for
+every session of the process and written to data/upload_<digest>.npz, so
+neither reruns, other sessions nor restarts parse the same file twice.
+"""
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+
+from models.billing_model import HOURS_PER_YEAR
+from utils.aggregates import build_pyramid
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[1] / "data"
+
+_RESULTS = OrderedDict()
+_RESULTS_SIZE = 16
+# Finished failed jobs, so a bad file is not parsed again on every rerun
+_FAILED = OrderedDict()
+_JOBS = {}
+_LOCK = threading.Lock()
+
+
+def file_digest(data, block_size: int = 1 << 24) -> str:
+    """SHA-256 hex digest of a bytes-like object, hashed block by block."""
+    view = memoryview(data).cast("B")
+    h = hashlib.sha256()
+    for start in range(0, len(view), block_size):
+        h.update(view[start:start + block_size])
+    return h.hexdigest()
+
+
+def _pick_columns(columns):
+    """Timestamp and load columns, chosen the way `clean_load_profile` does."""
+    names = [str(c).lower().strip() for c in columns]
+    time_cols = [c for c, n in zip(columns, names) if "time" in n or "date" in n or "stamp" in n]
+    if not time_cols:
+        raise ValueError("No timestamp column found in uploaded file.")
+    load_cols = [c for c, n in zip(columns, names) if "load" in n or "kwh" in n or "energy" in n]
+    if not load_cols:
+        raise ValueError("No load/energy column found in uploaded file.")
+    return time_cols[0], load_cols[0]
+
+
+def _compact(timestamps, values):
+    """Validated (datetime64[ns], float64) arrays for one chunk of raw rows."""
+    import pandas as pd
+
+    ts = pd.to_datetime(pd.Series(timestamps), errors="coerce")
+    if getattr(ts.dt, "tz", None) is not None:
+        ts = ts.dt.tz_convert("UTC").dt.tz_localize(None)
+    kwh = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=np.float64)
+    ts = ts.to_numpy(dtype="datetime64[ns]")
+    keep = ~np.isnat(ts) & ~np.isnan(kwh) & (kwh >= 0)
+    return ts[keep], kwh[keep]
+
+
+def _csv_chunks(buffer, chunk_rows):
+    import pandas as pd
+
+    time_col, load_col = _pick_columns(pd.read_csv(buffer, nrows=0).columns)
+    buffer.seek(0)
+    reader = pd.read_csv(buffer, usecols=[time_col, load_col], dtype=str, chunksize=chunk_rows)
+    for chunk in reader:
+        yield chunk[time_col].to_numpy(), chunk[load_col].to_numpy(), buffer.tell()
+
+
+def _xlsx_chunks(buffer, chunk_rows):
+    import openpyxl
+
+    wb = openpyxl.load_workbook(buffer, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        rows = ws.iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        time_col, load_col = _pick_columns(header)
+        i, j = header.index(time_col), header.index(load_col)
+        total = ws.max_row or 0
+        done = 1
+        while True:
+            block = list(islice(rows, chunk_rows))
+            if not block:
+                break
+            done += len(block)
+            # Progress in bytes so CSV and Excel report alike
+            position = int(len(buffer.getbuffer()) * min(done / total, 1.0)) if total else 0
+            yield [r[i] for r in block], [r[j] for r in block], position
+    finally:
+        wb.close()
+
+
+def _xls_chunks(buffer, chunk_rows):
+    import pandas as pd
+
+    df = pd.read_excel(buffer, dtype=str)
+    time_col, load_col = _pick_columns(df.columns)
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        yield chunk[time_col].to_numpy(), chunk[load_col].to_numpy(), len(buffer.getbuffer())
+
+
+def read_load_readings(data, filename: str, chunk_rows: int = 500_000, progress=None):
+    """
+    Parse an uploaded file into validated readings.
+
+    Invalid timestamps, non-numeric and negative loads are dropped as in
+    `clean_load_profile`; ordering and duplicates are left to it.
+
+    Parameters
+    ----------
+    data : bytes-like
+        File contents
+    filename : str
+        Original name; the extension selects CSV, .xlsx or .xls parsing
+    chunk_rows : int
+        Rows parsed per chunk
+    progress : callable, optional
+        `progress(fraction)` after each chunk
+
+    Returns
+    -------
+    tuple
+        (timestamps datetime64[ns], load_kwh float64, rows read)
+    """
+    buffer = io.BytesIO(data)
+    suffix = Path(filename).suffix.lower()
+    if suffix == ".xlsx":
+        chunks = _xlsx_chunks(buffer, chunk_rows)
+    elif suffix == ".xls":
+        chunks = _xls_chunks(buffer, chunk_rows)
+    else:
+        chunks = _csv_chunks(buffer, chunk_rows)
+
+    size = max(len(buffer.getbuffer()), 1)
+    parts_ts, parts_kwh, rows = [], [], 0
+    for timestamps, values, position in chunks:
+        ts, kwh = _compact(timestamps, values)
+        parts_ts.append(ts)
+        parts_kwh.append(kwh)
+        rows += len(timestamps)
+        if progress is not None:
+            progress(min(position / size, 1.0))
+    if not parts_ts:
+        return np.array([], dtype="datetime64[ns]"), np.array([], dtype=np.float64), 0
+    return np.concatenate(parts_ts), np.concatenate(parts_kwh), rows
+
+
+def typical_year(start_hour: int, hourly):
+    """
+    Fold an hourly series onto one 8760-hour year (Feb 29 dropped).
+
+    Each hour of the year is the mean over every year that has it; hours
+    no year covers take the mean of their hour of day.
+
+    Parameters
+    ----------
+    start_hour : int
+        Epoch hour of `hourly[0]`
+    hourly : np.ndarray
+        Hourly load (kWh), NaN where missing
+
+    Returns
+    -------
+    np.ndarray
+        8760 hourly values
+    """
+    stamps = (start_hour + np.arange(hourly.shape[0])).astype("datetime64[h]")
+    days = stamps.astype("datetime64[D]")
+    day_of_year = (days - days.astype("datetime64[Y]")).astype(np.int64)
+    year = days.astype("datetime64[Y]").astype(np.int64) + 1970
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    # In leap years Feb 29 is day 59 (0-based); later days shift back one
+    keep = ~(leap & (day_of_year == 59)) & ~np.isnan(hourly)
+    day_of_year = day_of_year - (leap & (day_of_year > 59))
+    hour_of_day = (stamps - days).astype(np.int64)
+
+    position = (day_of_year * 24 + hour_of_day)[keep]
+    values = hourly[keep]
+    sums = np.bincount(position, weights=values, minlength=HOURS_PER_YEAR)
+    counts = np.bincount(position, minlength=HOURS_PER_YEAR)
+    out = np.divide(sums, counts, out=np.full(HOURS_PER_YEAR, np.nan), where=counts > 0)
+
+    missing = np.isnan(out)
+    if missing.any():
+        by_hour = np.bincount(hour_of_day[keep], weights=values, minlength=24)
+        n_hour = np.bincount(hour_of_day[keep], minlength=24)
+        fill = np.divide(by_hour, n_hour, out=np.zeros(24), where=n_hour > 0)
+        out[missing] = fill[np.flatnonzero(missing) % 24]
+    return out
+
+
+class LoadUpload:
+    """
+    Cleaned uploaded load profile.
+
+    Attributes
+    ----------
+    digest : str
+        SHA-256 of the file
+    filename : str
+    start_hour : int
+        Epoch hour of the first hourly value
+    hourly : np.ndarray
+        Cleaned hourly load (kWh); NaN over gaps longer than
+        `clean_load_profile`'s `max_gap_hours`
+    typical : np.ndarray
+        8760-hour typical year from `typical_year`
+    rows_read, rows_valid : int
+        Raw rows in the file and rows that passed validation
+
+    Totals, peaks and daily figures are read from `pyramid`, the typical
+    year's `utils.aggregates.LoadPyramid`, built once on first use.
+    """
+
+    def __init__(self, digest, filename, start_hour, hourly, typical, rows_read, rows_valid):
+        self.digest = digest
+        self.filename = filename
+        self.start_hour = int(start_hour)
+        self.hourly = hourly
+        self.typical = typical
+        self.rows_read = int(rows_read)
+        self.rows_valid = int(rows_valid)
+        self._pyramid = None
+
+    @property
+    def pyramid(self):
+        if self._pyramid is None:
+            hours = np.datetime64("2025-01-01T00", "h") + np.arange(HOURS_PER_YEAR)
+            self._pyramid = build_pyramid(hours, self.typical, step_seconds=3600)
+        return self._pyramid
+
+    @property
+    def annual_kwh(self) -> float:
+        return float(self.pyramid.total("site"))
+
+    @property
+    def daily_kwh(self) -> float:
+        return float(self.pyramid.daily("site")["sum"].mean())
+
+    @property
+    def peak_kw(self) -> float:
+        # Hourly energy (kWh per hour) is the mean demand over the hour (kW)
+        return float(self.pyramid.peak("site"))
+
+    def frame(self, year: int = 2025):
+        """Typical year as a `load_profile`-style DataFrame (timestamp, load_kwh)."""
+        import pandas as pd
+
+        timestamps = pd.date_range(f"{year}-01-01", f"{year}-12-31 23:00", freq="h")
+        timestamps = timestamps[~((timestamps.month == 2) & (timestamps.day == 29))]
+        return pd.DataFrame({"timestamp": timestamps, "load_kwh": self.typical})
+
+    def save(self, path):
+        tmp = Path(path).with_suffix(".tmp.npz")
+        np.savez(tmp, filename=np.array(self.filename), start_hour=self.start_hour, hourly=self.hourly,
+                 typical=self.typical, rows=np.array([self.rows_read, self.rows_valid]))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, digest, path):
+        with np.load(path, allow_pickle=False) as npz:
+            return cls(digest, str(npz["filename"]), int(npz["start_hour"]), npz["hourly"],
+                       npz["typical"], *npz["rows"].tolist())
+
+
+def hourly_energy(timestamps, kwh):
+    """
+    Sum interval energy readings into hours.
+
+    Readings are kWh per metering interval (the median spacing), so each
+    hour is the sum of its readings, scaled by the readings expected over
+    the readings present when some are missing. Duplicate timestamps keep
+    their first reading.
+
+    Returns
+    -------
+    (int, np.ndarray)
+        Epoch hour of the first value and hourly energy (kWh) up to the last
+        reading, NaN for hours without any
+    """
+    order = np.argsort(timestamps, kind="stable")
+    ts, kwh = timestamps[order], kwh[order]
+    first = np.ones(ts.size, dtype=bool)
+    first[1:] = ts[1:] != ts[:-1]
+    ts, kwh = ts[first], kwh[first]
+
+    step_s = float(np.median(np.diff(ts).astype("timedelta64[ns]").astype(np.int64))) / 1e9 \
+        if ts.size > 1 else 3600.0
+    hours = ts.astype("datetime64[h]").astype(np.int64)
+    index = hours - hours[0]
+    sums = np.bincount(index, weights=kwh)
+    counts = np.bincount(index)
+    hourly = np.divide(sums * (3600.0 / step_s), counts, out=np.full(sums.shape, np.nan),
+                       where=counts > 0)
+    return int(hours[0]), hourly
+
+
+def clean_upload(data, filename: str, digest: str = None, chunk_rows: int = 500_000, progress=None):
+    """
+    Parse, clean and reduce an uploaded file (blocking).
+
+    Reading takes the first 80% of `progress`, cleaning the rest.
+
+    Returns
+    -------
+    LoadUpload
+    """
+    import pandas as pd
+
+    from utils.preprocessing import clean_load_profile
+
+    report = progress or (lambda fraction, message="": None)
+    report(0.0, "Reading file")
+    ts, kwh, rows_read = read_load_readings(
+        data, filename, chunk_rows, lambda f: report(0.8 * f, "Reading file")
+    )
+    if ts.size == 0:
+        raise ValueError("No valid timestamp/load readings found in uploaded file.")
+
+    report(0.8, "Cleaning readings")
+    # Sum interval energy first: clean_load_profile averages irregular
+    # series, which would treat kWh readings as a rate
+    start_hour, hourly = hourly_energy(ts, kwh)
+    present = np.flatnonzero(~np.isnan(hourly))
+    cleaned = clean_load_profile(pd.DataFrame({
+        "timestamp": (start_hour + present).astype("datetime64[h]").astype("datetime64[ns]"),
+        "load_kwh": hourly[present],
+    }))
+    values = cleaned["load_kwh"].to_numpy(dtype=np.float64)
+
+    report(0.95, "Building typical year")
+    upload = LoadUpload(digest or file_digest(data), filename, start_hour, values,
+                        typical_year(start_hour, values), rows_read, ts.size)
+    report(1.0, "Done")
+    return upload
+
+
+class UploadJob:
+    """Progress and outcome of one background parse, shared by all sessions."""
+
+    def __init__(self, digest, filename):
+        self.digest = digest
+        self.filename = filename
+        self.progress = 0.0
+        self.message = "Queued"
+        self.result = None
+        self.error = None
+        self._finished = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._finished.is_set()
+
+    def wait(self, timeout=None) -> bool:
+        return self._finished.wait(timeout)
+
+    def _report(self, fraction, message=""):
+        self.progress = fraction
+        if message:
+            self.message = message
+
+    def _finish(self, result=None, error=None):
+        self.result, self.error = result, error
+        self.progress, self.message = 1.0, "Done" if error is None else "Failed"
+        self._finished.set()
+
+
+def _remember(upload):
+    _RESULTS[upload.digest] = upload
+    _RESULTS.move_to_end(upload.digest)
+    if len(_RESULTS) > _RESULTS_SIZE:
+        _RESULTS.popitem(last=False)
+
+
+def _remember_failure(job):
+    _FAILED[job.digest] = job
+    _FAILED.move_to_end(job.digest)
+    if len(_FAILED) > _RESULTS_SIZE:
+        _FAILED.popitem(last=False)
+
+
+def _run(job, data, cache_path, chunk_rows):
+    try:
+        upload = clean_upload(data, job.filename, job.digest, chunk_rows, job._report)
+        if cache_path is not None:
+            try:
+                upload.save(cache_path)
+            except OSError:
+                pass  # read-only deployment; the in-memory copy still serves
+        with _LOCK:
+            _remember(upload)
+        job._finish(upload)
+    except Exception as exc:
+        job._finish(error=exc)
+        with _LOCK:
+            _remember_failure(job)
+    finally:
+        with _LOCK:
+            _JOBS.pop(job.digest, None)
+
+
+def submit_upload(data, filename: str, digest: str = None, cache_dir=DEFAULT_CACHE_DIR,
+                  chunk_rows: int = 500_000) -> UploadJob:
+    """
+    Start (or join) the background parse of an uploaded file.
+
+    Files already parsed, in memory or in `cache_dir`, return a finished
+    job at once, as do files whose parse failed earlier in this process; a
+    file being parsed for another session returns that session's job.
+
+    Parameters
+    ----------
+    data : bytes-like
+        File contents; not copied until the worker reads it
+    filename : str
+        Original file name
+    digest : str, optional
+        Precomputed `file_digest(data)`, e.g. kept in session state
+    cache_dir : str or Path, optional
+        Where parsed results are persisted; None keeps them in memory only
+    """
+    digest = digest or file_digest(data)
+    cache_path = Path(cache_dir) / f"upload_{digest}.npz" if cache_dir is not None else None
+
+    with _LOCK:
+        job = _JOBS.get(digest) or _FAILED.get(digest)
+        if job is not None:
+            return job
+        job = UploadJob(digest, filename)
+        upload = _RESULTS.get(digest)
+        if upload is None and cache_path is not None and cache_path.exists():
+            try:
+                upload = LoadUpload.load(digest, cache_path)
+                _remember(upload)
+            except (OSError, ValueError, KeyError):
+                upload = None
+        if upload is not None:
+            _RESULTS.move_to_end(digest)
+            job._finish(upload)
+            return job
+        _JOBS[digest] = job
+
+    threading.Thread(target=_run, args=(job, data, cache_path, chunk_rows), daemon=True,
+                     name=f"upload-{digest[:8]}").start()
+    return job